@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class AnswerCache:
+    """Small thread-safe LRU for chat answers.
+
+    Entries are keyed by the normalized question; ``generation`` carries the
+    source versions (KB, catalog, FAQ). When the generation changes every entry
+    is dropped, so a version bump can never serve a stale answer. A TTL bounds
+    staleness for inputs that are not versioned (e.g. hours.json edits).
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 120.0) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._generation: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _sync_generation(self, generation: Hashable) -> None:
+        if generation != self._generation:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._sync_generation(generation)
+            ent = self._data.get(key)
+            if ent is None:
+                self.misses += 1
+                return None
+            ts, val = ent
+            if (time.monotonic() - ts) > self.ttl_seconds:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def set(self, key: Hashable, generation: Hashable, val: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._sync_generation(generation)
+            self._data[key] = (time.monotonic(), val)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, generation: Hashable, compute: Callable[[], Any]) -> Any:
+        hit = self.get(key, generation)
+        if hit is not None:
+            return hit
+        val = compute()
+        if val is not None:
+            self.set(key, generation, val)
+        return val
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -5,13 +5,16 @@ import os
 import re
 import json
 import math
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
 from typing import List, Tuple, Dict, Any
 from collections import Counter
 
 from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from difflib import SequenceMatcher
@@ -19,10 +22,14 @@ from datetime import datetime, timedelta
 import httpx
 from .time_rules import SHOP_HOURS as TR_SHOP_HOURS, validate_pickup_time as tr_validate_pickup_time, parse_pickup_iso as tr_parse_pickup_iso, is_blackout as tr_is_blackout
 from . import intent_router as IR
+from .answer_cache import AnswerCache
+from .faq_repository import get_faq_repository
+from .constraints_service import get_constraints_service
 try:
-    from .routers.orders import router as orders_router
+    from .routers.orders import router as orders_router, resume_pending_orders
 except Exception:
     orders_router = None
+    resume_pending_orders = None
 try:
     from .routers.faq import router as faq_router
 except Exception:
@@ -48,10 +55,18 @@ ECWID_STORE_ID = os.getenv("ECWID_STORE_ID")
 ECWID_API_TOKEN = os.getenv("ECWID_API_TOKEN")
 GOOGLE_REVIEW_URL = os.getenv("GOOGLE_REVIEW_URL", "https://www.google.com/search?q=Raka%27s+kotileipomo&sca_esv=6c7f7ca6e8ee6a34&rlz=1C5CHFA_enFI1167FI1167&hl=fi-FI&biw=1164&bih=754&tbm=lcl&ei=gxvEaJ7VH_G0wPAPhfyKqAY&ved=0ahUKEwjeos7mpdOPAxVxGhAIHQW-AmUQ4dUDCAo&uact=5&oq=Raka%27s+kotileipomo&gs_lp=Eg1nd3Mtd2l6LWxvY2FsIhJSYWthJ3Mga290aWxlaXBvbW8yBRAAGIAEMgUQABiABDIGEAAYFhgeMgYQABgWGB4yBhAAGBYYHjICECYyCBAAGIAEGKIEMggQABiABBiiBDIIEAAYogQYiQVIvAhQxAZYxAZwAHgAkAEAmAF-oAGmAqoBAzIuMbgBA8gBAPgBAZgCA6ACwAKYAwCIBgGSBwMxLjKgB64PsgcDMS4yuAfAAsIHBTItMi4xyAcW&sclient=gws-wiz-local#lkt=LocalPoiReviews&rlfi=hd:;si:7666209392203396731,l,ChJSYWthJ3Mga290aWxlaXBvbW9I2M7x8PS1gIAIWiQQABABGAAYASIScmFrYSdzIGtvdGlsZWlwb21vKgYIAhAAEAGSAQZiYWtlcnmqAUoKDS9nLzExcHk3MXN0dnMQATIfEAEiG12RikuLePke45zt2cmJ_CcYGIZmNEHDLSGmJzIWEAIiEnJha2EncyBrb3RpbGVpcG9tbw,y,n4xN2WK8BF4;mv:[[60.197882977319026,24.947339021027446],[60.19752302268097,24.946614778972545]]&lrd=0x468df9bf012e8049:0x6a63d8d32c0bf67b,3,,,,")
 LOCAL_TZ = os.getenv("LOCAL_TZ", "Europe/Helsinki")
-# Ordering time constraints (fallbacks if not discoverable from Ecwid)
-ECWID_MAX_ORDER_DAYS = int(os.getenv("ECWID_MAX_ORDER_DAYS", "60"))
-ECWID_MIN_LEAD_MINUTES = int(os.getenv("ECWID_MIN_LEAD_MINUTES", "720"))
+# Ordering time constraints: inferred from Ecwid and cached with stale-while-revalidate;
+# ECWID_MIN_LEAD_MINUTES / ECWID_MAX_ORDER_DAYS are the fallbacks if not discoverable.
+ORDER_CONSTRAINTS = get_constraints_service()
 CHAT_ENABLED = os.getenv("CHAT_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+# /api/chat_dual runs the legacy and RAG branches concurrently; a branch slower than this
+# is replaced by a placeholder instead of holding back the other answer.
+CHAT_DUAL_TIMEOUT_SECS = float(os.getenv("CHAT_DUAL_TIMEOUT_SECS", "12"))
+CHAT_DUAL_WORKERS = int(os.getenv("CHAT_DUAL_WORKERS", "8"))
+# Normalized-question answer cache (0 entries disables it)
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL_SECS = float(os.getenv("ANSWER_CACHE_TTL_SECS", "120"))
+ANSWER_CACHE_MAX_QUERY_CHARS = 300
 
 # Weekly pickup hours (imported from shared time rules)
 SHOP_HOURS: Dict[int, List[Tuple[str, str]]] = TR_SHOP_HOURS
@@ -119,32 +134,89 @@ KB_FILES = [p.name for p in sorted(LEGACY_KB_DIR.glob("*.json"))]
 # ============================================================
 # Optional RAG (external repo): kotileipomo-rag
 # ============================================================
-RAG_ENABLED = False
+RAG_ENABLED = False  # configured and importable; _rag_status() tells whether the index is loaded
 _RAG_FLAG = os.getenv("ENABLE_RAG", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Loading the index runs in a background thread (_start_rag_init) so imports and worker
+# boot stay independent of corpus size; chat_dual answers "warming up" until it is done.
+_RAG_READY = threading.Event()
+_RAG_INIT_LOCK = threading.Lock()
+_RAG_INIT: Dict[str, Any] = {"started": False, "error": None, "docs": 0, "seconds": None,
+                             "failures": 0, "retry_at": 0.0}
+# A failed load is retried by the next RAG request after base·2ⁿ seconds, capped at 5 min
+RAG_INIT_RETRY_SECS = float(os.getenv("RAG_INIT_RETRY_SECS", "5"))
+_RAG_RET = None
+_RAG_CACHE = None
 if _RAG_FLAG:
     try:
         import sys as _sys
         _RAG_SRC = (REPO_ROOT / "kotileipomo-rag" / "src")
         if _RAG_SRC.exists():
             _sys.path.insert(0, str(_RAG_SRC))
-            from rag.ingest import load_kb_docs as _rag_load, chunk_docs as _rag_chunk
-            from rag.index_bm25 import BM25Index as _RagBM
-            from rag.index_embeddings import EmbIndex as _RagEmb
+            from rag.index_store import load_or_build as _rag_load_index
+            from rag.index_embeddings import EmbIndex as _RagEmb, load_or_build_emb as _rag_load_emb
+            from rag.config import RAG_EMBEDDINGS as _RAG_EMB_FLAG
             from rag.retrieve import Retriever as _RagRet
             from rag.generate import compose_answer as _rag_compose, _special_answer as _rag_special
-            _RAG_DOCS = _rag_chunk(_rag_load())
-            _RAG_BM = _RagBM(_RAG_DOCS)
-            _RAG_EMB = _RagEmb()
-            _RAG_RET = _RagRet(_RAG_BM, _RAG_EMB)
+            from rag.cache import QueryCache as _RagQueryCache
+            # Hit lists and composed answers per (query, lang, top_k, index version)
+            _RAG_CACHE = _RagQueryCache(_rag_compose)
             RAG_ENABLED = True
-            logger.info(f"RAG ready: {len(_RAG_DOCS)} docs")
         else:
             logger.info("RAG not found (kotileipomo-rag/src missing)")
     except Exception as e:
-        logger.exception(f"RAG init failed: {e}")
+        logger.exception(f"RAG import failed: {e}")
 else:
     logger.info("RAG disabled (set ENABLE_RAG=1 to enable)")
 
+
+def _rag_init() -> None:
+    global _RAG_RET
+    t0 = time.monotonic()
+    try:
+        # Prefer the prebuilt artifact (kotileipomo-rag/scripts/build_index.py); rebuild if missing or stale
+        bm25, stale = _rag_load_index()
+        if stale:
+            logger.info(f"RAG index artifact not used ({stale}); built in memory")
+        emb = _RagEmb()
+        if _RAG_EMB_FLAG:
+            emb, emb_stale = _rag_load_emb(bm25.docs)
+            if emb_stale:
+                logger.info(f"RAG embeddings file not used ({emb_stale}); built in memory")
+        _RAG_RET = _RagRet(bm25, emb)
+        _RAG_INIT.update(docs=len(bm25.docs), seconds=round(time.monotonic() - t0, 3), error=None)
+        _RAG_READY.set()
+        logger.info(f"RAG ready: {len(bm25.docs)} docs, dense={'on' if emb.ready else 'off'} "
+                    f"in {_RAG_INIT['seconds']}s")
+    except Exception as e:
+        with _RAG_INIT_LOCK:
+            _RAG_INIT["failures"] += 1
+            delay = min(300.0, RAG_INIT_RETRY_SECS * 2 ** (_RAG_INIT["failures"] - 1))
+            _RAG_INIT.update(error=f"{type(e).__name__}: {e}", started=False,
+                             retry_at=time.monotonic() + delay)
+        logger.exception(f"RAG init failed, retrying after {delay:.0f}s: {e}")
+
+
+def _start_rag_init() -> None:
+    """Start loading the RAG index once per process (startup hook, or the first RAG request).
+
+    After a failed load the next call past the backoff starts another attempt.
+    """
+    if not RAG_ENABLED or _RAG_INIT["started"] or time.monotonic() < _RAG_INIT["retry_at"]:
+        return
+    with _RAG_INIT_LOCK:
+        if _RAG_INIT["started"] or time.monotonic() < _RAG_INIT["retry_at"]:
+            return
+        _RAG_INIT["started"] = True
+        threading.Thread(target=_rag_init, name="rag-init", daemon=True).start()
+
+
+def _rag_status() -> str:
+    if not RAG_ENABLED:
+        return "disabled"
+    if _RAG_READY.is_set():
+        return "ready"
+    return "failed" if _RAG_INIT["error"] else "warming_up"
+
 # ============================================================
 # Database (optional; e.g., Railway Postgres)
 # ============================================================
@@ -577,6 +649,7 @@ DOCS: List[Dict[str, Any]] = []
 DF: Counter = Counter()
 N: int = 0
 AVG_LEN: float = 0.0
+KB_VERSION: int = 0  # bumped on every build_index(); part of the answer cache generation
 
 def load_kb_clean() -> List[Dict[str, Any]]:
     kb: List[Dict[str, Any]] = []
@@ -644,7 +717,7 @@ def load_kb_clean() -> List[Dict[str, Any]]:
     return kb
 
 def build_index(kb: List[Dict[str, Any]]):
-    global DOCS, DF, N, AVG_LEN
+    global DOCS, DF, N, AVG_LEN, KB_VERSION
     DOCS = []
     DF = Counter()
     for i, item in enumerate(kb):
@@ -655,6 +728,7 @@ def build_index(kb: List[Dict[str, Any]]):
             DF[t] += 1
     N = len(kb)
     AVG_LEN = (sum(d["len"] for d in DOCS) / max(1, len(DOCS))) if DOCS else 0.0
+    KB_VERSION += 1
     logger.info(f"Indexed {N} KB docs. AVG_LEN={AVG_LEN:.2f}, vocab={len(DF)}")
 
 def _bm25_score(query_tokens: List[str], doc) -> float:
@@ -1794,7 +1868,8 @@ def rule_based_answer(user_msg: str, respond_lang: str | None = None) -> str | N
 def _ecwid_base() -> str:
     if not ECWID_STORE_ID:
         raise RuntimeError("ECWID_STORE_ID is not set")
-    return f"https://app.ecwid.com/api/v3/{ECWID_STORE_ID}"
+    api = (os.getenv("ECWID_API_BASE") or "https://app.ecwid.com/api/v3").rstrip("/")
+    return f"{api}/{ECWID_STORE_ID}"
 
 def _ecwid_headers() -> Dict[str, str]:
     if not ECWID_API_TOKEN:
@@ -1825,35 +1900,11 @@ def _ecwid_get_categories(limit: int = 200) -> List[Dict[str, Any]]:
         data = r.json()
     return data.get("items", [])
 
-def _ecwid_get_profile() -> Dict[str, Any]:
-    base = _ecwid_base()
-    headers = _ecwid_headers()
-    url = f"{base}/profile"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.get(url, headers=headers)
-        r.raise_for_status()
-        return r.json()
-
-def _ecwid_get_shipping_options() -> List[Dict[str, Any]]:
-    base = _ecwid_base()
-    headers = _ecwid_headers()
-    url = f"{base}/profile/shippingOptions"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
-    # Ecwid returns either list or {'items': [...]}
-    if isinstance(data, dict):
-        return data.get("items", [])
-    if isinstance(data, list):
-        return data
-    return []
-
 # --- Intent router Ecwid adapter wiring ---
 try:
     IR.ecwid.get_products = _ecwid_get_products
     IR.ecwid.get_categories = _ecwid_get_categories
-    IR.ecwid.get_order_constraints = (lambda debug=False: api_order_constraints(debug=debug))
+    IR.ecwid.get_order_constraints = (lambda debug=False: ORDER_CONSTRAINTS.get())
     IR.ecwid.is_blackout = _is_blackout
 except Exception:
     pass
@@ -1991,13 +2042,8 @@ def llm_like_answer(query: str, kb_items: List[Dict[str, Any]], respond_lang: st
         return "Jag hittade ingen färdig kunskapsbas-svar på frågan."
     return "I could not find a prepared knowledge-base answer for that question."
 
-def generate_llm_answer(query: str, kb_items: List[Dict[str, Any]], respond_lang: str) -> str:
-    """Use OpenAI to compose a KB-grounded answer in the requested language.
-    Safe fallback if unavailable.
-    """
-    if not OPENAI_CLIENT or not LLM_ENABLED:
-        return llm_like_answer(query, kb_items, respond_lang)
-
+def _llm_messages(query: str, kb_items: List[Dict[str, Any]], respond_lang: str) -> List[Dict[str, str]] | None:
+    """Build the grounded chat messages, or None when there is no KB context to ground on."""
     # Intent filter to avoid mixing unrelated topics (e.g., park vs parking)
     intent = infer_intent(query)
     kb_items = filter_items_for_intent(intent, kb_items)
@@ -2013,7 +2059,7 @@ def generate_llm_answer(query: str, kb_items: List[Dict[str, Any]], respond_lang
         context_blocks.append(f"Q: {q}\nA: {a}\n(Source: {src})")
 
     if not context_blocks:
-        return llm_like_answer(query, kb_items, respond_lang)
+        return None
 
     lang_name = LANG_NAMES.get(respond_lang, respond_lang)
     if respond_lang == "fi":
@@ -2044,14 +2090,26 @@ def generate_llm_answer(query: str, kb_items: List[Dict[str, Any]], respond_lang
         f"Knowledge base excerpts:\n{context}\n\n"
         "Compose a concise answer in Finnish using only the excerpts above. If the excerpts do not contain the answer, reply in Finnish that the information is not available."
     )
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+def generate_llm_answer(query: str, kb_items: List[Dict[str, Any]], respond_lang: str) -> str:
+    """Use OpenAI to compose a KB-grounded answer in the requested language.
+    Safe fallback if unavailable.
+    """
+    if not OPENAI_CLIENT or not LLM_ENABLED:
+        return llm_like_answer(query, kb_items, respond_lang)
+
+    messages = _llm_messages(query, kb_items, respond_lang)
+    if not messages:
+        return llm_like_answer(query, kb_items, respond_lang)
 
     try:
         resp = OPENAI_CLIENT.chat.completions.create(
             model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
+            messages=messages,
             temperature=0.2,
             max_tokens=300,
             timeout=LLM_TIMEOUT_SECS,
@@ -2061,6 +2119,36 @@ def generate_llm_answer(query: str, kb_items: List[Dict[str, Any]], respond_lang
     except Exception:
         return llm_like_answer(query, kb_items, respond_lang)
 
+def generate_llm_answer_stream(query: str, kb_items: List[Dict[str, Any]], respond_lang: str):
+    """Streaming variant of generate_llm_answer: yields text deltas as they arrive.
+    Falls back to a single deterministic chunk if the LLM is unavailable or fails before the first token.
+    """
+    messages = _llm_messages(query, kb_items, respond_lang) if (OPENAI_CLIENT and LLM_ENABLED) else None
+    if not messages:
+        yield llm_like_answer(query, kb_items, respond_lang)
+        return
+    sent = False
+    try:
+        stream = OPENAI_CLIENT.chat.completions.create(
+            model=LLM_MODEL,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=300,
+            timeout=LLM_TIMEOUT_SECS,
+            stream=True,
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                sent = True
+                yield delta
+    except Exception:
+        logger.warning("LLM stream failed", exc_info=True)
+    if not sent:
+        yield llm_like_answer(query, kb_items, respond_lang)
+
 # ============================================================
 # API routes
 # ============================================================
@@ -2077,8 +2165,51 @@ def health():
         "langdetect": True,
         "lang_hint": SUPPORTED_LANG_HINT,
         "ecwid_ready": bool(ECWID_STORE_ID and ECWID_API_TOKEN),
+        "answer_cache": ANSWER_CACHE.stats(),
+        "rag": {
+            "status": _rag_status(),
+            "docs": _RAG_INIT["docs"],
+            "init_seconds": _RAG_INIT["seconds"],
+            "error": _RAG_INIT["error"],
+        },
+        "rag_cache": _RAG_CACHE.stats() if _RAG_CACHE is not None else None,
     }
 
+# ============================================================
+# Answer cache
+# ============================================================
+ANSWER_CACHE = AnswerCache(max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl_seconds=ANSWER_CACHE_TTL_SECS)
+
+def _answer_cache_generation() -> Tuple[int, int, int]:
+    try:
+        faq_rev = get_faq_repository().revision
+    except Exception:
+        faq_rev = 0
+    return (KB_VERSION, IR.catalog_version(), faq_rev)
+
+def _answer_cache_key(kind: str, user_msg: str, respond_lang: str | None) -> Tuple[str, str, str] | None:
+    nq = _normalize(user_msg).strip()
+    if not nq or len(nq) > ANSWER_CACHE_MAX_QUERY_CHARS:
+        return None
+    return (kind, nq, respond_lang or PRIMARY_LANG)
+
+def _with_session(resp: ChatResponse, session_id: str | None) -> ChatResponse:
+    # Cached answers are shared across sessions; re-stamp the caller's session id
+    return ChatResponse(
+        reply=resp.reply,
+        source=resp.source,
+        match=resp.match,
+        session_id=session_id if resp.session_id is not None else None,
+    )
+
+def _cached_answer(kind: str, user_msg: str, respond_lang: str | None, session_id: str | None, compute) -> ChatResponse:
+    """Serve repeated questions from ANSWER_CACHE; `kind` separates pipelines."""
+    key = _answer_cache_key(kind, user_msg, respond_lang)
+    if key is None:
+        return compute()
+    resp = ANSWER_CACHE.get_or_compute(key, _answer_cache_generation(), compute)
+    return _with_session(resp, session_id)
+
 @app.post("/api/chat", response_model=ChatResponse)
 def chat(req: ChatRequest, request: Request, response: Response):
     if not CHAT_ENABLED:
@@ -2109,6 +2240,29 @@ def chat(req: ChatRequest, request: Request, response: Response):
     except Exception:
         pass
 
+    resp = _cached_answer("chat", user_msg, respond_lang, session_id,
+                          lambda: _answer_chat(user_msg, respond_lang, session_id))
+    try:
+        _db_insert_message(session_id, "assistant", resp.reply, resp.source, resp.match)
+    except Exception:
+        pass
+    return resp
+
+class _PendingLLM(BaseModel):
+    """Routing outcome when the reply still has to be composed by the LLM."""
+    kb_items: List[Dict[str, Any]]
+    source: str
+    match: float
+
+def _answer_chat(user_msg: str, respond_lang: str | None, session_id: str | None = None) -> ChatResponse:
+    routed = _route_chat(user_msg, respond_lang, session_id)
+    if isinstance(routed, ChatResponse):
+        return routed
+    reply = generate_llm_answer(user_msg, routed.kb_items, respond_lang=respond_lang or PRIMARY_LANG)
+    return ChatResponse(reply=reply, source=routed.source, match=routed.match, session_id=session_id)
+
+def _route_chat(user_msg: str, respond_lang: str | None, session_id: str | None = None) -> ChatResponse | _PendingLLM:
+    """Run the deterministic cascade; defer to the LLM only when it would be called."""
     # 0) Priority: exact KB match (taught items) should override rules
     try:
         matches0 = find_best_kb_match(user_msg, top_k=5)
@@ -2120,20 +2274,12 @@ def chat(req: ChatRequest, request: Request, response: Response):
             if _normalize(it.get("question") or "") == nq:
                 ans = (it.get("answer") or "").strip()
                 if ans:
-                    try:
-                        _db_insert_message(session_id, "assistant", ans, "KB", float(blend))
-                    except Exception:
-                        pass
                     return ChatResponse(reply=ans, source="KB", match=float(blend), session_id=session_id)
         # No exact match; continue to rules intent, then later general KB retrieval
 
     # 1) Rules first
     rb = rule_based_answer(user_msg, respond_lang)
     if rb:
-        try:
-            _db_insert_message(session_id, "assistant", rb, "Rules", 1.0)
-        except Exception:
-            pass
         return ChatResponse(reply=rb, source="Rules", match=1.0)
 
     # 1.5) Deterministic intent router for menu/hours/allergens/FAQ/blackouts
@@ -2142,10 +2288,6 @@ def chat(req: ChatRequest, request: Request, response: Response):
     except Exception:
         routed = None
     if routed:
-        try:
-            _db_insert_message(session_id, "assistant", routed, "Intent", 1.0)
-        except Exception:
-            pass
         return ChatResponse(reply=routed, source="Intent", match=1.0, session_id=session_id)
 
     # 2) Retrieval from taught KB (DB), then friendly fallback
@@ -2161,8 +2303,7 @@ def chat(req: ChatRequest, request: Request, response: Response):
             # Compose answer from top items if LLM enabled; else return best answer
             kb_items = [m[4] for m in matches]
             if LLM_ENABLED and OPENAI_CLIENT:
-                reply = generate_llm_answer(user_msg, kb_items, respond_lang=respond_lang or PRIMARY_LANG)
-                src = "KB • LLM"
+                return _PendingLLM(kb_items=kb_items, source="KB • LLM", match=float(blend))
             else:
                 reply = (best_item.get("answer") or "").strip() or None
                 src = "KB"
@@ -2173,16 +2314,79 @@ def chat(req: ChatRequest, request: Request, response: Response):
         intent = infer_intent(user_msg)
         kb_items = filter_items_for_intent(intent, kb_items)
         if LLM_ENABLED and OPENAI_CLIENT:
-            reply = generate_llm_answer(user_msg, kb_items, respond_lang=respond_lang or PRIMARY_LANG)
-            src = "LLM • Fallback"
+            return _PendingLLM(kb_items=kb_items, source="LLM • Fallback", match=best_score)
         else:
             reply = llm_like_answer(user_msg, kb_items, respond_lang or PRIMARY_LANG)
             src = "Fallback"
+    return ChatResponse(reply=reply, source=src, match=best_score, session_id=session_id)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/chat/stream")
+def chat_stream(req: ChatRequest, request: Request):
+    """Server-Sent Events variant of /api/chat.
+
+    Deterministic answers (KB, Rules, Intent, Fallback) arrive as a single `answer` event.
+    LLM-composed answers arrive as `start`, then `delta` events with text chunks, then `done`
+    carrying the full reply. Errors after the stream has started are sent as an `error` event.
+    """
+    if not CHAT_ENABLED:
+        raise HTTPException(status_code=403, detail="Chat is disabled. Please use the FAQ menu.")
+    user_msg = (req.message or "").strip()
+    if not user_msg:
+        raise HTTPException(status_code=400, detail="Message cannot be empty.")
+
+    session_id = (req.session_id or request.cookies.get("chat_session") or "").strip()
+    new_session = not session_id
+    if new_session:
+        import uuid
+        session_id = uuid.uuid4().hex
+    respond_lang = "fi"
+
     try:
-        _db_insert_message(session_id, "assistant", reply, src, best_score)
+        _db_insert_message(session_id, "user", user_msg, None, None)
     except Exception:
         pass
-    return ChatResponse(reply=reply, source=src, match=best_score, session_id=session_id)
+
+    def events():
+        try:
+            key = _answer_cache_key("chat", user_msg, respond_lang)
+            generation = _answer_cache_generation()
+            cached = ANSWER_CACHE.get(key, generation) if key else None
+            routed = cached or _route_chat(user_msg, respond_lang, session_id)
+            if isinstance(routed, ChatResponse):
+                if key and cached is None:
+                    ANSWER_CACHE.set(key, generation, routed)
+                final = _with_session(routed, session_id)
+                yield _sse("answer", final.dict())
+            else:
+                yield _sse("start", {"source": routed.source, "match": routed.match, "session_id": session_id})
+                parts: List[str] = []
+                for delta in generate_llm_answer_stream(user_msg, routed.kb_items, respond_lang or PRIMARY_LANG):
+                    parts.append(delta)
+                    yield _sse("delta", {"text": delta})
+                final = ChatResponse(reply="".join(parts).strip(), source=routed.source, match=routed.match, session_id=session_id)
+                if key:
+                    ANSWER_CACHE.set(key, generation, final)
+                yield _sse("done", final.dict())
+        except Exception as e:
+            logger.exception("chat stream failed")
+            yield _sse("error", {"detail": f"{e.__class__.__name__}: {e}"})
+            return
+        try:
+            _db_insert_message(session_id, "assistant", final.reply, final.source, final.match)
+        except Exception:
+            pass
+
+    resp = StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    if new_session:
+        resp.set_cookie("chat_session", session_id, max_age=60*60*24*30, httponly=False, samesite="Lax")
+    return resp
 
 def _answer_legacy(user_msg: str, respond_lang: str | None, session_id: str | None = None) -> ChatResponse:
     try:
@@ -2220,6 +2424,38 @@ def _answer_legacy(user_msg: str, respond_lang: str | None, session_id: str | No
     reply = llm_like_answer(user_msg, [], respond_lang or PRIMARY_LANG)
     return ChatResponse(reply=reply, source="Fallback", match=0.0, session_id=session_id)
 
+def _answer_rag(user_msg: str, respond_lang: str | None, session_id: str | None = None) -> ChatResponse:
+    # Retrieval errors propagate to chat_dual, which reports them without caching
+    if not RAG_ENABLED:
+        return ChatResponse(reply="RAG not enabled.", source="RAG", match=None, session_id=session_id)
+    if not _RAG_READY.is_set():
+        raise RuntimeError("RAG index is not loaded")
+    # If the user's query is a menu/products request, return the same legacy menu rendering
+    same_menu = False
+    try:
+        intent = IR.detect_intent(user_msg)
+        same_menu = intent == "menu"
+        lower_msg = user_msg.lower()
+        if same_menu and any(k in lower_msg for k in ["valmisseos", "valmisseoksia", "alusta asti", "mix", "premix", "lahjoit", "hävik", "haavik"]):
+            same_menu = False
+    except Exception:
+        same_menu = False
+    rag_special = None
+    try:
+        rag_special = _rag_special(user_msg, respond_lang or PRIMARY_LANG)
+    except Exception:
+        rag_special = None
+    if rag_special:
+        rag_reply = rag_special
+    elif same_menu:
+        rag_reply = IR.resolve_menu(respond_lang or PRIMARY_LANG, query=user_msg)
+    else:
+        rag_reply = _RAG_CACHE.answer(_RAG_RET, user_msg, respond_lang or PRIMARY_LANG, top_k=6)
+    return ChatResponse(reply=rag_reply, source="RAG", match=None, session_id=session_id)
+
+# Bounded pool so a burst of dual requests (or a hung branch) cannot spawn unbounded threads
+_DUAL_EXECUTOR = ThreadPoolExecutor(max_workers=max(2, CHAT_DUAL_WORKERS), thread_name_prefix="chat-dual")
+
 @app.post("/api/chat_dual", response_model=ChatDualResponse)
 def chat_dual(req: ChatDualRequest, request: Request, response: Response):
     if not CHAT_ENABLED:
@@ -2248,45 +2484,40 @@ def chat_dual(req: ChatDualRequest, request: Request, response: Response):
     if not want_legacy and not want_rag:
         want_legacy = True  # ensure at least one
 
-    # Legacy answer
+    # Compute both branches concurrently; each gets the same wall-clock budget
+    futures = {}
     if want_legacy:
-        legacy = _answer_legacy(user_msg, respond_lang, session_id)
-    else:
-        legacy = ChatResponse(reply="", source="Legacy (disabled)", match=None, session_id=session_id)
-
-    # RAG answer
-    if want_rag:
-        if RAG_ENABLED:
-            try:
-                # If the user's query is a menu/products request, return the same legacy menu rendering
-                same_menu = False
-                try:
-                    intent = IR.detect_intent(user_msg)
-                    same_menu = intent == "menu"
-                    lower_msg = user_msg.lower()
-                    if same_menu and any(k in lower_msg for k in ["valmisseos", "valmisseoksia", "alusta asti", "mix", "premix", "lahjoit", "hävik", "haavik"]):
-                        same_menu = False
-                except Exception:
-                    same_menu = False
-                rag_special = None
-                try:
-                    rag_special = _rag_special(user_msg, respond_lang or PRIMARY_LANG)
-                except Exception:
-                    rag_special = None
-                if rag_special:
-                    rag_reply = rag_special
-                elif same_menu:
-                    rag_reply = IR.resolve_menu(respond_lang or PRIMARY_LANG, query=user_msg)
-                else:
-                    hits = _RAG_RET.retrieve(user_msg, respond_lang or PRIMARY_LANG, top_k=6)
-                    rag_reply = _rag_compose(user_msg, hits, respond_lang or PRIMARY_LANG)
-                rag = ChatResponse(reply=rag_reply, source="RAG", match=None, session_id=session_id)
-            except Exception as e:
-                rag = ChatResponse(reply=f"RAG error: {e}", source="RAG", match=None, session_id=session_id)
-        else:
-            rag = ChatResponse(reply="RAG not enabled.", source="RAG", match=None, session_id=session_id)
-    else:
-        rag = ChatResponse(reply="", source="RAG (disabled)", match=None, session_id=session_id)
+        futures["legacy"] = _DUAL_EXECUTOR.submit(
+            _cached_answer, "legacy", user_msg, respond_lang, session_id,
+            lambda: _answer_legacy(user_msg, respond_lang, session_id))
+    rag_pending = None
+    if want_rag and RAG_ENABLED and not _RAG_READY.is_set():
+        # Answer at once instead of queueing behind the index load; never cached
+        _start_rag_init()
+        status = _rag_status()
+        rag_pending = ChatResponse(
+            reply="RAG index failed to load." if status == "failed" else "RAG index is warming up; try again in a moment.",
+            source=f"RAG ({status.replace('_', ' ')})", match=None, session_id=session_id)
+    elif want_rag:
+        futures["rag"] = _DUAL_EXECUTOR.submit(
+            _cached_answer, "rag", user_msg, respond_lang, session_id,
+            lambda: _answer_rag(user_msg, respond_lang, session_id))
+    deadline = time.monotonic() + CHAT_DUAL_TIMEOUT_SECS
+
+    def _branch_result(name: str, label: str) -> ChatResponse:
+        fut = futures.get(name)
+        if fut is None:
+            return ChatResponse(reply="", source=f"{label} (disabled)", match=None, session_id=session_id)
+        try:
+            return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logger.warning(f"chat_dual {name} branch exceeded {CHAT_DUAL_TIMEOUT_SECS}s")
+            return ChatResponse(reply=f"{label} answer timed out.", source=f"{label} (timeout)", match=None, session_id=session_id)
+        except Exception as e:
+            return ChatResponse(reply=f"{label} error: {e}", source=label, match=None, session_id=session_id)
+
+    legacy = _branch_result("legacy", "Legacy")
+    rag = rag_pending or _branch_result("rag", "RAG")
 
     # Log assistant replies when available
     try:
@@ -2484,21 +2715,19 @@ def api_order(req: OrderRequest):
         raise HTTPException(status_code=400, detail="All quantities are zero.")
 
     # Validate pickup time (format, hours, min lead, max window, blackout)
+    try:
+        cons = api_order_constraints(debug=False)
+    except Exception:
+        # If constraint lookup fails unexpectedly, proceed (Ecwid will still validate)
+        cons = None
     ok, reason = _validate_pickup_time(req.pickup_time)
     if not ok:
         # If the day is closed, it might be due to a blackout; prefer explicit blackout wording
-        try:
-            cons = api_order_constraints(debug=False)
-            dt = _parse_pickup_iso(req.pickup_time)
-            if dt and _is_blackout(dt, cons.get("blackout_dates") or []):
-                raise HTTPException(status_code=400, detail="Pickup date is not available (blackout).")
-        except HTTPException:
-            raise
-        except Exception:
-            pass
+        dt = _parse_pickup_iso(req.pickup_time)
+        if cons and dt and _is_blackout(dt, cons.get("blackout_dates") or []):
+            raise HTTPException(status_code=400, detail="Pickup date is not available (blackout).")
         raise HTTPException(status_code=400, detail=f"Pickup time not available: {reason}")
-    try:
-        cons = api_order_constraints(debug=False)  # reuse same logic
+    if cons:
         min_lead = int(cons.get("min_lead_minutes", 0))
         max_days = int(cons.get("max_days", 0))
         blackouts = cons.get("blackout_dates") or []
@@ -2519,11 +2748,6 @@ def api_order(req: OrderRequest):
         # Blackout
         if _is_blackout(dt, blackouts):
             raise HTTPException(status_code=400, detail="Pickup date is not available (blackout).")
-    except HTTPException:
-        raise
-    except Exception:
-        # If constraint check fails unexpectedly, proceed (Ecwid will still validate)
-        pass
 
     first_name, last_name = _split_name(req.name)
     display_name = " ".join([p for p in (first_name, last_name) if p]) or ((req.name or "").strip()) or "Chat Customer"
@@ -2606,183 +2830,31 @@ from fastapi import Query
 @app.get("/api/order_constraints")
 def api_order_constraints(debug: bool = Query(False, description="Include debug details")):
     """Return min lead time and max advance days for orders.
-    Attempts to discover from Ecwid shipping/pickup settings; falls back to env defaults.
+    Discovered from Ecwid shipping/pickup settings via the shared constraints service
+    (cached, stale-while-revalidate); falls back to env defaults.
     """
-    if not (ECWID_STORE_ID and ECWID_API_TOKEN):
-        # Without Ecwid, still provide useful defaults for the UI
-        out = {
-            "source": "defaults",
-            "min_lead_minutes": ECWID_MIN_LEAD_MINUTES,
-            "max_days": ECWID_MAX_ORDER_DAYS,
-        }
-        if debug:
-            out["details"] = {
-                "reason": "missing_credentials",
-            }
-        return out
-    # Start with None; only fall back to env defaults if not discovered from Ecwid
-    min_lead: int | None = None
-    max_days: int | None = None
-    found_min = False
-    found_max = False
-    debug_notes: Dict[str, Any] = {"sources": []}
-    blackout_ranges: list[Dict[str, Any]] = []
-    try:
-        def _availability_to_days(val: Any) -> int | None:
-            if not isinstance(val, str):
-                return None
-            s = val.upper().strip()
-            mapping = {
-                "ONE_WEEK": 7,
-                "TWO_WEEKS": 14,
-                "ONE_MONTH": 30,
-                "TWO_MONTHS": 60,
-                "THREE_MONTHS": 90,
-            }
-            return mapping.get(s)
-
-        # Try to infer from /profile/shippingOptions endpoint
-        opts = _ecwid_get_shipping_options()
-        for opt in opts:
-            name = (opt.get("title") or opt.get("name") or "").lower()
-            fulfill = (
-                opt.get("fulfillmentType")
-                or opt.get("fulfilmentType")
-                or opt.get("type")
-                or ""
-            ).upper()
-            settings = opt.get("settings") or {}
-
-            # Lead time (minutes)
-            prep_mins = (
-                settings.get("pickupPreparationTimeMinutes")
-                or settings.get("preparationTimeMinutes")
-                or settings.get("leadTimeMinutes")
-                or opt.get("pickupPreparationTimeMinutes")
-                or opt.get("fulfillmentTimeInMinutes")
-            )
-            # Some stores expose hours
-            if not prep_mins:
-                val_h = opt.get("pickupPreparationTimeHours")
-                if isinstance(val_h, (int, float)):
-                    prep_mins = int(val_h) * 60
-            if isinstance(prep_mins, (int, float)):
-                val = int(prep_mins)
-                min_lead = val if (min_lead is None or val > min_lead) else min_lead
-                found_min = True
-
-            # Max days in advance
-            md = (
-                settings.get("daysInAdvance")
-                or settings.get("maxAdvanceDays")
-                or settings.get("orderAheadDays")
-                or _availability_to_days(opt.get("availabilityPeriod"))
-            )
-            if isinstance(md, int) and md > 0:
-                val = int(md)
-                max_days = val if (max_days is None or val < max_days) else max_days
-                found_max = True
-
-            if debug:
-                debug_notes.setdefault("sources", []).append({
-                    "option": name,
-                    "fulfillmentType": fulfill,
-                    "preparation_minutes": prep_mins,
-                    "availabilityPeriod": opt.get("availabilityPeriod"),
-                    "max_days_candidate": md,
-                })
-
-            # Collect blackout date ranges if present
-            bl = opt.get("blackoutDates")
-            if isinstance(bl, list):
-                for it in bl:
-                    fd = it.get("fromDate") or it.get("from")
-                    td = it.get("toDate") or it.get("to")
-                    ra = bool(it.get("repeatedAnnually"))
-                    if fd and td:
-                        blackout_ranges.append({"from": fd, "to": td, "repeatedAnnually": ra})
-
-        # Also inspect /profile shipping settings directly (often richer)
-        try:
-            profile = _ecwid_get_profile()
-            pset = profile.get("settings") or {}
-            ship = pset.get("shipping") or {}
-            md_profile = ship.get("maxOrderAheadDays")
-            if isinstance(md_profile, int) and md_profile > 0:
-                val = int(md_profile)
-                max_days = val if (max_days is None or val < max_days) else max_days
-                found_max = True
-
-            prof_opts = ship.get("shippingOptions") or []
-            for opt in prof_opts:
-                name = (opt.get("title") or opt.get("name") or "").lower()
-                fulfill = (
-                    opt.get("fulfillmentType")
-                    or opt.get("fulfilmentType")
-                    or opt.get("type")
-                    or ""
-                ).upper()
-                # Lead time
-                prep_mins = (
-                    opt.get("pickupPreparationTimeMinutes")
-                    or opt.get("fulfillmentTimeInMinutes")
-                )
-                if not prep_mins:
-                    val_h = opt.get("pickupPreparationTimeHours")
-                    if isinstance(val_h, (int, float)):
-                        prep_mins = int(val_h) * 60
-                if isinstance(prep_mins, (int, float)):
-                    val = int(prep_mins)
-                    min_lead = val if (min_lead is None or val > min_lead) else min_lead
-                    found_min = True
-
-                # Max days via availabilityPeriod
-                md = _availability_to_days(opt.get("availabilityPeriod"))
-                if isinstance(md, int) and md > 0:
-                    val = int(md)
-                    max_days = val if (max_days is None or val < max_days) else max_days
-                    found_max = True
-
-                if debug:
-                    debug_notes.setdefault("profile_sources", []).append({
-                        "option": name,
-                        "fulfillmentType": fulfill,
-                        "preparation_minutes": prep_mins,
-                        "availabilityPeriod": opt.get("availabilityPeriod"),
-                    })
-                # Collect blackout dates from profile shippingOptions as well
-                bl = opt.get("blackoutDates")
-                if isinstance(bl, list):
-                    for it in bl:
-                        fd = it.get("fromDate") or it.get("from")
-                        td = it.get("toDate") or it.get("to")
-                        ra = bool(it.get("repeatedAnnually"))
-                        if fd and td:
-                            blackout_ranges.append({"from": fd, "to": td, "repeatedAnnually": ra})
-            if debug:
-                debug_notes["profile_checked"] = True
-                debug_notes["profile_shipping_maxOrderAheadDays"] = md_profile
-        except Exception:
-            pass
-    except Exception as e:
-        logger.warning(f"Failed to fetch Ecwid order constraints, using defaults: {e}")
-    # Apply fallbacks if nothing was discovered
-    if min_lead is None:
-        min_lead = ECWID_MIN_LEAD_MINUTES
-    if max_days is None:
-        max_days = ECWID_MAX_ORDER_DAYS
-    src = "ecwid" if (found_min or found_max) else "defaults"
+    snap = ORDER_CONSTRAINTS.snapshot()
+    cons = snap.constraints
     out = {
-        "source": src,
-        "min_lead_minutes": int(min_lead),
-        "max_days": int(max_days),
-        "blackout_dates": blackout_ranges,
+        "source": cons.get("source") or "defaults",
+        "min_lead_minutes": int(cons["min_lead_minutes"]),
+        "max_days": int(cons["max_days"]),
+        "blackout_dates": cons.get("blackout_dates") or [],
     }
     if debug:
         out["details"] = {
-            "found_min": found_min,
-            "found_max": found_max,
-            **debug_notes,
+            "found_min": bool(cons.get("found_min")),
+            "found_max": bool(cons.get("found_max")),
+            "age_seconds": round(time.monotonic() - snap.fetched_at, 1),
+            "error": snap.error,
+            "sources": [
+                {
+                    "option": (o.get("title") or o.get("name") or "").lower(),
+                    "fulfillmentType": (o.get("fulfillmentType") or o.get("fulfilmentType") or o.get("type") or "").upper(),
+                    "availabilityPeriod": o.get("availabilityPeriod"),
+                }
+                for o in snap.shipping_options
+            ],
         }
     return out
 
@@ -2807,6 +2879,11 @@ def _is_blackout(dt: datetime, blackouts: List[Dict[str, Any]]) -> bool:
 def startup_event():
     global KB
     logger.info("=== App startup: loading KB and building index ===")
+    # RAG loads in the background; /api/health reports when it is ready
+    _start_rag_init()
+    # Queued orders survive restarts only if the worker resumes them at boot
+    if resume_pending_orders is not None:
+        resume_pending_orders()
     if DB_ENABLED:
         _db_connect_and_prepare()
         _refresh_kb_index()
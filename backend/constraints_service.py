@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .order_constraints import infer_constraints
+from .time_rules import BlackoutIndex, compile_blackouts
+
+
+logger = logging.getLogger(__name__)
+
+ORDER_CONSTRAINTS_TTL_SECS = float(os.getenv("ORDER_CONSTRAINTS_TTL_SECS", "300"))
+ORDER_CONSTRAINTS_STALE_SECS = float(os.getenv("ORDER_CONSTRAINTS_STALE_SECS", "3600"))
+
+Fetcher = Callable[[], Tuple[List[Dict[str, Any]], Dict[str, Any]]]
+
+
+def _fetch_from_ecwid() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """One upstream round: shipping options (required) and profile (best effort)."""
+    from .ecwid_client import get_profile, get_shipping_options
+    ship_opts = get_shipping_options()
+    try:
+        profile = get_profile()
+    except Exception:
+        profile = {}
+    return ship_opts, profile
+
+
+@dataclass(frozen=True)
+class ConstraintsSnapshot:
+    constraints: Dict[str, Any]
+    shipping_options: List[Dict[str, Any]]
+    fetched_at: float
+    error: Optional[str] = None
+
+
+class ConstraintsService:
+    """Order constraints (lead time, max days, blackouts) inferred from Ecwid.
+
+    Serves a cached snapshot for ``ttl_seconds``. For a further ``stale_seconds``
+    the old snapshot is still returned immediately while one background refresh
+    runs; past that, callers block on a single shared refresh. A failed refresh
+    keeps the previous snapshot, or env defaults when there is none.
+    """
+
+    def __init__(
+        self,
+        fetch: Optional[Fetcher] = None,
+        ttl_seconds: float = ORDER_CONSTRAINTS_TTL_SECS,
+        stale_seconds: float = ORDER_CONSTRAINTS_STALE_SECS,
+    ) -> None:
+        self._fetch = fetch or _fetch_from_ecwid
+        self.ttl_seconds = float(ttl_seconds)
+        self.stale_seconds = float(stale_seconds)
+        self._snap: Optional[ConstraintsSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+
+    def _age(self, snap: Optional[ConstraintsSnapshot]) -> float:
+        return float("inf") if snap is None else (time.monotonic() - snap.fetched_at)
+
+    def is_warm(self) -> bool:
+        """True when snapshot() can answer without waiting on Ecwid."""
+        return self._age(self._snap) <= self.ttl_seconds + self.stale_seconds
+
+    def snapshot(self) -> ConstraintsSnapshot:
+        snap = self._snap
+        age = self._age(snap)
+        if snap is not None and age <= self.ttl_seconds:
+            return snap
+        if snap is not None and age <= self.ttl_seconds + self.stale_seconds:
+            self._refresh_in_background()
+            return snap
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self._snap is not None and self._age(self._snap) <= self.ttl_seconds:
+                return self._snap
+            self._refresh()
+        return self._snap  # type: ignore[return-value]
+
+    def get(self) -> Dict[str, Any]:
+        snap = self.snapshot()
+        return dict(snap.constraints)
+
+    def shipping_options(self) -> List[Dict[str, Any]]:
+        return list(self.snapshot().shipping_options)
+
+    def blackout_index(self, snap: Optional[ConstraintsSnapshot] = None) -> BlackoutIndex:
+        """Blackouts of ``snap`` (default: the current snapshot), compiled once per refresh.
+
+        Pass the snapshot the other constraints were read from so both come from
+        the same refresh.
+        """
+        return compile_blackouts((snap or self.snapshot()).constraints.get("blackout_dates"))
+
+    def clear(self) -> None:
+        with self._refresh_lock:
+            self._snap = None
+
+    def _refresh_in_background(self) -> None:
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # a refresh is already running
+
+        def run() -> None:
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name="order-constraints-refresh", daemon=True).start()
+
+    def _refresh(self) -> None:
+        """Fetch once and swap the snapshot. Caller holds _refresh_lock."""
+        self.refreshes += 1
+        prev = self._snap
+        try:
+            ship_opts, profile = self._fetch()
+        except Exception as e:
+            logger.warning(f"Failed to fetch Ecwid order constraints: {e}")
+            if prev is not None:
+                # Keep serving the last good values; retry after another TTL
+                self._snap = ConstraintsSnapshot(prev.constraints, prev.shipping_options, time.monotonic(), str(e))
+                return
+            ship_opts, profile, error = [], {}, str(e)
+        else:
+            error = None
+        res = infer_constraints(
+            shipping_options=ship_opts,
+            profile=profile,
+            default_min_lead_minutes=int(os.getenv("ECWID_MIN_LEAD_MINUTES", "720")),
+            default_max_days=int(os.getenv("ECWID_MAX_ORDER_DAYS", "60")),
+        )
+        res["source"] = "ecwid" if (res.get("found_min") or res.get("found_max")) else "defaults"
+        self._snap = ConstraintsSnapshot(res, list(ship_opts or []), time.monotonic(), error)
+
+
+_SERVICE: Optional[ConstraintsService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_constraints_service() -> ConstraintsService:
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = ConstraintsService()
+    return _SERVICE
@@ -15,7 +15,9 @@ def _require_env(name: str) -> str:
 
 def ecwid_base() -> str:
     store_id = _require_env("ECWID_STORE_ID")
-    return f"https://app.ecwid.com/api/v3/{store_id}"
+    # ECWID_API_BASE lets tests and load runs point at a local Ecwid stand-in
+    api = (os.getenv("ECWID_API_BASE") or "https://app.ecwid.com/api/v3").rstrip("/")
+    return f"{api}/{store_id}"
 
 
 def ecwid_headers() -> Dict[str, str]:
@@ -79,3 +81,47 @@ def get_shipping_options() -> List[Dict[str, Any]]:
     if isinstance(data, list):
         return data
     return []
+
+
+# ---------------------------------------------------------------------------
+# Async variants (httpx.AsyncClient) for `async def` route handlers.
+# Each accepts an optional client so callers can share one connection pool
+# across concurrent requests (e.g. asyncio.gather in ecwid_status).
+# ---------------------------------------------------------------------------
+
+async def _aget(path: str, client: Optional[httpx.AsyncClient] = None, params: Optional[Dict[str, Any]] = None) -> Any:
+    url = f"{ecwid_base()}{path}"
+    headers = ecwid_headers()
+    if client is None:
+        async with httpx.AsyncClient(timeout=10.0) as own:
+            r = await own.get(url, headers=headers, params=params)
+    else:
+        r = await client.get(url, headers=headers, params=params)
+    r.raise_for_status()
+    return r.json()
+
+
+async def get_products_async(limit: int = 100, category: Optional[int] = None, client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
+    params: Dict[str, Any] = {"limit": limit}
+    if category is not None:
+        params["category"] = int(category)
+    data = await _aget("/products", client, params)
+    return data.get("items", [])
+
+
+async def get_categories_async(limit: int = 200, client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
+    data = await _aget("/categories", client, {"limit": limit})
+    return data.get("items", [])
+
+
+async def get_profile_async(client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    return await _aget("/profile", client)
+
+
+async def get_shipping_options_async(client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
+    data = await _aget("/profile/shippingOptions", client)
+    if isinstance(data, dict):
+        return data.get("items", [])
+    if isinstance(data, list):
+        return data
+    return []
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import atexit
+import hashlib
+import itertools
 import json
+import logging
+import os
 import threading
 from dataclasses import dataclass
-from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -15,6 +19,20 @@ FAQ_TREE_FILE = REPO_ROOT / "docs" / "faq_tree.json"
 FAQ_ENTRIES_FILE = REPO_ROOT / "docs" / "faq_entries.json"
 FAQ_META_FILE = REPO_ROOT / "docs" / "faq_meta.json"
 FAQ_KB_FILE = HERE / "knowledgebase" / "faq.json"
+# Languages whose responses are serialized up front at reload(); "" covers
+# requests without a lang parameter (labels fall back to Finnish).
+PRECOMPUTED_LANGS: Tuple[str, ...] = ("", "fi", "sv", "en")
+FAQ_SOURCE_FILES: Tuple[Path, ...] = (FAQ_TREE_FILE, FAQ_ENTRIES_FILE, FAQ_META_FILE, FAQ_KB_FILE)
+# Poll interval for the change watcher when watchfiles is unavailable; 0 disables watching.
+FAQ_RELOAD_INTERVAL_SECS = float(os.getenv("FAQ_RELOAD_INTERVAL_SECS", "2"))
+
+logger = logging.getLogger(__name__)
+# Monotonic reload counter; lets caches detect a swapped snapshot even when faq_version is unchanged
+_REVISIONS = itertools.count(1)
+
+
+def _source_mtimes() -> Tuple[float, ...]:
+    return tuple(p.stat().st_mtime if p.exists() else 0.0 for p in FAQ_SOURCE_FILES)
 
 
 @dataclass
@@ -25,47 +43,85 @@ class EntryRecord:
     order: int
 
 
+@dataclass(frozen=True)
+class CachedPayload:
+    body: bytes
+    etag: str
+
+
 class FaqRepository:
+    """Immutable-after-reload snapshot of the FAQ tree and entries.
+
+    Readers take whatever snapshot ``instance()`` returns; the change watcher
+    builds a fresh repository off the request path and swaps it in atomically.
+    """
+
     _instance: Optional["FaqRepository"] = None
     _lock = threading.Lock()
+    _watcher: Optional["_FaqWatcher"] = None
 
     def __init__(self) -> None:
         self.version: str = "0"
+        self.revision: int = 0
         self._tree: List[dict] = []
         self._entry_records: List[EntryRecord] = []
         self._faq_items: List[FaqItem] = []
         self._items_by_path: Dict[Tuple[str, ...], List[FaqItem]] = {}
+        self._descendants_by_path: Dict[Tuple[str, ...], List[FaqItem]] = {}
         self._records_by_question: Dict[str, EntryRecord] = {}
         self._node_counts: Dict[Tuple[str, ...], int] = {}
-        self._tree_mtime: float = 0.0
-        self._entries_mtime: float = 0.0
-        self._meta_mtime: float = 0.0
-        self._kb_mtime: float = 0.0
+        self._tree_payloads: Dict[str, CachedPayload] = {}
+        self._entries_payloads: Dict[Tuple[Tuple[str, ...], str], CachedPayload] = {}
+        self._source_mtimes: Tuple[float, ...] = ()
         self._loaded = False
 
     @classmethod
     def instance(cls) -> "FaqRepository":
+        repo = cls._instance
+        if repo is not None:
+            return repo
         with cls._lock:
             if cls._instance is None:
-                cls._instance = cls()
-            repo = cls._instance
-        repo.ensure_latest()
-        return repo
-
-    def ensure_latest(self) -> None:
-        tree_mtime = FAQ_TREE_FILE.stat().st_mtime if FAQ_TREE_FILE.exists() else 0.0
-        entries_mtime = FAQ_ENTRIES_FILE.stat().st_mtime if FAQ_ENTRIES_FILE.exists() else 0.0
-        meta_mtime = FAQ_META_FILE.stat().st_mtime if FAQ_META_FILE.exists() else 0.0
-        kb_mtime = FAQ_KB_FILE.stat().st_mtime if FAQ_KB_FILE.exists() else 0.0
-        if not self._loaded or any([
-            tree_mtime != self._tree_mtime,
-            entries_mtime != self._entries_mtime,
-            meta_mtime != self._meta_mtime,
-            kb_mtime != self._kb_mtime,
-        ]):
-            self.reload()
+                fresh = cls()
+                fresh.reload()
+                cls._instance = fresh
+                cls._start_watcher()
+            return cls._instance
+
+    @classmethod
+    def refresh(cls) -> "FaqRepository":
+        """Build a new snapshot from disk and publish it; readers never block."""
+        fresh = cls()
+        fresh.reload()
+        with cls._lock:
+            cls._instance = fresh
+        logger.info("FAQ repository reloaded (version %s)", fresh.version)
+        return fresh
+
+    @classmethod
+    def refresh_if_stale(cls) -> None:
+        try:
+            current = cls._instance
+            if current is None or current.is_stale():
+                cls.refresh()
+        except Exception:
+            logger.exception("FAQ repository reload failed; keeping previous snapshot")
+
+    @classmethod
+    def _start_watcher(cls) -> None:
+        if cls._watcher is not None or FAQ_RELOAD_INTERVAL_SECS <= 0:
+            return
+        cls._watcher = _FaqWatcher(FAQ_RELOAD_INTERVAL_SECS)
+        cls._watcher.start()
+        # Stop cleanly before interpreter teardown (the native watcher aborts if killed mid-wait)
+        atexit.register(cls._watcher.stop, join=True)
+
+    def is_stale(self) -> bool:
+        return not self._loaded or _source_mtimes() != self._source_mtimes
 
     def reload(self) -> None:
+        # Capture mtimes before reading so an edit landing mid-reload is picked up next time
+        source_mtimes = _source_mtimes()
         tree = self._read_json(FAQ_TREE_FILE, [])
         entries = self._read_json(FAQ_ENTRIES_FILE, [])
         meta = self._read_json(FAQ_META_FILE, {})
@@ -106,26 +162,70 @@ class FaqRepository:
                 node_counts[prefix] = node_counts.get(prefix, 0) + 1
 
         # Sort items within each path by the order defined in entries; fallback to question text
+        def sort_key(item: FaqItem) -> Tuple[int, str]:
+            record = records_by_question.get(item.q.get("fi", ""))
+            return (record.order if record else 10_000_000, item.q.get("fi", ""))
+
         ordered_by_path: Dict[Tuple[str, ...], List[FaqItem]] = {}
+        descendants: Dict[Tuple[str, ...], List[FaqItem]] = {}
         for path, items in items_by_path.items():
-            def sort_key(item: FaqItem) -> Tuple[int, str]:
-                record = records_by_question.get(item.q.get("fi", ""))
-                return (record.order if record else 10_000_000, item.q.get("fi", ""))
             ordered_by_path[path] = sorted(items, key=sort_key)
+            # Index every ancestor so parent tabs can aggregate without scanning
+            for depth in range(1, len(path)):
+                descendants.setdefault(path[:depth], []).extend(items)
+        descendants_by_path = {path: sorted(items, key=sort_key) for path, items in descendants.items()}
 
         self._tree = tree
         self._entry_records = entry_records
         self._faq_items = faq_items
         self._items_by_path = ordered_by_path
+        self._descendants_by_path = descendants_by_path
         self._records_by_question = records_by_question
         self._node_counts = node_counts
         self.version = str(meta.get("faq_version") or meta.get("version") or "1")
-        self._tree_mtime = FAQ_TREE_FILE.stat().st_mtime if FAQ_TREE_FILE.exists() else 0.0
-        self._entries_mtime = FAQ_ENTRIES_FILE.stat().st_mtime if FAQ_ENTRIES_FILE.exists() else 0.0
-        self._meta_mtime = FAQ_META_FILE.stat().st_mtime if FAQ_META_FILE.exists() else 0.0
-        self._kb_mtime = FAQ_KB_FILE.stat().st_mtime if FAQ_KB_FILE.exists() else 0.0
+        self._precompute_payloads()
+        self._source_mtimes = source_mtimes
+        self.revision = next(_REVISIONS)
         self._loaded = True
 
+    def _precompute_payloads(self) -> None:
+        """Serialize /faq/tree and /faq/entries bodies once per reload so the
+        routes only do a dict lookup per request."""
+        paths = set(self._items_by_path) | set(self._descendants_by_path)
+        tree_payloads: Dict[str, CachedPayload] = {}
+        entries_payloads: Dict[Tuple[Tuple[str, ...], str], CachedPayload] = {}
+        for lang in PRECOMPUTED_LANGS:
+            tree_payloads[lang] = self._make_payload({"version": self.version, "tree": self.tree(lang)})
+            for path in paths:
+                items = self.entries_for(list(path), lang)
+                if items:
+                    entries_payloads[(path, lang)] = self._make_payload({"version": self.version, "items": items})
+        self._tree_payloads = tree_payloads
+        self._entries_payloads = entries_payloads
+
+    def _make_payload(self, data: dict) -> CachedPayload:
+        # Same encoding as Starlette's JSONResponse so cached and live bodies match
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        return CachedPayload(body=body, etag=f'"{self.version}-{digest}"')
+
+    def tree_payload(self, lang: Optional[str] = None) -> CachedPayload:
+        cached = self._tree_payloads.get(lang or "")
+        if cached is not None:
+            return cached
+        # Uncommon language codes are rendered on demand (and not memoized)
+        return self._make_payload({"version": self.version, "tree": self.tree(lang)})
+
+    def entries_payload(self, path: List[str], lang: Optional[str] = None) -> Optional[CachedPayload]:
+        """Return the serialized entries body for a path, or None when empty."""
+        key = tuple(path)
+        if (lang or "") in PRECOMPUTED_LANGS:
+            return self._entries_payloads.get((key, lang or ""))
+        items = self.entries_for(path, lang)
+        if not items:
+            return None
+        return self._make_payload({"version": self.version, "items": items})
+
     def _read_json(self, path: Path, default):
         if not path.exists():
             return default
@@ -160,20 +260,9 @@ class FaqRepository:
         # Collect items for the exact node; if there are no items directly,
         # include items from descendant paths so parent tabs can aggregate
         # grandchildren when the tree hides intermediate nodes.
-        items = list(self._items_by_path.get(key, []))
-        if not items:
-            gathered: List[FaqItem] = []
-            for p, lst in self._items_by_path.items():
-                if len(p) > len(key) and p[: len(key)] == key:
-                    gathered.extend(lst)
-            items = gathered
+        # Both maps are already sorted by the global entry order at reload().
+        items = self._items_by_path.get(key) or self._descendants_by_path.get(key, [])
         results: List[dict] = []
-        # Sort combined items by the global entry order when available
-        def _order_of(it: FaqItem) -> int:
-            rec = self._records_by_question.get(it.q.get("fi", ""))
-            return rec.order if rec else 10_000_000
-        items = sorted(items, key=lambda it: (_order_of(it), it.q.get("fi", "")))
-
         for item in items:
             question = item.text_for(lang or "", "q")
             answer = item.text_for(lang or "", "a")
@@ -196,7 +285,47 @@ class FaqRepository:
         return results
 
 
-@lru_cache(maxsize=1)
+class _FaqWatcher(threading.Thread):
+    """Background reloader: inotify-backed via watchfiles when installed
+    (uvicorn[standard] ships it), otherwise a throttled mtime poller."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="faq-watcher", daemon=True)
+        self._interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self, join: bool = False) -> None:
+        self._stop_event.set()
+        if join and self.is_alive():
+            self.join(timeout=5.0)
+
+    def run(self) -> None:
+        if not self._watch_files():
+            self._poll()
+
+    def _watch_files(self) -> bool:
+        try:
+            from watchfiles import watch  # type: ignore
+        except Exception:
+            return False
+        targets = {str(p.resolve()) for p in FAQ_SOURCE_FILES}
+        dirs = sorted({str(p.parent) for p in FAQ_SOURCE_FILES if p.parent.exists()})
+        if not dirs:
+            return False
+        try:
+            for changes in watch(*dirs, stop_event=self._stop_event, recursive=False, raise_interrupt=False):
+                if any(str(Path(changed).resolve()) in targets for _, changed in changes):
+                    FaqRepository.refresh_if_stale()
+        except Exception:
+            logger.warning("FAQ file watcher failed; falling back to polling", exc_info=True)
+            return False
+        return True
+
+    def _poll(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            FaqRepository.refresh_if_stale()
+
+
 def get_faq_repository() -> FaqRepository:
     return FaqRepository.instance()
 
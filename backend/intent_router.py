@@ -18,6 +18,22 @@ KB_DIR = HERE / "knowledgebase"
 # Simple in-memory cache for Ecwid calls
 _CACHE: Dict[str, Tuple[float, Any]] = {}
 _CACHE_TTL_SECONDS = 120.0
+# Bumped whenever a refetched product/category list differs from the previous fetch
+_CATALOG_VERSION = 0
+_CATALOG_LAST: Dict[str, Any] = {}
+
+
+def catalog_version() -> int:
+    return _CATALOG_VERSION
+
+
+def _cache_set_catalog(key: str, val: Any) -> None:
+    global _CATALOG_VERSION
+    # _CACHE drops expired entries, so compare against the last fetch kept separately
+    if key not in _CATALOG_LAST or _CATALOG_LAST[key] != val:
+        _CATALOG_VERSION += 1
+    _CATALOG_LAST[key] = val
+    _cache_set(key, val)
 
 def _cache_get(key: str) -> Optional[Any]:
     import time
@@ -838,10 +854,37 @@ def _get_products_cached(limit: int = 100, category: Optional[int] = None) -> Li
         items = ecwid.get_products(limit=limit, category=category)
     except Exception:
         items = []
-    _cache_set(key, items)
+    _cache_set_catalog(key, items)
     return items
 
 
+_PRODUCT_INDEX: Dict[int, Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]], Dict[str, Dict[str, Any]]]] = {}
+
+
+def product_indexes(limit: int = 100) -> Tuple[Dict[int, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Return (by_id, by_sku) lookups over the cached product list.
+
+    The dicts are rebuilt only when the cached list is refetched, so repeated
+    calls cost one cache lookup.
+    """
+    items = _get_products_cached(limit=limit)
+    ent = _PRODUCT_INDEX.get(limit)
+    if ent is not None and ent[0] is items:
+        return ent[1], ent[2]
+    by_id: Dict[int, Dict[str, Any]] = {}
+    by_sku: Dict[str, Dict[str, Any]] = {}
+    for it in items:
+        try:
+            if it.get("id") is not None:
+                by_id[int(it["id"])] = it
+        except (TypeError, ValueError):
+            pass
+        if it.get("sku"):
+            by_sku[str(it["sku"])] = it
+    _PRODUCT_INDEX[limit] = (items, by_id, by_sku)
+    return by_id, by_sku
+
+
 def _get_categories_cached(limit: int = 200) -> List[Dict[str, Any]]:
     if not ecwid.get_categories:
         return []
@@ -853,7 +896,7 @@ def _get_categories_cached(limit: int = 200) -> List[Dict[str, Any]]:
         cats = ecwid.get_categories(limit=limit)
     except Exception:
         cats = []
-    _cache_set(key, cats)
+    _cache_set_catalog(key, cats)
     return cats
 
 
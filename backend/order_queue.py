@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+HERE = Path(__file__).resolve().parent
+ORDER_QUEUE_PATH = os.getenv("ORDER_QUEUE_PATH") or str(HERE / "data" / "order_queue.sqlite3")
+ORDER_MAX_ATTEMPTS = int(os.getenv("ORDER_MAX_ATTEMPTS", "6"))
+ORDER_RETRY_BASE_SECS = float(os.getenv("ORDER_RETRY_BASE_SECS", "2"))
+ORDER_RETRY_MAX_SECS = float(os.getenv("ORDER_RETRY_MAX_SECS", "300"))
+# How long a claimed intent stays "submitting" before another worker may take it over;
+# keep it well above one submit call (lookup + POST, 10 s HTTP timeouts each)
+ORDER_CLAIM_TIMEOUT_SECS = float(os.getenv("ORDER_CLAIM_TIMEOUT_SECS", "120"))
+
+PENDING = "pending"
+SUBMITTING = "submitting"
+SUBMITTED = "submitted"
+FAILED = "failed"
+
+
+class OrderSubmitError(Exception):
+    """Raised by a submit function. ``retryable`` errors are retried with backoff."""
+
+    def __init__(self, detail: str, retryable: bool = False) -> None:
+        super().__init__(detail)
+        self.detail = detail
+        self.retryable = retryable
+
+
+class IdempotencyConflict(Exception):
+    """The idempotency key was already used for a different order body."""
+
+
+# submit(ref, body, attempt) -> {"id": ..., "orderNumber": ...}; attempt starts at 1
+Submitter = Callable[[str, Dict[str, Any], int], Dict[str, Any]]
+
+
+def request_fingerprint(obj: Any) -> str:
+    """Stable hash of a client request, used to reject reuse of a key for another order."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class OrderQueue:
+    """Durable order intents keyed by idempotency key, submitted by a worker thread.
+
+    Intents live in a small SQLite file so a restart neither loses nor re-creates
+    an order. Several processes (Gunicorn workers) may share the file: an intent
+    is claimed with a conditional UPDATE, so exactly one worker moves it to
+    ``submitting``. The claim is a lease: an intent still ``submitting`` after
+    ``claim_timeout_seconds`` (its worker crashed) may be claimed again, and that
+    attempt is told the order may already exist upstream.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        submit: Submitter,
+        max_attempts: int = ORDER_MAX_ATTEMPTS,
+        retry_base_seconds: float = ORDER_RETRY_BASE_SECS,
+        retry_max_seconds: float = ORDER_RETRY_MAX_SECS,
+        claim_timeout_seconds: float = ORDER_CLAIM_TIMEOUT_SECS,
+        autostart: bool = True,
+    ) -> None:
+        self.path = path
+        self.autostart = autostart
+        self._submit = submit
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_base_seconds = float(retry_base_seconds)
+        self.retry_max_seconds = float(retry_max_seconds)
+        self.claim_timeout_seconds = float(claim_timeout_seconds)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS order_intents (
+                  ref TEXT PRIMARY KEY,
+                  idempotency_key TEXT UNIQUE NOT NULL,
+                  body_hash TEXT NOT NULL,
+                  body TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  attempts INTEGER NOT NULL DEFAULT 0,
+                  next_attempt_at REAL NOT NULL,
+                  last_error TEXT,
+                  ecwid_id TEXT,
+                  order_number TEXT,
+                  created_at REAL NOT NULL,
+                  updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    # ---------------------------------------------------------------- public
+
+    def _find_row(self, idempotency_key: str, digest: str) -> Optional[sqlite3.Row]:
+        row = self._conn.execute(
+            "SELECT * FROM order_intents WHERE idempotency_key=?", (idempotency_key,)
+        ).fetchone()
+        if row is not None and row["body_hash"] != digest:
+            raise IdempotencyConflict(idempotency_key)
+        return row
+
+    def find(self, idempotency_key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Existing intent for the key (IdempotencyConflict if it belongs to another request)."""
+        with self._lock:
+            row = self._find_row(idempotency_key, fingerprint)
+        return self._public(row, created=False) if row is not None else None
+
+    def enqueue(self, idempotency_key: str, body: Dict[str, Any], fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """Store a new intent, or return the existing one for the same key.
+
+        ``fingerprint`` identifies the client request (defaults to a hash of ``body``).
+        """
+        digest = fingerprint or request_fingerprint(body)
+        now = time.time()
+        with self._lock:
+            row = self._find_row(idempotency_key, digest)
+            if row is not None:
+                return self._public(row, created=False)
+            ref = uuid.uuid4().hex[:16]
+            # Another process may have stored the same key since the lookup above;
+            # the unique key decides, and the loser returns the winner's intent
+            cur = self._conn.execute(
+                "INSERT INTO order_intents (ref, idempotency_key, body_hash, body, status, attempts,"
+                " next_attempt_at, created_at, updated_at) VALUES (?,?,?,?,?,?,?,?,?)"
+                " ON CONFLICT(idempotency_key) DO NOTHING",
+                (ref, idempotency_key, digest, json.dumps(body, ensure_ascii=False), PENDING, 0, now, now, now),
+            )
+            if cur.rowcount == 0:
+                return self._public(self._find_row(idempotency_key, digest), created=False)
+            row = self._conn.execute("SELECT * FROM order_intents WHERE ref=?", (ref,)).fetchone()
+        if self.autostart:
+            self.start()
+        self._wake.set()
+        return self._public(row, created=True)
+
+    def get(self, ref: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM order_intents WHERE ref=?", (ref,)).fetchone()
+        return self._public(row) if row is not None else None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="order-queue", daemon=True)
+            self._thread.start()
+
+    def stop(self, join: bool = False) -> None:
+        self._stop.set()
+        self._wake.set()
+        if join and self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run_pending(self) -> int:
+        """Process every due intent once; returns how many were attempted."""
+        done = 0
+        while not self._stop.is_set():
+            row = self._claim_due()
+            if row is None:
+                break
+            self._attempt(row)
+            done += 1
+        return done
+
+    # --------------------------------------------------------------- worker
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("order queue pass failed")
+            delay = self._seconds_until_next_due()
+            self._wake.wait(timeout=delay)
+            self._wake.clear()
+
+    def _seconds_until_next_due(self) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE WHEN status=? THEN next_attempt_at ELSE updated_at+? END) AS t"
+                " FROM order_intents WHERE status IN (?,?)",
+                (PENDING, self.claim_timeout_seconds, PENDING, SUBMITTING),
+            ).fetchone()
+        if row is None or row["t"] is None:
+            return 60.0
+        return max(0.05, min(60.0, row["t"] - time.time()))
+
+    def _claim_due(self) -> Optional[sqlite3.Row]:
+        """Claim one due intent: pending, or submitting with an expired lease."""
+        with self._lock:
+            while True:
+                now = time.time()
+                expired = now - self.claim_timeout_seconds
+                row = self._conn.execute(
+                    "SELECT ref, status, updated_at FROM order_intents"
+                    " WHERE (status=? AND next_attempt_at<=?) OR (status=? AND updated_at<=?)"
+                    " ORDER BY next_attempt_at LIMIT 1",
+                    (PENDING, now, SUBMITTING, expired),
+                ).fetchone()
+                if row is None:
+                    return None
+                # Only the row as we saw it may be claimed; another process that got there
+                # first has changed status or updated_at, so this matches nothing
+                cur = self._conn.execute(
+                    "UPDATE order_intents SET status=?, attempts=attempts+1, updated_at=?"
+                    " WHERE ref=? AND status=? AND updated_at=?",
+                    (SUBMITTING, now, row["ref"], row["status"], row["updated_at"]),
+                )
+                if cur.rowcount == 1:
+                    if row["status"] == SUBMITTING:
+                        logger.warning(f"Order {row['ref']} claim expired; taking it over")
+                    return self._conn.execute("SELECT * FROM order_intents WHERE ref=?", (row["ref"],)).fetchone()
+
+    def _attempt(self, row: sqlite3.Row) -> None:
+        ref, attempt = row["ref"], int(row["attempts"])
+        try:
+            data = self._submit(ref, json.loads(row["body"]), attempt)
+        except OrderSubmitError as e:
+            self._record_failure(ref, attempt, e.detail, e.retryable)
+            return
+        except Exception as e:
+            self._record_failure(ref, attempt, f"{e.__class__.__name__}: {e}", True)
+            return
+        with self._lock:
+            # The order exists upstream even if this claim expired meanwhile, so a late
+            # success still wins; only a row already marked submitted is left alone
+            self._conn.execute(
+                "UPDATE order_intents SET status=?, ecwid_id=?, order_number=?, last_error=NULL,"
+                " updated_at=? WHERE ref=? AND status<>?",
+                (SUBMITTED, str(data.get("id")) if data.get("id") is not None else None,
+                 data.get("orderNumber"), time.time(), ref, SUBMITTED),
+            )
+
+    def _record_failure(self, ref: str, attempt: int, detail: str, retryable: bool) -> None:
+        now = time.time()
+        if retryable and attempt < self.max_attempts:
+            delay = min(self.retry_max_seconds, self.retry_base_seconds * (2 ** (attempt - 1)))
+            logger.warning(f"Order {ref} attempt {attempt} failed, retrying in {delay:.1f}s: {detail}")
+            status_val, next_at = PENDING, now + delay
+        else:
+            logger.error(f"Order {ref} failed after {attempt} attempt(s): {detail}")
+            status_val, next_at = FAILED, now
+        with self._lock:
+            # A worker whose lease was taken over must not overwrite the newer attempt's state
+            self._conn.execute(
+                "UPDATE order_intents SET status=?, next_attempt_at=?, last_error=?, updated_at=?"
+                " WHERE ref=? AND status=? AND attempts=?",
+                (status_val, next_at, detail, now, ref, SUBMITTING, attempt),
+            )
+
+    # -------------------------------------------------------------- helpers
+
+    @staticmethod
+    def _public(row: sqlite3.Row, created: Optional[bool] = None) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "ref": row["ref"],
+            "status": row["status"],
+            "attempts": int(row["attempts"]),
+            "id": row["ecwid_id"],
+            "orderNumber": row["order_number"],
+            "error": row["last_error"],
+        }
+        if created is not None:
+            out["created"] = created
+        return out
+
+    def intents(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            if status:
+                rows = self._conn.execute("SELECT * FROM order_intents WHERE status=?", (status,)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM order_intents").fetchall()
+        return [self._public(r) for r in rows]
+
+
+_QUEUE: Optional[OrderQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_order_queue(submit: Submitter) -> OrderQueue:
+    """Process-wide queue at ORDER_QUEUE_PATH; the worker starts on first use."""
+    global _QUEUE
+    if _QUEUE is None:
+        with _QUEUE_LOCK:
+            if _QUEUE is None:
+                queue = OrderQueue(ORDER_QUEUE_PATH, submit)
+                queue.start()
+                atexit.register(queue.stop, join=True)
+                _QUEUE = queue
+    return _QUEUE
+
+
+def resume_order_queue(submit: Submitter) -> Optional[OrderQueue]:
+    """Start the worker at boot if earlier processes left a queue file behind.
+
+    Intents still pending or leased across a restart are then submitted without
+    waiting for the next order request; with no file there is nothing to resume.
+    """
+    if not os.path.exists(ORDER_QUEUE_PATH):
+        return None
+    return get_order_queue(submit)
@@ -3,34 +3,46 @@ from __future__ import annotations
 import os
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
-from ..faq_repository import get_faq_repository
+from ..faq_repository import CachedPayload, get_faq_repository
 from ..intent_router import resolve_menu, build_dietary_menu
 
 router = APIRouter(prefix="/faq", tags=["faq"])
 
 
+def _cached_response(request: Request, payload: CachedPayload) -> Response:
+    """Serve a precomputed body; answer 304 when the client already has it."""
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match") or ""
+    if payload.etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
 @router.get("/tree")
-def get_tree(lang: Optional[str] = Query(None, description="Preferred language code (fi/en/sv)")) -> dict:
+def get_tree(
+    request: Request,
+    lang: Optional[str] = Query(None, description="Preferred language code (fi/en/sv)"),
+) -> Response:
     repo = get_faq_repository()
-    tree = repo.tree(lang)
-    return {"version": repo.version, "tree": tree}
+    return _cached_response(request, repo.tree_payload(lang))
 
 
 @router.get("/entries")
 def get_entries(
+    request: Request,
     path: str = Query(..., description="Dot-separated category path e.g. menu.menu-tuoreet.karjalanpiirakat"),
     lang: Optional[str] = Query(None, description="Preferred language code (fi/en/sv)"),
-) -> dict:
+) -> Response:
     repo = get_faq_repository()
     parts: List[str] = [segment for segment in path.split(".") if segment]
     if not parts:
         raise HTTPException(status_code=400, detail="Path cannot be empty")
-    items = repo.entries_for(parts, lang)
-    if not items:
+    payload = repo.entries_payload(parts, lang)
+    if payload is None:
         raise HTTPException(status_code=404, detail="No FAQ entries for given path")
-    return {"version": repo.version, "items": items}
+    return _cached_response(request, payload)
 
 @router.get("/menu")
 def get_menu(
@@ -1,22 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
 import logging
 from pydantic import BaseModel
 
-from ..order_constraints import infer_constraints
+from fastapi.concurrency import run_in_threadpool
+
+from ..constraints_service import get_constraints_service
 from ..ecwid_client import (
-    get_products as ecwid_get_products,
-    get_categories as ecwid_get_categories,
-    get_profile as ecwid_get_profile,
-    get_shipping_options as ecwid_get_shipping_options,
+    get_products_async as ecwid_get_products_async,
+    get_categories_async as ecwid_get_categories_async,
+    get_profile_async as ecwid_get_profile_async,
+    get_shipping_options_async as ecwid_get_shipping_options_async,
 )
 import os
+import uuid
 from datetime import datetime, timedelta
 import httpx
-from ..time_rules import SHOP_HOURS, validate_pickup_time, parse_pickup_iso, is_blackout
+from ..answer_cache import AnswerCache
+from ..intent_router import KB_DIR, load_weekly_hours
+from ..order_queue import FAILED, IdempotencyConflict, OrderQueue, OrderSubmitError, get_order_queue, request_fingerprint, resume_order_queue
+from ..time_rules import SHOP_HOURS, validate_pickup_time, parse_pickup_iso, check_order_window, pickup_slots
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except Exception:  # pragma: no cover
@@ -75,9 +84,9 @@ def _curate_products(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 
 
 @router.get("/api/v2/categories")
-def api_categories():
+async def api_categories():
     try:
-        cats = ecwid_get_categories(limit=200)
+        cats = await ecwid_get_categories_async(limit=200)
         out = [
             {
                 "id": c.get("id"),
@@ -93,9 +102,9 @@ def api_categories():
 
 
 @router.get("/api/v2/products")
-def api_products(category: Optional[int] = None):
+async def api_products(category: Optional[int] = None):
     try:
-        items = ecwid_get_products(limit=100, category=category)
+        items = await ecwid_get_products_async(limit=100, category=category)
         curated = _curate_products(items)
         return {"items": curated}
     except Exception:
@@ -103,20 +112,12 @@ def api_products(category: Optional[int] = None):
 
 
 @router.get("/api/v2/order_constraints")
-def api_order_constraints():
-    try:
-        ship_opts = ecwid_get_shipping_options()
-        profile = ecwid_get_profile()
-    except Exception:
-        ship_opts, profile = [], {}
-    res = infer_constraints(
-        shipping_options=ship_opts,
-        profile=profile,
-        default_min_lead_minutes=int(os.getenv("ECWID_MIN_LEAD_MINUTES", "720")),
-        default_max_days=int(os.getenv("ECWID_MAX_ORDER_DAYS", "60")),
-    )
+async def api_order_constraints():
+    service = get_constraints_service()
+    # Warm snapshots (fresh or stale-while-revalidate) never wait on Ecwid
+    res = service.get() if service.is_warm() else await run_in_threadpool(service.get)
     return {
-        "source": "ecwid" if (res.get("found_min") or res.get("found_max")) else "defaults",
+        "source": res.get("source") or "defaults",
         "min_lead_minutes": int(res["min_lead_minutes"]),
         "max_days": int(res["max_days"]),
         "blackout_dates": res.get("blackout_dates") or [],
@@ -129,16 +130,112 @@ def api_pickup_hours_v2():
     return {"timezone": tz, "hours": SHOP_HOURS}
 
 
+# Slot lists are reused while the constraints snapshot, hours.json and the clock hour are unchanged
+_SLOTS_CACHE = AnswerCache(max_entries=32, ttl_seconds=3600)
+_HOURS_FILE = KB_DIR / "hours.json"
+
+
+def _hours_exceptions() -> Dict[str, List[tuple[str, str]]]:
+    """Date-specific pickup windows from hours.json (an empty list closes the day)."""
+    try:
+        wh = load_weekly_hours()
+        return {day: [(w.start, w.end) for w in wins] for day, wins in wh.exceptions.items()}
+    except Exception:
+        return {}
+
+
+def _hours_mtime() -> int:
+    try:
+        return _HOURS_FILE.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+@router.get("/api/v2/pickup_slots")
+def api_pickup_slots(
+    from_: Optional[str] = Query(None, alias="from", description="First date (YYYY-MM-DD), default today"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days to scan, default the whole order window"),
+):
+    """Available pickup times per day from shop hours, hours.json exceptions, lead time,
+    max days and blackouts. Uses the same rules as order validation.
+    """
+    tz = os.getenv("LOCAL_TZ", "Europe/Helsinki")
+    now = datetime.now()
+    hour_start = now.replace(minute=0, second=0, microsecond=0)
+    if from_:
+        try:
+            start = datetime.strptime(from_, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid from date. Use YYYY-MM-DD.")
+    else:
+        start = now.date()
+    service = get_constraints_service()
+    snap = service.snapshot()
+    cons = snap.constraints
+    min_lead = int(cons["min_lead_minutes"])
+    max_days = int(cons["max_days"])
+    if days is None:
+        days = min(366, max(1, (hour_start.date() - start).days + max_days + 1))
+
+    generation = (snap.fetched_at, hour_start, _hours_mtime())
+    key = (start, days)
+
+    def compute() -> Dict[str, Any]:
+        # Conservative for the whole clock hour: lead time counted from the end of
+        # the hour, the max-days window from its start, so a cached slot never
+        # fails validation later in the same hour.
+        index = service.blackout_index(snap)
+        earliest = hour_start + timedelta(hours=1, minutes=min_lead)
+        last_day = (hour_start + timedelta(days=max_days)).date() if max_days > 0 else None
+        dates = pickup_slots(
+            start, days, earliest, last_day, index,
+            shop_hours=SHOP_HOURS, exceptions=_hours_exceptions(),
+        )
+        end = start + timedelta(days=days - 1)
+        blackout_days = [
+            (start + timedelta(days=i)).isoformat()
+            for i in range(days) if index.contains(start + timedelta(days=i))
+        ] if index else []
+        return {
+            "timezone": tz,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "source": cons.get("source") or "defaults",
+            "min_lead_minutes": min_lead,
+            "max_days": max_days,
+            "first_available": dates[0]["date"] if dates else None,
+            "dates": dates,
+            "blackout_dates": blackout_days,
+        }
+
+    return _SLOTS_CACHE.get_or_compute(key, generation, compute)
+
+
 @router.get("/api/v2/ecwid_status")
-def api_ecwid_status():
+async def api_ecwid_status():
     """Lightweight diagnostics for Ecwid auth and basic permissions.
     Does not expose secrets. Useful for confirming token/store configuration.
+    Profile, shipping options and the orders permission check run concurrently.
     """
     from ..ecwid_client import ecwid_base, ecwid_headers
     status: Dict[str, Any] = {"base": ecwid_base()}
+
+    async def _orders_probe(client: httpx.AsyncClient) -> int:
+        r = await client.get(f"{ecwid_base()}/orders", headers=ecwid_headers(), params={"limit": 1})
+        return r.status_code
+
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        profile, ship_opts, orders_status = await asyncio.gather(
+            ecwid_get_profile_async(client=client),
+            ecwid_get_shipping_options_async(client=client),
+            _orders_probe(client),
+            return_exceptions=True,
+        )
     # Profile
-    try:
-        profile = ecwid_get_profile()
+    if isinstance(profile, BaseException):
+        status["profile_ok"] = False
+        status["profile_error"] = str(profile)
+    else:
         status["profile_ok"] = True
         status["storeId"] = (
             (profile.get("generalInfo") or {}).get("storeId")
@@ -148,12 +245,11 @@ def api_ecwid_status():
             (profile.get("generalInfo") or {}).get("storeName")
             or (profile.get("settings") or {}).get("storeName")
         )
-    except Exception as e:
-        status["profile_ok"] = False
-        status["profile_error"] = str(e)
     # Shipping options
-    try:
-        ship_opts = ecwid_get_shipping_options()
+    if isinstance(ship_opts, BaseException):
+        status["shipping_ok"] = False
+        status["shipping_error"] = str(ship_opts)
+    else:
         status["shipping_ok"] = True
         status["shipping_count"] = len(ship_opts)
         # Include a concise summary of options to aid debugging
@@ -173,26 +269,151 @@ def api_ecwid_status():
             }
             for o in ship_opts
         ]
-    except Exception as e:
-        status["shipping_ok"] = False
-        status["shipping_error"] = str(e)
     # Orders read (permission check)
-    try:
-        url = f"{ecwid_base()}/orders"
-        with httpx.Client(timeout=10.0) as client:
-            r = client.get(url, headers=ecwid_headers(), params={"limit": 1})
-        status["orders_get_status"] = r.status_code
-    except Exception as e:
+    if isinstance(orders_status, BaseException):
         status["orders_get_status"] = None
-        status["orders_get_error"] = str(e)
+        status["orders_get_error"] = str(orders_status)
+    else:
+        status["orders_get_status"] = orders_status
     return status
 
 @router.get("/api/v2/check_pickup")
 def api_check_pickup_v2(iso: str):
-    ok, reason = validate_pickup_time(iso, SHOP_HOURS)
+    ok, reason = validate_pickup_time(iso, SHOP_HOURS, _hours_exceptions())
     return {"ok": ok, "reason": reason}
 
 
+PICKUP_BATCH_MAX = 200
+
+
+class PickupBatchRequest(BaseModel):
+    times: List[str]
+
+
+@router.post("/api/v2/check_pickup_batch")
+def api_check_pickup_batch(req: PickupBatchRequest):
+    """Validate many candidate pickup times in one call.
+
+    Each verdict applies the full order-time rules (shop hours and exceptions,
+    lead time, max window, blackouts); constraints and hours are looked up once
+    for the whole batch.
+    """
+    if len(req.times) > PICKUP_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {PICKUP_BATCH_MAX} times per request.")
+    service = get_constraints_service()
+    snap = service.snapshot()
+    cons = snap.constraints
+    min_lead = int(cons.get("min_lead_minutes", 0))
+    max_days = int(cons.get("max_days", 0))
+    index = service.blackout_index(snap)
+    exceptions = _hours_exceptions()
+    now = datetime.now()
+    results: List[Dict[str, Any]] = []
+    for iso in req.times:
+        ok, reason = validate_pickup_time(iso, SHOP_HOURS, exceptions)
+        if ok:
+            reason = check_order_window(parse_pickup_iso(iso), now, min_lead, max_days, index)
+            ok = reason is None
+        results.append({"iso": iso, "ok": ok, "reason": reason})
+    return {"min_lead_minutes": min_lead, "max_days": max_days, "results": results}
+
+
+def _ecwid_error_detail(resp: httpx.Response) -> str:
+    """Human-readable error from an Ecwid error response (JSON message when available)."""
+    detail = ""
+    try:
+        payload = resp.json()
+        if isinstance(payload, dict):
+            detail = (
+                payload.get("errorMessage")
+                or payload.get("message")
+                or payload.get("error")
+                or ""
+            )
+            errs = payload.get("errors")
+            if (not detail) and isinstance(errs, list) and errs:
+                detail = str(errs[0])
+    except Exception:
+        # Fall back to raw text if body isn't JSON
+        detail = (resp.text or "").strip()
+    if not detail:
+        if resp.status_code == 403:
+            detail = "Ecwid API error 403: Forbidden. Check that ECWID_API_TOKEN has write access to Orders for this store."
+        else:
+            detail = f"Ecwid API error {resp.status_code}"
+    return detail
+
+
+def _find_submitted_order(client: httpx.Client, base: str, headers: Dict[str, str], ref: str) -> Optional[Dict[str, Any]]:
+    """Look for an order an earlier, ambiguous attempt (timeout, crash) may already have created."""
+    r = client.get(f"{base}/orders", headers=headers, params={"keywords": ref, "limit": 5})
+    if r.status_code != 200:
+        return None
+    for o in r.json().get("items") or []:
+        if f"Ref: {ref}" in (o.get("customerComment") or ""):
+            return o
+    return None
+
+
+def _submit_to_ecwid(ref: str, body: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+    """Queue submitter: optional /orders/calculate, then POST /orders.
+
+    Network errors, 429 and 5xx are retryable; other 4xx responses fail the
+    intent. The reference is written into the customer comment so a retry can
+    find an order that was created although the response was lost.
+    """
+    from ..ecwid_client import ecwid_base, ecwid_headers
+    base = ecwid_base(); headers = ecwid_headers()
+    body = dict(body)
+    body["customerComment"] = " | ".join([p for p in [body.get("customerComment"), f"Ref: {ref}"] if p])
+    try:
+        with httpx.Client(timeout=10.0) as client:
+            if attempt > 1:
+                found = _find_submitted_order(client, base, headers, ref)
+                if found:
+                    return {"id": found.get("id"), "orderNumber": found.get("orderNumber")}
+            # Optional: pre-calculate to validate totals and timing before creating the order
+            try:
+                rc = client.post(f"{base}/orders/calculate", headers=headers, json={
+                    "items": body.get("items"),
+                    "shippingOption": body.get("shippingOption"),
+                    "pickupTime": body.get("pickupTime"),
+                })
+                if rc.status_code >= 400:
+                    # Some stores do not support /orders/calculate and return 404/405. Proceed to create the order.
+                    if rc.status_code in (404, 405):
+                        logger.info("Ecwid calculate not available (status %s). Proceeding to create order.", rc.status_code)
+                    else:
+                        rc.raise_for_status()
+            except httpx.HTTPStatusError as he:
+                if he.response.status_code >= 500 or he.response.status_code == 429:
+                    raise
+                raise OrderSubmitError(f"Ecwid calculate error: {_ecwid_error_detail(he.response)}")
+            except httpx.RequestError:
+                raise
+            except Exception:
+                logger.exception("Ecwid calculate step failed")
+
+            r = client.post(f"{base}/orders", headers=headers, json=body)
+            r.raise_for_status()
+            data = r.json()
+        return {"id": data.get("id"), "orderNumber": data.get("orderNumber")}
+    except httpx.RequestError as re:
+        raise OrderSubmitError(f"Ecwid network error: {str(re)}", retryable=True)
+    except httpx.HTTPStatusError as he:
+        status = he.response.status_code
+        raise OrderSubmitError(_ecwid_error_detail(he.response), retryable=(status >= 500 or status == 429))
+
+
+def _order_queue() -> OrderQueue:
+    return get_order_queue(_submit_to_ecwid)
+
+
+def resume_pending_orders() -> None:
+    """Startup hook: submit intents a previous process left pending or mid-submission."""
+    resume_order_queue(_submit_to_ecwid)
+
+
 class OrderItem(BaseModel):
     productId: int | None = None
     sku: str | None = None
@@ -210,35 +431,113 @@ class OrderRequest(BaseModel):
     note: str | None = None
 
 
-@router.post("/api/v2/order")
-def api_order_v2(req: OrderRequest):
+ORDER_FILL_WORKERS = int(os.getenv("ORDER_FILL_WORKERS", "6"))
+
+
+def _needs_catalog_fill(i: Dict[str, Any]) -> bool:
+    if ("name" in i) and ("price" in i):
+        # even if name/price present, try to backfill weight if missing
+        return ("weight" not in i) or (i.get("weight") in (None, 0, 0.0))
+    return True
+
+
+def _catalog_indexes() -> tuple[Dict[int, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    try:
+        from ..intent_router import product_indexes
+        return product_indexes()
+    except Exception:
+        return {}, {}
+
+
+def _catalog_lookup(i: Dict[str, Any], by_id: Dict[int, Dict[str, Any]], by_sku: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    prod = None
+    if i.get("productId"):
+        try:
+            prod = by_id.get(int(i["productId"]))
+        except (TypeError, ValueError):
+            prod = None
+    if (not prod) and i.get("sku"):
+        prod = by_sku.get(str(i["sku"]))
+    return prod
+
+
+def _fetch_product(client: httpx.Client, base: str, headers: Dict[str, str], i: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Upstream lookup for a cart line missing from the cached catalog: by id, then by SKU."""
+    prod = None
+    try:
+        if i.get("productId"):
+            r = client.get(f"{base}/products/{int(i['productId'])}", headers=headers)
+            if r.status_code == 200:
+                prod = r.json()
+    except Exception:
+        prod = None
+    # If not found and we have sku, try search by SKU
+    if (not prod) and i.get("sku"):
+        try:
+            r = client.get(f"{base}/products", headers=headers, params={"sku": i.get("sku"), "limit": 1})
+            if r.status_code == 200:
+                items_json = r.json().get("items") or []
+                if items_json:
+                    prod = items_json[0]
+        except Exception:
+            prod = None
+    return prod
+
+
+def _apply_product(i: Dict[str, Any], prod: Dict[str, Any]) -> None:
+    # Fill name/price if available
+    if "name" not in i or not i.get("name"):
+        nm = prod.get("name") or ""
+        if nm:
+            i["name"] = nm
+    if "price" not in i or i.get("price") is None:
+        pr = prod.get("price")
+        if isinstance(pr, (int, float)):
+            i["price"] = float(pr)
+    # Backfill weight if available
+    w = prod.get("weight")
+    if isinstance(w, (int, float)) and w > 0:
+        i["weight"] = float(w)
+
+
+@router.post("/api/v2/order", status_code=202)
+def api_order_v2(req: OrderRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """Validate the order, persist it as a queued intent and return its reference.
+
+    A background worker submits it to Ecwid with retries; poll
+    /api/v2/order/{ref} for the outcome. Repeating a request with the same
+    Idempotency-Key returns the original intent instead of creating a new order.
+    """
     # Feature flag: allow/disallow ordering via chat
     if (os.getenv("ENABLE_CHAT_ORDERING", "false").lower() in {"0", "false", "no", "off"}):
         raise HTTPException(status_code=403, detail="Ordering is disabled")
-    ok, reason = validate_pickup_time(req.pickup_time, SHOP_HOURS)
+    queue = _order_queue()
+    idem_key = (idempotency_key or "").strip() or uuid.uuid4().hex
+    fingerprint = request_fingerprint(req.dict())
+    try:
+        existing = queue.find(idem_key, fingerprint)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different order.")
+    if existing is not None:
+        return JSONResponse(status_code=202, content={"ok": True, **existing})
+    ok, reason = validate_pickup_time(req.pickup_time, SHOP_HOURS, _hours_exceptions())
     if not ok:
         raise HTTPException(status_code=400, detail=f"Pickup time not available: {reason}")
 
-    res = infer_constraints(
-        shipping_options=ecwid_get_shipping_options(),
-        profile=ecwid_get_profile(),
-        default_min_lead_minutes=int(os.getenv("ECWID_MIN_LEAD_MINUTES", "720")),
-        default_max_days=int(os.getenv("ECWID_MAX_ORDER_DAYS", "60")),
-    )
-    min_lead = int(res.get("min_lead_minutes", 0))
-    max_days = int(res.get("max_days", 0))
-    blackouts = res.get("blackout_dates") or []
-
-    now = datetime.now()
+    # Window, blackouts and the pickup option all come from one constraints refresh
+    service = get_constraints_service()
+    snap = service.snapshot()
+    res = snap.constraints
     dt = parse_pickup_iso(req.pickup_time)
     if not dt:
         raise HTTPException(status_code=400, detail="Invalid time format. Use YYYY-MM-DDTHH:MM.")
-    if min_lead > 0 and dt < (now + timedelta(minutes=min_lead)):
-        raise HTTPException(status_code=400, detail=f"Pickup must be at least {int(round(min_lead/60))} hours from now.")
-    if max_days > 0 and dt.date() > (now + timedelta(days=max_days)).date():
-        raise HTTPException(status_code=400, detail=f"Pickup cannot be more than {max_days} days ahead.")
-    if is_blackout(dt, blackouts):
-        raise HTTPException(status_code=400, detail="Pickup date is not available (blackout).")
+    reason = check_order_window(
+        dt, datetime.now(),
+        int(res.get("min_lead_minutes", 0)), int(res.get("max_days", 0)),
+        service.blackout_index(snap),
+    )
+    if reason:
+        raise HTTPException(status_code=400, detail=reason)
 
     items: List[Dict[str, Any]] = []
     for it in req.items:
@@ -263,54 +562,26 @@ def api_order_v2(req: OrderRequest):
 
     # Ensure each item has required name and price per Ecwid API (fallback to catalog)
     try:
-        from ..ecwid_client import ecwid_base, ecwid_headers
-        base = ecwid_base(); headers = ecwid_headers()
-        def _fill_item(i: Dict[str, Any]) -> Dict[str, Any]:
-            if ("name" in i) and ("price" in i):
-                # even if name/price present, try to backfill weight if missing
-                need_weight = ("weight" not in i) or (i.get("weight") in (None, 0, 0.0))
-                if not need_weight:
-                    return i
-            # Try by productId
-            prod = None
-            try:
-                if i.get("productId"):
-                    with httpx.Client(timeout=10.0) as client:
-                        r = client.get(f"{base}/products/{int(i['productId'])}", headers=headers)
-                        if r.status_code == 200:
-                            prod = r.json()
-            except Exception:
-                prod = None
-            # If not found and we have sku, try search by SKU
-            if (not prod) and i.get("sku"):
-                try:
-                    with httpx.Client(timeout=10.0) as client:
-                        r = client.get(f"{base}/products", headers=headers, params={"sku": i.get("sku"), "limit": 1})
-                        if r.status_code == 200:
-                            items_json = r.json().get("items") or []
-                            if items_json:
-                                prod = items_json[0]
-                except Exception:
-                    prod = None
-            # Fill name/price if available
+        by_id, by_sku = _catalog_indexes()
+        misses: List[Dict[str, Any]] = []
+        for i in items:
+            if not _needs_catalog_fill(i):
+                continue
+            prod = _catalog_lookup(i, by_id, by_sku)
             if prod:
-                if "name" not in i or not i.get("name"):
-                    nm = prod.get("name") or ""
-                    if nm:
-                        i["name"] = nm
-                if "price" not in i or i.get("price") is None:
-                    pr = prod.get("price")
-                    if isinstance(pr, (int, float)):
-                        i["price"] = float(pr)
-                # Backfill weight if available
-                try:
-                    w = prod.get("weight")
-                    if isinstance(w, (int, float)) and w > 0:
-                        i["weight"] = float(w)
-                except Exception:
-                    pass
-            return i
-        items = [_fill_item(i) for i in items]
+                _apply_product(i, prod)
+            else:
+                misses.append(i)
+        if misses:
+            # Only lines the cached catalog could not resolve go upstream, all at once
+            from ..ecwid_client import ecwid_base, ecwid_headers
+            base = ecwid_base(); headers = ecwid_headers()
+            workers = max(1, min(len(misses), ORDER_FILL_WORKERS))
+            with httpx.Client(timeout=10.0) as client, ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(lambda i: _fetch_product(client, base, headers, i), misses))
+            for i, prod in zip(misses, fetched):
+                if prod:
+                    _apply_product(i, prod)
         # Validate again
         for i in items:
             if ("name" not in i) or ("price" not in i):
@@ -321,14 +592,8 @@ def api_order_v2(req: OrderRequest):
         # If filling fails silently, proceed (Ecwid will validate and return a clear error)
         pass
 
-    from ..ecwid_client import ecwid_base, ecwid_headers
-    url = f"{ecwid_base()}/orders"
     # Determine shipping (Pickup) option from store configuration
-    ship_opts = []
-    try:
-        ship_opts = ecwid_get_shipping_options()
-    except Exception:
-        ship_opts = []
+    ship_opts = list(snap.shipping_options)
     def _opt_name(o: Dict[str, Any]) -> str:
         return (
             o.get("title")
@@ -448,66 +713,16 @@ def api_order_v2(req: OrderRequest):
         "customerComment": " | ".join([p for p in [f"Pickup: {req.pickup_time}", req.note] if p]),
     }
     try:
-        # Optional: pre-calculate to validate totals and timing before creating the order
-        try:
-            calc_url = f"{ecwid_base()}/orders/calculate"
-            with httpx.Client(timeout=10.0) as client:
-                rc = client.post(calc_url, headers=ecwid_headers(), json={
-                    "items": items,
-                    "shippingOption": shipping_option,
-                    "pickupTime": pickup_time_str,
-                })
-                if rc.status_code >= 400:
-                    # Some stores do not support /orders/calculate and return 404/405. Proceed to create the order.
-                    if rc.status_code in (404, 405):
-                        logger.info("Ecwid calculate not available (status %s). Proceeding to create order.", rc.status_code)
-                    else:
-                        # Surface calculation error directly for other statuses
-                        detail = rc.text
-                        try:
-                            j = rc.json()
-                            detail = j.get("errorMessage") or j.get("message") or detail
-                        except Exception:
-                            pass
-                        raise HTTPException(status_code=rc.status_code, detail=f"Ecwid calculate error: {detail}")
-        except HTTPException:
-            raise
-        except Exception:
-            logger.exception("Ecwid calculate step failed")
-
-        with httpx.Client(timeout=10.0) as client:
-            r = client.post(url, headers=ecwid_headers(), json=body)
-            r.raise_for_status()
-            data = r.json()
-        return {"ok": True, "id": data.get("id"), "orderNumber": data.get("orderNumber")}
-    except httpx.RequestError as re:
-        logger.exception("Ecwid network error")
-        raise HTTPException(status_code=502, detail=f"Ecwid network error: {str(re)}")
-    except httpx.HTTPStatusError as he:
-        # Parse Ecwid error JSON when possible for clearer messages
-        status = he.response.status_code
-        detail = ""
-        try:
-            payload = he.response.json()
-            if isinstance(payload, dict):
-                detail = (
-                    payload.get("errorMessage")
-                    or payload.get("message")
-                    or payload.get("error")
-                    or ""
-                )
-                errs = payload.get("errors")
-                if (not detail) and isinstance(errs, list) and errs:
-                    detail = str(errs[0])
-        except Exception:
-            # Fall back to raw text if body isn't JSON
-            detail = (he.response.text or "").strip()
-        if not detail:
-            if status == 403:
-                detail = "Ecwid API error 403: Forbidden. Check that ECWID_API_TOKEN has write access to Orders for this store."
-            else:
-                detail = f"Ecwid API error {status}"
-        raise HTTPException(status_code=status, detail=detail)
-    except Exception as e:
-        logger.exception("Order creation failed")
-        raise HTTPException(status_code=502, detail=f"Failed to create order: {e.__class__.__name__}: {str(e)}")
+        intent = queue.enqueue(idem_key, body, fingerprint)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different order.")
+    return JSONResponse(status_code=202, content={"ok": True, **intent})
+
+
+@router.get("/api/v2/order/{ref}")
+def api_order_status_v2(ref: str):
+    """Status of a queued order: pending, submitting, submitted (with orderNumber) or failed."""
+    intent = _order_queue().get(ref)
+    if intent is None:
+        raise HTTPException(status_code=404, detail="Unknown order reference.")
+    return {"ok": intent["status"] != FAILED, **intent}
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from bisect import bisect_right
 from typing import Dict, List, Tuple, Any
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 
 # Default pickup hours (local time). Python weekday: Mon=0 .. Sun=6
@@ -23,43 +24,214 @@ def parse_pickup_iso(s: str) -> datetime | None:
     return None
 
 
-def validate_pickup_time(pickup_iso: str, shop_hours: Dict[int, List[Tuple[str, str]]] | None = None) -> Tuple[bool, str | None]:
+Windows = List[Tuple[str, str]]
+
+
+def _hm(s: str) -> int:
+    h, m = map(int, s.split(":"))
+    return h * 60 + m
+
+
+def windows_for(d: date, shop_hours: Dict[int, Windows] | None = None, exceptions: Dict[str, Windows] | None = None) -> Windows:
+    """Pickup windows for a date: an `exceptions` entry (ISO date, [] = closed) overrides the weekday hours."""
+    if exceptions and d.isoformat() in exceptions:
+        return exceptions[d.isoformat()] or []
+    hours = shop_hours or SHOP_HOURS
+    return hours.get(d.weekday()) or []  # Mon=0
+
+
+def validate_pickup_time(
+    pickup_iso: str,
+    shop_hours: Dict[int, Windows] | None = None,
+    exceptions: Dict[str, Windows] | None = None,
+) -> Tuple[bool, str | None]:
     dt = parse_pickup_iso(pickup_iso)
     if not dt:
         return False, "Invalid time format. Use YYYY-MM-DDTHH:MM."
-    hours = shop_hours or SHOP_HOURS
-    dow = dt.weekday()  # Mon=0
-    windows = hours.get(dow) or []
+    windows = windows_for(dt.date(), shop_hours, exceptions)
     if not windows:
         return False, "Closed that day."
     mins = dt.hour * 60 + dt.minute
     for start, end in windows:
-        sh, sm = map(int, start.split(":"))
-        eh, em = map(int, end.split(":"))
-        if (sh * 60 + sm) <= mins <= (eh * 60 + em):
+        if _hm(start) <= mins <= _hm(end):
             return True, None
     return False, "Outside pickup hours."
 
 
-def is_blackout(dt: datetime, blackouts: List[Dict[str, Any]] | None) -> bool:
-    try:
-        y = dt.year
+def _parse_ymd(s: str) -> Tuple[int, int, int]:
+    fy, fm, fd = [int(x) for x in (s.split("-") + ["1", "1"])[:3]]
+    return fy, fm, fd
+
+
+def _md_key(month: int, day: int) -> int:
+    return month * 32 + day
+
+
+class BlackoutIndex:
+    """Blackout ranges compiled into sorted, merged day intervals.
+
+    One-off ranges are kept as date ordinals; ``repeatedAnnually`` ranges as
+    month/day keys (a range crossing New Year is split in two). Lookups bisect
+    both lists, so a check is O(log n) instead of reparsing every range.
+    """
+
+    def __init__(self, blackouts: List[Dict[str, Any]] | None) -> None:
+        fixed: List[Tuple[int, int]] = []
+        annual: List[Tuple[int, int]] = []
         for b in blackouts or []:
             fd = (b.get("from") or b.get("fromDate") or "").strip()
             td = (b.get("to") or b.get("toDate") or "").strip()
-            ra = bool(b.get("repeatedAnnually"))
             if not (fd and td):
                 continue
-            parts_f = (fd.split("-") + ["1", "1"])[:3]
-            parts_t = (td.split("-") + ["1", "1"])[:3]
-            fy, fm, fdn = [int(x) for x in parts_f]
-            ty, tm, tdn = [int(x) for x in parts_t]
-            if ra:
-                fy = ty = y
-            start = datetime(fy, fm, fdn, 0, 0)
-            end = datetime(ty, tm, tdn, 23, 59)
-            if start <= dt <= end:
-                return True
-        return False
+            try:
+                fy, fm, fdn = _parse_ymd(fd)
+                ty, tm, tdn = _parse_ymd(td)
+                if b.get("repeatedAnnually"):
+                    lo, hi = _md_key(fm, fdn), _md_key(tm, tdn)
+                    if lo <= hi:
+                        annual.append((lo, hi))
+                    else:
+                        annual.append((lo, _md_key(12, 31)))
+                        annual.append((_md_key(1, 1), hi))
+                else:
+                    lo, hi = date(fy, fm, fdn).toordinal(), date(ty, tm, tdn).toordinal()
+                    if lo <= hi:
+                        fixed.append((lo, hi))
+            except Exception:
+                continue
+        self._fixed_starts, self._fixed_ends = self._merge(fixed)
+        self._annual_starts, self._annual_ends = self._merge(annual)
+
+    @staticmethod
+    def _merge(intervals: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        starts: List[int] = []
+        ends: List[int] = []
+        for lo, hi in sorted(intervals):
+            if ends and lo <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], hi)
+            else:
+                starts.append(lo)
+                ends.append(hi)
+        return starts, ends
+
+    @staticmethod
+    def _covering_end(starts: List[int], ends: List[int], key: int) -> int | None:
+        i = bisect_right(starts, key) - 1
+        if i >= 0 and ends[i] >= key:
+            return ends[i]
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self._fixed_starts or self._annual_starts)
+
+    def contains(self, d: date | datetime) -> bool:
+        if isinstance(d, datetime):
+            d = d.date()
+        if self._covering_end(self._fixed_starts, self._fixed_ends, d.toordinal()) is not None:
+            return True
+        return self._covering_end(self._annual_starts, self._annual_ends, _md_key(d.month, d.day)) is not None
+
+    def next_available(self, start: date | datetime, horizon_days: int = 731) -> date | None:
+        """First date on or after ``start`` that is not blacked out (None within the horizon)."""
+        d = start.date() if isinstance(start, datetime) else start
+        limit = d + timedelta(days=horizon_days)
+        while d <= limit:
+            end = self._covering_end(self._fixed_starts, self._fixed_ends, d.toordinal())
+            if end is not None:
+                d = date.fromordinal(end + 1)
+                continue
+            md_end = self._covering_end(self._annual_starts, self._annual_ends, _md_key(d.month, d.day))
+            if md_end is not None:
+                # Jump past the covered month/day run (keys are month*32+day)
+                m, dd = divmod(md_end, 32)
+                try:
+                    d = date(d.year, m, dd) + timedelta(days=1)
+                except ValueError:  # e.g. Feb 29 in a non-leap year: continue from next month
+                    d = (date(d.year, m, 1) + timedelta(days=32)).replace(day=1)
+                continue
+            return d
+        return None
+
+
+_COMPILED: Tuple[Any, BlackoutIndex] | None = None
+
+
+def compile_blackouts(blackouts: List[Dict[str, Any]] | None) -> BlackoutIndex:
+    """Compile a blackout list, reusing the last result for the same list object.
+
+    The constraints service hands out the same list until its next refresh, so
+    this compiles once per constraints version.
+    """
+    global _COMPILED
+    cached = _COMPILED
+    if cached is not None and cached[0] is blackouts:
+        return cached[1]
+    index = BlackoutIndex(blackouts)
+    _COMPILED = (blackouts, index)
+    return index
+
+
+def is_blackout(dt: datetime, blackouts: List[Dict[str, Any]] | None) -> bool:
+    try:
+        return compile_blackouts(blackouts).contains(dt)
     except Exception:
         return False
+
+
+def next_available_date(start: date | datetime, blackouts: List[Dict[str, Any]] | None) -> date | None:
+    return compile_blackouts(blackouts).next_available(start)
+
+
+def check_order_window(
+    dt: datetime,
+    now: datetime,
+    min_lead_minutes: int,
+    max_days: int,
+    blackouts: BlackoutIndex,
+) -> str | None:
+    """Lead time, max-days window and blackout checks; returns the rejection reason or None."""
+    if min_lead_minutes > 0 and dt < (now + timedelta(minutes=min_lead_minutes)):
+        return f"Pickup must be at least {int(round(min_lead_minutes/60))} hours from now."
+    if max_days > 0 and dt.date() > (now + timedelta(days=max_days)).date():
+        return f"Pickup cannot be more than {max_days} days ahead."
+    if blackouts.contains(dt):
+        return "Pickup date is not available (blackout)."
+    return None
+
+
+def pickup_slots(
+    start: date,
+    days: int,
+    earliest: datetime,
+    last_day: date | None,
+    blackouts: BlackoutIndex,
+    shop_hours: Dict[int, Windows] | None = None,
+    exceptions: Dict[str, Windows] | None = None,
+    step_minutes: int = 60,
+) -> List[Dict[str, Any]]:
+    """Bookable pickup times per day, applying the same rules as order validation.
+
+    Candidates are on-the-hour times inside each day's windows (as in
+    scripts/compute_pickup_slot.py); a candidate is kept when it is not before
+    ``earliest`` (now + lead time), its day is not after ``last_day`` (max days)
+    and not blacked out. Days without any slot are omitted.
+    """
+    out: List[Dict[str, Any]] = []
+    for i in range(max(0, days)):
+        d = start + timedelta(days=i)
+        if last_day is not None and d > last_day:
+            break
+        if d < earliest.date() or blackouts.contains(d):
+            continue
+        times: List[str] = []
+        for w_start, w_end in windows_for(d, shop_hours, exceptions):
+            lo, hi = _hm(w_start), _hm(w_end)
+            t = -(-lo // step_minutes) * step_minutes  # first step boundary inside the window
+            while t <= hi:
+                cand = datetime.combine(d, datetime.min.time()) + timedelta(minutes=t)
+                if cand >= earliest:
+                    times.append(cand.strftime("%H:%M"))
+                t += step_minutes
+        if times:
+            out.append({"date": d.isoformat(), "slots": sorted(set(times))})
+    return out
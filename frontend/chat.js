@@ -27,6 +27,8 @@ let currentLang = localStorage.getItem('chat_lang') || 'fi'; // default to Finni
 // Answer display flags (deterministic vs RAG). If both true → show both.
 let showLegacy = false;
 let showRag = true;
+// Stream legacy-only answers over SSE (/api/chat/stream) so LLM text renders as it arrives.
+let streamChat = true;
 try {
   const params = new URLSearchParams(window.location.search);
   const lsRag = localStorage.getItem('show_rag');
@@ -34,6 +36,7 @@ try {
   if (params.has('legacy')) showLegacy = !['0','false','no','off'].includes((params.get('legacy')||'').toLowerCase());
   if (params.has('rag')) showRag = !['0','false','no','off'].includes((params.get('rag')||'').toLowerCase());
   if (!showLegacy && !showRag) showRag = true; // ensure at least one answer
+  if (params.has('stream')) streamChat = !['0','false','no','off'].includes((params.get('stream')||'').toLowerCase());
 } catch(e) {}
 // Persist default language immediately so backend receives a cookie hint as well
 if (!localStorage.getItem('chat_lang')) {
@@ -42,8 +45,7 @@ if (!localStorage.getItem('chat_lang')) {
     document.cookie = `chat_lang=${currentLang}; path=/; max-age=${60*60*24*30}`;
   } catch(e) {}
 }
-let pickupHoursCache = null;
-let orderConstraintsCache = null; // { min_lead_minutes, max_days }
+let pickupSlotsCache = null; // { at, data } from /api/v2/pickup_slots
 const ORDER_ONLINE_URL = 'https://rakaskotileipomo.fi/verkkokauppa';
 
 function updateChatViewportUnit(){
@@ -82,6 +84,7 @@ const I18N = {
     back: 'Takaisin',
     submit_order: 'Lähetä tilaus',
     order_ok: 'Kiitos! Tilaus vastaanotettu. Vahvistusnumero:',
+    order_pending: 'Tilaus on vastaanotettu ja välitetään kauppaan. Viite:',
     order_fail: 'Valitettavasti tilauksen luonti epäonnistui.',
     order_fail_reason: 'Syy:',
     invalid_pickup_time: 'Valittu noutoaika ei ole mahdollinen:',
@@ -126,6 +129,7 @@ const I18N = {
     back: 'Tillbaka',
     submit_order: 'Skicka beställning',
     order_ok: 'Tack! Beställning mottagen. Ordernummer:',
+    order_pending: 'Beställningen är mottagen och skickas vidare till butiken. Referens:',
     order_fail: 'Tyvärr misslyckades beställningen.',
     order_fail_reason: 'Orsak:',
     invalid_pickup_time: 'Vald avhämtnings tid är inte möjlig:',
@@ -170,6 +174,7 @@ const I18N = {
     back: 'Back',
     submit_order: 'Place order',
     order_ok: 'Thanks! Order received. Confirmation number:',
+    order_pending: 'Order received and being passed to the shop. Reference:',
     order_fail: 'Sorry, order could not be created.',
     order_fail_reason: 'Reason:',
     invalid_pickup_time: 'Selected pickup time is not available:',
@@ -705,30 +710,27 @@ function askPhone(){
 }
 
 async function askDate(){
-  const {hours} = await fetchPickupHours();
-  pickupHoursCache = hours;
-  const cons = await fetchOrderConstraints();
+  const slots = await fetchPickupSlots();
   // Initialize shown month to current month if not set
   if (!orderSession._calMonth){
     const now = new Date();
     const m = String(now.getMonth()+1).padStart(2,'0');
     orderSession._calMonth = `${now.getFullYear()}-${m}-01`;
   }
-  const calHtml = renderCalendarHTML(orderSession._calMonth, hours, cons);
+  const calHtml = renderCalendarHTML(orderSession._calMonth, slots);
   addBotHtml(`<div class="dt-picker" data-step="date">
     <div class="of-title">${tr('ask_date')}</div>
     ${calHtml}
     <div class="of-actions"><button class="btn-back" type="button">${tr('back')}</button></div>
   </div>`);
-  bindCalendarHandlers(hours, cons);
+  bindCalendarHandlers(slots);
   bindBack('date', ()=>{ askPhone(); });
 }
 
-async function askTime(hours){
-  hours = hours || pickupHoursCache || {};
-  const cons = await fetchOrderConstraints();
-  const slots = buildTimeSlots(orderSession.pickupDate, hours, cons);
-  const btns = slots.map(s=>`<button class="dt-btn ${s.enabled?'':'disabled'}" data-time="${s.value}" ${s.enabled?'':'disabled'}>${s.label}</button>`).join('');
+async function askTime(){
+  const slots = await fetchPickupSlots();
+  const times = slots.byDate[orderSession.pickupDate] || [];
+  const btns = times.map(t=>`<button class="dt-btn" data-time="${t}">${t}</button>`).join('');
   addBotHtml(`<div class="dt-picker" data-step="time"><div class="of-title">${tr('ask_time')}</div><div class="dt-grid">${btns}</div><div class="of-actions"><button class="btn-back" type="button">${tr('back')}</button></div></div>`);
   chatLog.querySelectorAll('.dt-picker[data-step="time"] .dt-btn').forEach(btn=>{
     btn.addEventListener('click',(e)=>{ e.preventDefault(); if (btn.disabled) return; orderSession.pickupTime = btn.dataset.time; orderSession.step='note'; saveSession(); askNote(); });
@@ -759,6 +761,21 @@ function bindBack(step, onBack){
   btn.addEventListener('click', (e)=>{ e.preventDefault(); onBack&&onBack(); });
 }
 
+// The server queues orders and submits them to Ecwid with retries; poll the
+// intent until it settles. Gives up polling (not the order) after ~1 minute.
+async function waitForOrder(ref){
+  for (let i = 0; i < 30; i++){
+    await new Promise(res=>setTimeout(res, i < 5 ? 1000 : 2000));
+    try{
+      const r = await fetch(`/api/v2/order/${encodeURIComponent(ref)}`);
+      if (!r.ok) continue;
+      const data = await r.json();
+      if (data.status === 'submitted' || data.status === 'failed') return data;
+    }catch{}
+  }
+  return null;
+}
+
 async function submitOrder(){
   const items = orderSession.cart.map(it=>({
     quantity: it.quantity,
@@ -769,44 +786,42 @@ async function submitOrder(){
   }));
   const iso = `${orderSession.pickupDate}T${orderSession.pickupTime}`;
   const payload = { items, name: orderSession.name, email: orderSession.email||null, phone: orderSession.phone, pickup_time: iso, note: orderSession.note||null };
+  // One key per checkout so a resubmit after a network error cannot create a second order
+  if (!orderSession.orderKey){
+    orderSession.orderKey = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    saveSession();
+  }
   try{
-    const r = await fetch('/api/v2/order', { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
-    const data = await r.json();
+    const r = await fetch('/api/v2/order', { method:'POST', headers:{'Content-Type':'application/json', 'Idempotency-Key': orderSession.orderKey}, body: JSON.stringify(payload)});
+    let data = await r.json();
+    if (r.status === 409){ orderSession.orderKey = null; saveSession(); }
     if (!r.ok){ addBot(`${tr('order_fail')} ${tr('order_fail_reason')} ${escapeHtml(data.detail||JSON.stringify(data))}`); return; }
+    if (data.status !== 'submitted' && data.status !== 'failed'){
+      const settled = await waitForOrder(data.ref);
+      if (!settled){ addBot(`${tr('order_pending')} ${escapeHtml(data.ref)}`); return; }
+      data = settled;
+    }
+    if (data.status === 'failed'){
+      orderSession.orderKey = null; saveSession();
+      addBot(`${tr('order_fail')} ${tr('order_fail_reason')} ${escapeHtml(data.error||'')}`);
+      return;
+    }
     addBot(`${tr('order_ok')} ${data.orderNumber || data.id || '—'}`);
-    orderSession.cart = []; orderSession.step = null; saveSession(); updateCartSummary();
+    orderSession.cart = []; orderSession.step = null; orderSession.orderKey = null; saveSession(); updateCartSummary();
   }catch(err){ console.error(err); addBot(tr('order_fail')); }
 }
 
-async function fetchPickupHours(){
-  try{ const r = await fetch('/api/v2/pickup_hours'); if (!r.ok) throw 0; return await r.json(); }catch{ return {hours:{}}; }
-}
-async function fetchOrderConstraints(){
-  if (orderConstraintsCache) return orderConstraintsCache;
-  try{ const r = await fetch('/api/v2/order_constraints'); if (!r.ok) throw 0; orderConstraintsCache = await r.json(); return orderConstraintsCache; }catch{ return { min_lead_minutes: 720, max_days: 60 }; }
-}
-function buildNextDays(hours, n){
-  const out=[]; const now=new Date(); for(let i=0;i<n;i++){ const d=new Date(now); d.setDate(now.getDate()+i); const dow=(d.getDay()+6)%7; // Mon=0
-    const has=Array.isArray(hours[dow]); const yyyy=d.getFullYear(); const mm=String(d.getMonth()+1).padStart(2,'0'); const dd=String(d.getDate()).padStart(2,'0');
-    const iso=`${yyyy}-${mm}-${dd}`; const label=d.toLocaleDateString(undefined,{weekday:'short', day:'numeric', month:'short'});
-    out.push({iso,label,enabled: !!has}); }
-  return out; }
-function buildTimeSlots(dateIso, hours, cons){
-  const [y,m,d] = dateIso.split('-').map(x=>parseInt(x,10)); const dt=new Date(y, m-1, d);
-  const dow=(dt.getDay()+6)%7; const wins=hours[dow]||[]; const slots=[]; const now=new Date();
-  const minLeadMs = ((cons && cons.min_lead_minutes) ? cons.min_lead_minutes : 720) * 60 * 1000;
-  const minTime = new Date(Date.now() + minLeadMs);
-  for(const [start,end] of wins){ const [sh,sm]=start.split(':').map(n=>parseInt(n,10)); const [eh,em]=end.split(':').map(n=>parseInt(n,10));
-    for(let h=sh; h<=eh; h++){
-      const m = 0; const tM = h*60+m; if (tM<sh*60+sm || tM>eh*60+em) continue;
-      const label=`${String(h).padStart(2,'0')}:00`; const value=label;
-      const cand=new Date(dt); cand.setHours(h,m,0,0);
-      const enabled = cand.getTime() > minTime.getTime();
-      if (enabled) slots.push({label,value,enabled});
-    }
-  }
-  const seen=new Set(); const uniq=[]; for(const s of slots){ if (seen.has(s.value)) continue; seen.add(s.value); uniq.push(s); }
-  return uniq;
+// Server-computed pickup calendar (hours, exceptions, lead time, max days, blackouts).
+// Cached for a few minutes so month navigation and the time step reuse one response.
+async function fetchPickupSlots(){
+  if (pickupSlotsCache && (Date.now() - pickupSlotsCache.at) < 5*60*1000) return pickupSlotsCache.data;
+  let data = { dates: [], blackout_dates: [] };
+  try{ const r = await fetch('/api/v2/pickup_slots'); if (!r.ok) throw 0; data = await r.json(); }catch{}
+  const byDate = {};
+  (data.dates || []).forEach(d=>{ byDate[d.date] = d.slots || []; });
+  const slots = { byDate, blackouts: new Set(data.blackout_dates || []), last: data.to || null };
+  pickupSlotsCache = { at: Date.now(), data: slots };
+  return slots;
 }
 // ---- Calendar helpers ----
 function _localeTag(){
@@ -829,51 +844,25 @@ function _weekdayHeaders(){
   return out;
 }
 
-function renderCalendarHTML(monthISO, hours, cons){
+function renderCalendarHTML(monthISO, slots){
   const month = _startOfMonth(monthISO);
   const firstDow = _weekdayMon0(month);
   const start = new Date(month); start.setDate(1 - firstDow); // Monday on or before the 1st
   const today = new Date(); today.setHours(0,0,0,0);
-  const minLeadMs = ((cons && cons.min_lead_minutes) ? cons.min_lead_minutes : 720) * 60 * 1000;
-  const minDate = new Date(Date.now() + minLeadMs); minDate.setHours(0,0,0,0);
-  const maxDays = (cons && cons.max_days) ? cons.max_days : 60;
-  const maxDate = new Date(); maxDate.setDate(maxDate.getDate() + maxDays); maxDate.setHours(0,0,0,0);
-  // Build blackout date predicate
-  const blackouts = Array.isArray(cons && cons.blackout_dates) ? cons.blackout_dates : [];
-  const isBlackout = (d)=>{
-    if (!blackouts.length) return false;
-    const y = d.getFullYear();
-    const md = (s)=>{ const [yy,mm,dd] = s.split('-').map(x=>parseInt(x,10)); return {yy,mm,dd}; };
-    for (const b of blackouts){
-      if (!(b && b.from && b.to)) continue;
-      const f = md(b.from); const t = md(b.to);
-      // Build actual date range for this year if repeatedAnnually
-      const fy = b.repeatedAnnually ? y : f.yy;
-      const ty = b.repeatedAnnually ? y : t.yy;
-      const from = new Date(fy, (f.mm||1)-1, f.dd||1);
-      const to = new Date(ty, (t.mm||1)-1, t.dd||1);
-      from.setHours(0,0,0,0); to.setHours(0,0,0,0);
-      if (d >= from && d <= to) return true;
-    }
-    return false;
-  };
+  const lastIso = slots.last;
   // Build 6 weeks grid (42 days)
   let cells = '';
   let earliestIso = null;
   for (let i=0; i<42; i++){
     const d = new Date(start); d.setDate(start.getDate()+i);
     const inMonth = d.getMonth() === month.getMonth();
-    const dow = _weekdayMon0(d);
-    const avail = Array.isArray(hours[dow]) && hours[dow].length > 0;
-    const isPast = d < today;
-    const beforeMin = d < minDate;
-    const afterMax = d > maxDate;
-    const isBlk = isBlackout(d);
     const iso = _fmtISO(d);
+    const avail = (slots.byDate[iso] || []).length > 0;
+    const isBlk = slots.blackouts.has(iso);
     const classes = ['cal-day'];
     if (!inMonth) classes.push('other');
     if (isBlk) classes.push('blackout');
-    if (!avail || isPast || beforeMin || afterMax || isBlk) classes.push('disabled');
+    if (!avail) classes.push('disabled');
     if (d.getTime() === today.getTime()) classes.push('today');
     const label = d.getDate();
     // Track earliest available in this month
@@ -893,9 +882,9 @@ function renderCalendarHTML(monthISO, hours, cons){
     const m0 = new Date(month);
     for (let step=1; step<=11; step++){
       const cand = new Date(m0); cand.setMonth(m0.getMonth()+step);
-      if (cand > maxDate) break;
       const ciso = _fmtISO(new Date(cand.getFullYear(), cand.getMonth(), 1));
-      return renderCalendarHTML(ciso, hours, cons);
+      if (!lastIso || ciso > lastIso) break;
+      return renderCalendarHTML(ciso, slots);
     }
   }
   // Auto-preselect earliest available if none selected yet
@@ -913,13 +902,13 @@ function renderCalendarHTML(monthISO, hours, cons){
   </div>`;
 }
 
-function bindCalendarHandlers(hours, cons){
+function bindCalendarHandlers(slots){
   const wrap = [...chatLog.querySelectorAll('.dt-picker[data-step="date"] .calendar')].slice(-1)[0];
   if (!wrap) return;
   const update = (iso)=>{
     orderSession._calMonth = iso; saveSession();
-    wrap.outerHTML = renderCalendarHTML(orderSession._calMonth, hours, cons);
-    bindCalendarHandlers(hours, cons);
+    wrap.outerHTML = renderCalendarHTML(orderSession._calMonth, slots);
+    bindCalendarHandlers(slots);
   };
   const monthISO = wrap.getAttribute('data-month');
   const monthDate = _startOfMonth(monthISO);
@@ -933,7 +922,7 @@ function bindCalendarHandlers(hours, cons){
       // Highlight selected day before moving to time
       chatLog.querySelectorAll('.dt-picker[data-step="date"] .cal-day').forEach(n=>n.classList.remove('selected'));
       btn.classList.add('selected');
-      setTimeout(()=>{ orderSession.step='time'; askTime(hours); }, 180);
+      setTimeout(()=>{ orderSession.step='time'; askTime(); }, 180);
     });
   });
 }
@@ -1732,6 +1721,68 @@ if (chatInput && (!chatCard || !chatCard.classList.contains('readonly'))){
   });
 }
 
+function renderAnswer(reply){
+  const txt = reply || '';
+  const isHtml = /^\s*</.test(txt) || txt.includes('order-ui');
+  if (isHtml) {
+    addBotHtml(txt);
+  } else {
+    addBotHtml(`<div>${escapeHtml(txt)}</div>`);
+  }
+}
+
+// Read a text/event-stream body from a fetch() POST and call onEvent(name, data) per event.
+async function readSse(res, onEvent){
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = '';
+  const flush = (block) => {
+    let name = 'message', data = '';
+    block.split('\n').forEach(line => {
+      if (line.startsWith('event:')) name = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    });
+    if (data) onEvent(name, JSON.parse(data));
+  };
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let idx;
+    while ((idx = buf.indexOf('\n\n')) >= 0) {
+      flush(buf.slice(0, idx));
+      buf = buf.slice(idx + 2);
+    }
+  }
+  if (buf.trim()) flush(buf);
+}
+
+async function sendStreaming(text){
+  const res = await fetch('/api/chat/stream', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+    body: JSON.stringify({ message: text, lang: currentLang || undefined })
+  });
+  if (!res.ok || !res.body) throw new Error('Network error');
+  let bubble = null;
+  await readSse(res, (name, data) => {
+    if (name === 'answer') {
+      setTyping(false);
+      renderAnswer(data.reply || '...');
+    } else if (name === 'start') {
+      setTyping(false);
+      bubble = addMsg('', 'bot');
+    } else if (name === 'delta' && bubble) {
+      bubble.textContent += data.text || '';
+      chatLog.scrollTop = chatLog.scrollHeight;
+    } else if (name === 'done' && bubble) {
+      bubble.textContent = data.reply || bubble.textContent;
+    } else if (name === 'error') {
+      throw new Error(data.detail || 'Stream error');
+    }
+  });
+}
+
 chatForm.addEventListener('submit', async (e) => {
   e.preventDefault();
   if (chatCard && chatCard.classList.contains('readonly')) {
@@ -1743,6 +1794,10 @@ chatForm.addEventListener('submit', async (e) => {
   chatInput.value = '';
   setTyping(true);
   try {
+    if (streamChat && showLegacy && !showRag) {
+      await sendStreaming(text);
+      return;
+    }
     const res = await fetch('/api/chat_dual', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -1753,15 +1808,6 @@ chatForm.addEventListener('submit', async (e) => {
     setTyping(false);
     // If dual payload: show both legacy and RAG answers. Else fallback to single.
     if (data && (data.legacy || data.rag)) {
-      const renderAnswer = (reply) => {
-        const txt = reply || '';
-        const isHtml = /^\s*</.test(txt) || txt.includes('order-ui');
-        if (isHtml) {
-          addBotHtml(txt);
-        } else {
-          addBotHtml(`<div>${escapeHtml(txt)}</div>`);
-        }
-      };
       let rendered = false;
       if (showRag && data.rag && data.rag.reply) {
         renderAnswer(data.rag.reply);
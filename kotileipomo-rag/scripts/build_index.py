@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
+import argparse
 import sys
 from pathlib import Path
 
@@ -11,38 +11,52 @@ _SRC = _HERE.parent / "src"
 if str(_SRC) not in sys.path:
     sys.path.insert(0, str(_SRC))
 
-from rag.config import RAG_DATA_DIR
-from rag.ingest import load_kb_docs, chunk_docs
-from rag.index_bm25 import BM25Index
+from rag.config import RAG_EMB_FILE, RAG_EMB_NLIST, RAG_INDEX_FILE
 from rag.index_embeddings import EmbIndex
+from rag.index_store import IndexArtifactError, kb_source_digest, load_index, update_index
 
 
 def main():
-    docs = load_kb_docs()
-    docs = chunk_docs(docs)
-    print(f"Loaded {len(docs)} docs")
-
-    # Save a corpus manifest
-    out_dir = Path(RAG_DATA_DIR)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "corpus.jsonl").write_text(
-        "\n".join(json.dumps({"id": d.id, "meta": d.meta}) for d in docs),
-        encoding="utf-8"
-    )
-
-    # Build BM25
-    bm25 = BM25Index(docs)
-    # Persist minimal state (we rely on rebuild in-memory for simplicity)
-    (out_dir / "bm25.info").write_text(
-        json.dumps({"N": bm25.N, "avg_len": bm25.avg_len, "vocab": len(bm25.df)}),
-        encoding="utf-8"
-    )
-    print("BM25 index built.")
-
-    # Embeddings placeholder
-    emb = EmbIndex()
+    ap = argparse.ArgumentParser(description="Build or update the RAG index artifact")
+    ap.add_argument("--out", default=RAG_INDEX_FILE, help="artifact path (default: RAG_INDEX_FILE)")
+    ap.add_argument("--emb-out", default=RAG_EMB_FILE, help="dense vectors path (default: RAG_EMB_FILE)")
+    ap.add_argument("--nlist", type=int, default=RAG_EMB_NLIST,
+                    help="IVF lists for approximate dense search, about sqrt(docs); 0 = exact (default: RAG_EMB_NLIST)")
+    ap.add_argument("--full", action="store_true",
+                    help="re-tokenize every doc instead of reusing unchanged ones from the existing artifact")
+    args = ap.parse_args()
+
+    digest = kb_source_digest()
+    # Only added or changed docs are tokenized; the rest come from the existing artifact
+    bm25, delta = update_index(args.out, full=args.full)
+    print(f"Docs: {delta.added} added, {delta.changed} changed, {delta.removed} removed, {delta.unchanged} unchanged")
+    out = Path(args.out)
+    loaded = load_index(str(out), expect_digest=digest)
+    assert loaded.N == bm25.N and len(loaded.vocab) == len(bm25.vocab)
+    print(f"BM25 index {'unchanged' if delta.empty else 'written'}: {out} ({out.stat().st_size} bytes): "
+          f"N={bm25.N} avg_len={bm25.avg_len:.1f} vocab={len(bm25.vocab)} postings={len(bm25.post_docs)}")
+
+    # Dense n-gram vectors, stored next to the BM25 artifact in the same doc order.
+    # idf is corpus-wide, so any KB change rebuilds them in full.
+    docs = list(loaded.docs)
+    if delta.empty and not args.full:
+        try:
+            current = EmbIndex.load(docs, args.emb_out, expect_digest=digest)
+            if (0 if current.centroids is None else len(current.centroids)) == args.nlist:
+                print(f"Embeddings unchanged: {args.emb_out}")
+                return
+        except IndexArtifactError:
+            pass
+    emb = EmbIndex(nlist=args.nlist)
     emb.build(docs)
-    print("Embeddings index: disabled (stub).")
+    if emb.ready:
+        emb_out = emb.save(args.emb_out, source_digest=digest)
+        EmbIndex.load(docs, str(emb_out), expect_digest=digest)
+        print(f"Embeddings written to {emb_out} ({emb_out.stat().st_size} bytes): "
+              f"dim={emb.vectors.shape[1]} buckets={emb.dim} "
+              f"ivf_lists={0 if emb.centroids is None else len(emb.centroids)}")
+    else:
+        print("Embeddings index: skipped (numpy not installed).")
 
 
 if __name__ == "__main__":
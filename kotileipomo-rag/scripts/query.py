@@ -11,9 +11,9 @@ _SRC = _HERE.parent / "src"
 if str(_SRC) not in sys.path:
     sys.path.insert(0, str(_SRC))
 
-from rag.ingest import load_kb_docs, chunk_docs
-from rag.index_bm25 import BM25Index
-from rag.index_embeddings import EmbIndex
+from rag.index_store import load_or_build
+from rag.config import RAG_EMBEDDINGS
+from rag.index_embeddings import EmbIndex, load_or_build_emb
 from rag.retrieve import Retriever
 from rag.generate import compose_answer
 
@@ -24,9 +24,14 @@ def main():
     ap.add_argument("--lang", default="fi", choices=["fi","sv","en"])
     args = ap.parse_args()
 
-    docs = chunk_docs(load_kb_docs())
-    bm = BM25Index(docs)
+    bm, stale = load_or_build()
+    if stale:
+        print(f"(index artifact not used: {stale}; run scripts/build_index.py)", file=sys.stderr)
     emb = EmbIndex()
+    if RAG_EMBEDDINGS:
+        emb, emb_stale = load_or_build_emb(bm.docs)
+        if emb_stale:
+            print(f"(embeddings file not used: {emb_stale})", file=sys.stderr)
     r = Retriever(bm25=bm, emb=emb)
     hits = r.retrieve(args.query, args.lang, top_k=8)
     ans = compose_answer(args.query, hits, args.lang)
@@ -0,0 +1,115 @@
+"""In-process LRU for repeated RAG questions.
+
+Retrieval and composition are deterministic for a given query, language and
+index, so :class:`QueryCache` keeps two tables:
+
+- hit lists, keyed by ``(normalize(query), lang, top_k, index version)``;
+  retrieval only ever sees normalized tokens, so that key is exact.
+- composed answers, keyed the same way except that the query is only
+  lowercased and whitespace-collapsed: the canned-answer rules read
+  punctuation the normalizer drops (clock times like "19:00").
+
+Swapping in a rebuilt index changes its version, so stale entries simply stop
+matching and age out. ``set_compose`` drops the answers only; retrieval
+results survive compose-time rule changes.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .config import RAG_CACHE_SIZE
+from .ingest import Doc
+from .retrieve import Retriever
+from .tokenize import normalize
+
+
+Hits = List[Tuple[float, Doc]]
+Compose = Callable[[str, Hits, str], str]
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            val = self._data.get(key, _MISSING)
+            if val is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key: Hashable, val: Any) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._data[key] = val
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class QueryCache:
+    def __init__(self, compose: Compose, max_entries: int = RAG_CACHE_SIZE) -> None:
+        self.compose = compose
+        self.hit_lists = LRUCache(max_entries)
+        self.answers = LRUCache(max_entries)
+
+    def set_compose(self, compose: Compose) -> None:
+        """Use another composer; cached answers are dropped, cached hits kept."""
+        self.compose = compose
+        self.answers.clear()
+
+    def retrieve(self, retriever: Retriever, query: str, lang: str, top_k: int = 8) -> Hits:
+        key = (normalize(query).strip(), lang, top_k, retriever.index_version)
+        hits: Optional[Hits] = self.hit_lists.get(key)
+        if hits is None:
+            hits = retriever.retrieve(query, lang, top_k=top_k)
+            self.hit_lists.put(key, hits)
+        return list(hits)
+
+    def answer(self, retriever: Retriever, query: str, lang: str, top_k: int = 8) -> str:
+        """``compose(query, retrieve(query), lang)``, each step served from cache when possible."""
+        key = (" ".join((query or "").lower().split()), lang, top_k, retriever.index_version)
+        reply: Optional[str] = self.answers.get(key)
+        if reply is None:
+            reply = self.compose(query, self.retrieve(retriever, query, lang, top_k), lang)
+            self.answers.put(key, reply)
+        return reply
+
+    def clear(self) -> None:
+        self.hit_lists.clear()
+        self.answers.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hit_lists.stats(), "answers": self.answers.stats()}
@@ -12,8 +12,15 @@ DEFAULT_KB_DIR = (REPO_ROOT / "backend" / "knowledgebase").as_posix()
 
 RAG_KB_DIR = os.getenv("RAG_KB_DIR", DEFAULT_KB_DIR)
 RAG_DATA_DIR = os.getenv("RAG_DATA_DIR", (REPO_ROOT / "kotileipomo-rag" / "data").as_posix())
+RAG_INDEX_FILE = os.getenv("RAG_INDEX_FILE", (Path(RAG_DATA_DIR) / "rag_index.bin").as_posix())
 
 RAG_EMBEDDINGS = os.getenv("RAG_EMBEDDINGS", "0") in {"1", "true", "on", "yes"}
-EMBEDDINGS_MODEL = os.getenv("EMBEDDINGS_MODEL", "text-embedding-3-large")
+RAG_EMB_FILE = os.getenv("RAG_EMB_FILE", (Path(RAG_DATA_DIR) / "rag_emb.npz").as_posix())
+RAG_EMB_DIM = int(os.getenv("RAG_EMB_DIM", "4096"))  # hashed n-gram buckets
+RAG_EMB_SVD = int(os.getenv("RAG_EMB_SVD", "0"))  # 0 = no SVD projection
+RAG_EMB_NLIST = int(os.getenv("RAG_EMB_NLIST", "0"))  # IVF lists built offline; 0 = exact search
+RAG_EMB_NPROBE = int(os.getenv("RAG_EMB_NPROBE", "8"))  # lists scanned per query
+
+RAG_CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", "1024"))  # entries per query-cache table; 0 = off
 
 Path(RAG_DATA_DIR).mkdir(parents=True, exist_ok=True)
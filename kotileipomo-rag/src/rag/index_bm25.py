@@ -1,58 +1,197 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
+from array import array
 from collections import Counter
-from dataclasses import dataclass
+from itertools import accumulate, chain
 from math import log
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
 from .tokenize import tokenize_list
-from .ingest import Doc
+from .ingest import Doc, doc_fingerprint
 
 
-@dataclass
-class BM25Doc:
-    id: str
-    toks: List[str]
-    length: int
-    meta: Dict[str, str]
-    text: str
+K1, B = 1.4, 0.75
 
 
 class BM25Index:
-    def __init__(self, docs: List[Doc]):
-        self.docs: List[BM25Doc] = []
-        self.df: Counter[str] = Counter()
-        for d in docs:
-            toks = tokenize_list(d.text)
-            dedup = set(toks)
-            self.docs.append(BM25Doc(d.id, toks, len(toks), d.meta, d.text))
-            for t in dedup:
-                self.df[t] += 1
-        self.N = len(self.docs)
-        self.avg_len = (sum(d.length for d in self.docs) / max(1, self.N)) if self.docs else 0.0
-
-    def _bm25(self, q: List[str], d: BM25Doc) -> float:
-        if not d.toks:
-            return 0.0
-        tf = Counter(d.toks)
-        k1, b = 1.4, 0.75
-        score = 0.0
-        for qt in q:
-            df = self.df.get(qt, 0)
-            if df == 0:
+    """BM25 over per-term postings.
+
+    Each posting stores the document's full term weight
+    ``idf * f*(k1+1) / (f + k1*(1-b+b*len/avg_len))``, so a query only sums
+    precomputed weights for the documents that contain one of its terms.
+    Search results reference the indexed ``Doc`` objects; callers must not
+    mutate them.
+
+    Postings are flat arrays so an index can be saved as-is and loaded from a
+    memory-mapped artifact (see ``index_store``). Within a term they are
+    grouped by document language (``langs``, from ``meta["lang"]``): term id
+    ``t`` and partition ``p`` own ``ptr[t*P+p]:ptr[t*P+p+1]`` of
+    ``post_docs``/``post_weights``, and all of a term's postings are the
+    contiguous ``ptr[t*P]:ptr[t*P+P]``. A language-restricted search reads
+    only its partition while idf and length normalisation stay corpus-wide,
+    so a doc scores the same with or without the restriction.
+
+    A forward index (``forward``: per-doc term ids and counts) is kept next to
+    the postings. Weights depend on corpus-wide idf and average length, so any
+    KB edit changes them all, but ``term_freqs`` lets a rebuild reuse the
+    counts of unchanged docs instead of re-tokenizing them.
+    """
+
+    def __init__(self, docs: Sequence[Doc], term_freqs: Optional[Sequence[Optional[Mapping[str, int]]]] = None):
+        """Index ``docs``. ``term_freqs`` may supply known per-doc term counts
+        (``None`` entries are tokenized), e.g. from ``term_freqs()`` of an older index."""
+        docs = list(docs)
+        tfs: List[Mapping[str, int]] = []
+        df: Counter[str] = Counter()
+        lengths = array("i")
+        for i, d in enumerate(docs):
+            tf = term_freqs[i] if term_freqs is not None else None
+            if tf is None:
+                tf = Counter(tokenize_list(d.text))
+            tfs.append(tf)
+            lengths.append(sum(tf.values()))
+            df.update(tf.keys())
+        n = len(docs)
+        avg_len = (sum(lengths) / max(1, n)) if n else 0.0
+
+        terms = sorted(df)
+        vocab = {t: i for i, t in enumerate(terms)}
+        langs = sorted({d.meta.get("lang") or "" for d in docs})
+        part = {lang: p for p, lang in enumerate(langs)}
+        P = len(langs) or 1
+        idf = [log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in terms]
+        slot_docs: List[List[int]] = [[] for _ in range(len(terms) * P)]
+        slot_weights: List[List[float]] = [[] for _ in range(len(terms) * P)]
+        avg = avg_len or 1
+        fwd_ptr, fwd_terms, fwd_tf = [0], [], []
+        for i, tf in enumerate(tfs):
+            norm = K1 * (1 - B + B * (lengths[i] / avg))
+            p = part[docs[i].meta.get("lang") or ""]
+            tids = [vocab[t] for t in tf]
+            for tid, f in zip(tids, tf.values()):
+                slot_docs[tid * P + p].append(i)
+                slot_weights[tid * P + p].append(idf[tid] * ((f * (K1 + 1)) / ((f + norm) or 1)))
+            fwd_terms += tids
+            fwd_tf += tf.values()
+            fwd_ptr.append(len(fwd_terms))
+
+        # Lists are flattened once; per-posting array appends dominate large builds otherwise
+        ptr = array("I", accumulate(map(len, slot_docs), initial=0))
+        post_docs = array("i", chain.from_iterable(slot_docs))
+        post_weights = array("d", chain.from_iterable(slot_weights))
+        term_max = array("d", (max(chain.from_iterable(slot_weights[t * P:t * P + P]), default=0.0)
+                               for t in range(len(terms))))
+        forward = (array("I", fwd_ptr), array("i", fwd_terms), array("i", fwd_tf))
+        self._init(docs, vocab, array("i", (df[t] for t in terms)), lengths, avg_len,
+                   ptr, post_docs, post_weights, langs, term_max, forward)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        docs: Sequence[Doc],
+        vocab: Dict[str, int],
+        df: Sequence[int],
+        lengths: Sequence[int],
+        avg_len: float,
+        ptr: Sequence[int],
+        post_docs: Sequence[int],
+        post_weights: Sequence[float],
+        langs: Sequence[str] = (),
+        term_max: Sequence[float] = (),
+        forward: Optional[Tuple[Sequence[int], Sequence[int], Sequence[int]]] = None,
+    ) -> "BM25Index":
+        """Wrap prebuilt arrays (e.g. memoryviews over a loaded artifact) without copying."""
+        obj = cls.__new__(cls)
+        obj._init(docs, vocab, df, lengths, avg_len, ptr, post_docs, post_weights, langs, term_max, forward)
+        return obj
+
+    def _init(self, docs, vocab, df, lengths, avg_len, ptr, post_docs, post_weights,
+              langs=(), term_max=(), forward=None) -> None:
+        self.docs: Sequence[Doc] = docs
+        self.vocab: Dict[str, int] = vocab
+        self.df: Sequence[int] = df  # by term id
+        self.lengths: Sequence[int] = lengths
+        self.N = len(lengths)
+        self.avg_len = float(avg_len)
+        self.ptr: Sequence[int] = ptr
+        self.post_docs: Sequence[int] = post_docs
+        self.post_weights: Sequence[float] = post_weights
+        self.langs: List[str] = list(langs) or [""]  # posting partitions, see class docstring
+        self.term_max: Sequence[float] = term_max  # highest posting weight per term id
+        # (fwd_ptr, fwd_terms, fwd_tf): doc i owns fwd_terms/fwd_tf[fwd_ptr[i]:fwd_ptr[i+1]]
+        self.forward: Optional[Tuple[Sequence[int], Sequence[int], Sequence[int]]] = forward
+        self._part = {lang: p for p, lang in enumerate(self.langs)}
+        self._terms: Optional[List[str]] = None
+        self._version: Optional[str] = None
+        self.fingerprints: Any = None  # per-doc ingest fingerprints, set by index_store.load_index
+        self.backing: Any = None  # keeps a memory map alive for loaded indexes
+
+    def doc_freq(self, term: str) -> int:
+        tid = self.vocab.get(term)
+        return 0 if tid is None else int(self.df[tid])
+
+    @property
+    def version(self) -> str:
+        """Content hash of the indexed docs: equal versions index identical docs."""
+        if self._version is None:
+            fps = self.fingerprints
+            raw = bytes(fps) if fps is not None else b"".join(doc_fingerprint(d) for d in self.docs)
+            h = hashlib.blake2b(raw, digest_size=16)
+            # Fingerprints leave ids out, but hits carry them
+            h.update("\n".join(d.id for d in self.docs).encode("utf-8"))
+            self._version = h.hexdigest()
+        return self._version
+
+    def term_freqs(self, i: int) -> Dict[str, int]:
+        """Term counts of doc ``i`` as indexed, without re-tokenizing it."""
+        if self.forward is None:
+            raise ValueError("index has no forward index")
+        if self._terms is None:
+            self._terms = sorted(self.vocab, key=self.vocab.__getitem__)
+        fwd_ptr, fwd_terms, fwd_tf = self.forward
+        lo, hi = fwd_ptr[i], fwd_ptr[i + 1]
+        terms = self._terms
+        return {terms[t]: f for t, f in zip(fwd_terms[lo:hi], fwd_tf[lo:hi])}
+
+    def has_lang(self, lang: Optional[str]) -> bool:
+        return lang is not None and lang in self._part
+
+    def max_score(self, query: str) -> float:
+        """Upper bound on any document's score for ``query`` (sum of per-term maxima)."""
+        tids = [self.vocab.get(qt) for qt in tokenize_list(query)]
+        return sum(self.term_max[t] for t in tids if t is not None)
+
+    def score(self, query: str, lang: Optional[str] = None) -> Dict[int, float]:
+        """Scores of every document sharing a term with the query, by doc index.
+
+        With ``lang`` only that language's documents are scored (none if the
+        index has no such partition).
+        """
+        scores: Dict[int, float] = {}
+        get = scores.get
+        ptr, post_docs, post_weights = self.ptr, self.post_docs, self.post_weights
+        P = len(self.langs)
+        if lang is None:
+            lo, hi = 0, P
+        elif lang in self._part:
+            lo = self._part[lang]
+            hi = lo + 1
+        else:
+            return scores
+        # Repeated query tokens count once per occurrence, as in classic BM25 over the token list
+        for qt in tokenize_list(query):
+            tid = self.vocab.get(qt)
+            if tid is None:
                 continue
-            idf = log(1 + (self.N - df + 0.5) / (df + 0.5))
-            f = tf.get(qt, 0)
-            denom = f + k1 * (1 - b + b * (d.length / (self.avg_len or 1)))
-            score += idf * ((f * (k1 + 1)) / (denom or 1))
-        return score
-
-    def search(self, query: str, top_k: int = 20) -> List[Tuple[float, Doc]]:
-        q = tokenize_list(query)
-        scored: List[Tuple[float, Doc]] = []
-        for d in self.docs:
-            s = self._bm25(q, d)
-            if s > 0:
-                scored.append((s, Doc(id=d.id, text=d.text, meta=d.meta)))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return scored[:top_k]
+            start, end = ptr[tid * P + lo], ptr[tid * P + hi]
+            for i, w in zip(post_docs[start:end], post_weights[start:end]):
+                scores[i] = get(i, 0.0) + w
+        return scores
+
+    def search(self, query: str, top_k: int = 20, lang: Optional[str] = None) -> List[Tuple[float, Doc]]:
+        scores = self.score(query, lang)
+        # Ties keep corpus order
+        best = heapq.nsmallest(top_k, ((-s, i) for i, s in scores.items() if s > 0))
+        return [(-neg, self.docs[i]) for neg, i in best]
@@ -1,20 +1,249 @@
+"""Local dense retrieval over hashed character n-grams (CPU only, no network).
+
+Each word is padded with spaces and cut into 3..5-character n-grams, which are
+hashed into ``dim`` buckets and weighted with sublinear TF-IDF. Inflected
+Finnish forms share most of their n-grams ("pakkauksia", "pakkauksistanne"),
+so they match without the suffix stemmer used by BM25. An optional truncated
+SVD projects the vectors down to ``svd_dim`` dimensions.
+
+Vectors are L2-normalised float32 rows; exact search is one matrix-vector
+product and an ``argpartition`` top-k. For larger corpora ``nlist`` > 0 adds an
+IVF layer: spherical k-means splits the rows into ``nlist`` inverted lists and
+a query only scores the rows of its ``nprobe`` nearest centroids. Raising
+``nprobe`` trades latency for recall (``nprobe >= nlist`` is exact).
+
+numpy is optional for the backend: without it the index stays
+``ready=False`` and BM25 carries the load.
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Tuple
+import json
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from .config import RAG_EMB_DIM, RAG_EMB_FILE, RAG_EMB_NLIST, RAG_EMB_NPROBE, RAG_EMB_SVD
+from .index_store import IndexArtifactError, kb_source_digest
 from .ingest import Doc
+from .tokenize import STOPWORDS, normalize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - backend deploys without numpy
+    np = None  # type: ignore[assignment]
+
+
+# Bump whenever the n-gram features or weighting change meaning
+EMB_FORMAT_VERSION = 1
+NGRAM_RANGE = (3, 5)
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE) -> List[str]:
+    lo, hi = ngram_range
+    grams: List[str] = []
+    for tok in normalize(text).split():
+        if tok in STOPWORDS:
+            continue
+        w = f" {tok} "
+        for n in range(lo, hi + 1):
+            grams.extend(w[i:i + n] for i in range(len(w) - n + 1))
+    return grams
+
+
+def _bucket(gram: str, dim: int) -> int:
+    # crc32 rather than hash(): buckets must be stable across processes
+    return zlib.crc32(gram.encode("utf-8")) % dim
 
 
 @dataclass
 class EmbIndex:
     ready: bool = False
+    dim: int = RAG_EMB_DIM
+    svd_dim: int = RAG_EMB_SVD
+    docs: Sequence[Doc] = field(default_factory=list, repr=False)
+    idf: Any = field(default=None, repr=False)  # (dim,) float32
+    projection: Any = field(default=None, repr=False)  # (dim, k) float32 or None
+    # (N, k) float32, rows L2-normalised; with IVF lists the rows are stored grouped
+    # by list and list_rows maps each stored row back to its doc index
+    vectors: Any = field(default=None, repr=False)
+    nlist: int = RAG_EMB_NLIST  # 0 = exact search only
+    nprobe: int = RAG_EMB_NPROBE
+    centroids: Any = field(default=None, repr=False)  # (nlist, k) float32, rows L2-normalised
+    list_ptr: Any = field(default=None, repr=False)  # (nlist+1,) int64, list c is rows ptr[c]:ptr[c+1]
+    list_rows: Any = field(default=None, repr=False)  # (N,) int32 doc index per stored row
+    _lang_masks: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def _counts(self, texts: Sequence[str]):
+        m = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram in char_ngrams(text):
+                m[row, _bucket(gram, self.dim)] += 1.0
+        return m
+
+    def _embed(self, counts):
+        x = np.log1p(counts, out=counts)  # sublinear tf
+        x *= self.idf
+        if self.projection is not None:
+            x = x @ self.projection
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (x / norms).astype(np.float32, copy=False)
 
     def build(self, docs: List[Doc]):
-        # Placeholder: wire a multilingual embeddings model here
-        self.ready = False
+        self.docs = list(docs)
+        if np is None or not self.docs:
+            self.ready = False
+            return
+        counts = self._counts([d.text for d in self.docs])
+        df = np.count_nonzero(counts, axis=0).astype(np.float32)
+        n = len(self.docs)
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        self.projection = None
+        if self.svd_dim and self.svd_dim < min(n, self.dim):
+            weighted = np.log1p(counts) * self.idf
+            # Rows of vt span the document space; keep the strongest directions
+            _, _, vt = np.linalg.svd(weighted, full_matrices=False)
+            self.projection = np.ascontiguousarray(vt[: self.svd_dim].T, dtype=np.float32)
+        self.vectors = self._embed(counts)
+        self.centroids = self.list_ptr = self.list_rows = None
+        if self.nlist:
+            self.build_ivf(self.nlist)
+        self.ready = True
+
+    def build_ivf(self, nlist: int, iters: int = 10, seed: int = 0) -> None:
+        """Cluster the rows into ``nlist`` inverted lists (spherical k-means)."""
+        vecs = self.doc_vectors()
+        n = len(vecs)
+        self.vectors, self.centroids, self.list_ptr, self.list_rows = vecs, None, None, None
+        if nlist <= 1 or nlist >= n:
+            return
+        rng = np.random.default_rng(seed)
+        cent = vecs[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(vecs @ cent.T, axis=1)
+            sums = np.zeros_like(cent)
+            np.add.at(sums, assign, vecs)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty lists from random rows so every list stays usable
+            sums[empty] = vecs[rng.choice(n, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            cent = (sums / norms).astype(np.float32)
+        assign = np.argmax(vecs @ cent.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        # Contiguous lists: probing scores slices of vectors instead of gathering rows
+        self.vectors = np.ascontiguousarray(vecs[order])
+        self.centroids = cent
+        self.list_rows = order.astype(np.int32)
+        self.list_ptr = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=nlist)))).astype(np.int64)
+        self.nlist = nlist
+
+    def doc_vectors(self):
+        """Vectors in doc order."""
+        if self.list_rows is None:
+            return self.vectors
+        out = np.empty_like(self.vectors)
+        out[self.list_rows] = self.vectors
+        return out
+
+    def _lang_mask(self, lang: str):
+        """Boolean mask over doc indexes whose ``meta["lang"]`` is ``lang``."""
+        mask = self._lang_masks.get(lang)
+        if mask is None:
+            mask = self._lang_masks[lang] = np.array([d.meta.get("lang") == lang for d in self.docs], dtype=bool)
+        return mask
+
+    def search(self, query: str, top_k: int = 20, nprobe: Optional[int] = None,
+               lang: Optional[str] = None) -> List[Tuple[float, Doc]]:
+        """Top ``top_k`` docs by cosine; ``lang`` keeps only docs in that language."""
+        if not self.ready or top_k <= 0:
+            return []
+        q = self._embed(self._counts([query]))[0]
+        if not q.any():
+            return []
+        nprobe = max(1, nprobe or self.nprobe)
+        if self.centroids is None or nprobe >= len(self.centroids):
+            sims = self.vectors @ q
+            rows = self.list_rows if self.list_rows is not None else np.arange(len(sims))
+        else:
+            probe = np.sort(np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe])
+            ptr = self.list_ptr
+            sims = np.concatenate([self.vectors[ptr[c]:ptr[c + 1]] @ q for c in probe])
+            rows = np.concatenate([self.list_rows[ptr[c]:ptr[c + 1]] for c in probe])
+        if lang is not None:
+            keep = self._lang_mask(lang)[rows]
+            sims, rows = sims[keep], rows[keep]
+        k = min(top_k, len(sims))
+        if k == 0:
+            return []
+        idx = np.argpartition(-sims, k - 1)[:k]
+        # Ties keep corpus order, as in BM25Index.search
+        idx = idx[np.lexsort((rows[idx], -sims[idx]))]
+        return [(float(sims[i]), self.docs[rows[i]]) for i in idx if sims[i] > 0]
+
+    def save(self, path: Optional[str] = None, source_digest: Optional[str] = None) -> Path:
+        out = Path(path or RAG_EMB_FILE)
+        meta = {
+            "format": EMB_FORMAT_VERSION,
+            "dim": self.dim,
+            "svd_dim": 0 if self.projection is None else int(self.projection.shape[1]),
+            "ngram_range": list(NGRAM_RANGE),
+            "N": len(self.docs),
+            "nlist": 0 if self.centroids is None else len(self.centroids),
+            "source_digest": source_digest,
+        }
+        arrays: Dict[str, Any] = {"meta": np.array(json.dumps(meta)), "idf": self.idf, "vectors": self.vectors}
+        if self.projection is not None:
+            arrays["projection"] = self.projection
+        if self.centroids is not None:
+            arrays.update(centroids=self.centroids, list_ptr=self.list_ptr, list_rows=self.list_rows)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(out.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        tmp.replace(out)
+        return out
+
+    @classmethod
+    def load(cls, docs: Sequence[Doc], path: Optional[str] = None,
+             expect_digest: Optional[str] = None) -> "EmbIndex":
+        """Load vectors saved for ``docs`` (same order, e.g. the BM25 artifact's docs).
+
+        The IVF lists are taken from the file; ``nprobe`` stays a runtime setting.
+        """
+        if np is None:
+            raise IndexArtifactError("numpy not installed")
+        p = Path(path or RAG_EMB_FILE)
+        try:
+            with np.load(p, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                arrays = {k: z[k] for k in z.files if k != "meta"}
+        except FileNotFoundError:
+            raise IndexArtifactError(f"{p} not found")
+        except (OSError, ValueError, KeyError) as e:
+            raise IndexArtifactError(f"{p}: {e}")
+        if meta.get("format") != EMB_FORMAT_VERSION or meta.get("ngram_range") != list(NGRAM_RANGE):
+            raise IndexArtifactError(f"embeddings format {meta.get('format')}, expected {EMB_FORMAT_VERSION}")
+        if expect_digest is not None and meta.get("source_digest") != expect_digest:
+            raise IndexArtifactError("knowledge base changed since the embeddings were built")
+        if meta.get("N") != len(docs) or arrays["vectors"].shape[0] != len(docs):
+            raise IndexArtifactError("embeddings do not match the document set")
+        return cls(ready=True, dim=meta["dim"], svd_dim=meta["svd_dim"], docs=docs, idf=arrays["idf"],
+                   projection=arrays.get("projection"), vectors=arrays["vectors"],
+                   nlist=meta.get("nlist", 0), centroids=arrays.get("centroids"),
+                   list_ptr=arrays.get("list_ptr"), list_rows=arrays.get("list_rows"))
+
 
-    def search(self, query: str, top_k: int = 20) -> List[Tuple[float, Doc]]:
-        # Not available; return empty set to let BM25 carry the load
-        return []
+def load_or_build_emb(docs: Sequence[Doc], path: Optional[str] = None,
+                      kb_root: Optional[str] = None) -> Tuple[EmbIndex, Optional[str]]:
+    """Saved embeddings when current, else an in-memory build (unready without numpy).
 
+    Returns the index and, when the saved file could not be used, the reason.
+    """
+    try:
+        return EmbIndex.load(docs, path, expect_digest=kb_source_digest(kb_root)), None
+    except IndexArtifactError as e:
+        emb = EmbIndex()
+        emb.build(list(docs))
+        return emb, str(e)
@@ -0,0 +1,329 @@
+"""Binary BM25 index artifact written by scripts/build_index.py.
+
+Layout (native byte order, recorded in the header):
+
+    b"KLRAGIDX" | u32 format | u32 header length | header JSON | sections
+
+Every section starts on an 8-byte boundary and is described in the header as
+``name: [offset, nbytes, typecode]``. Numeric sections are read through
+memoryviews over an mmap, so loading copies nothing but the vocabulary.
+
+    docs        q   N+1 offsets into doc_blob
+    doc_blob    B   one JSON record {"id", "text", "meta"} per doc
+    vocab_blob  B   terms sorted, newline separated (tokens never contain one)
+    df          i   document frequency per term id
+    lengths     i   token count per doc
+    ptr         I   (term id, language partition) -> start of its postings (V*P+1 entries)
+    post_docs   i   doc index per posting
+    post_weights d  precomputed BM25 weight per posting
+    term_max    d   highest posting weight per term id
+    fwd_ptr     I   doc index -> start of its forward entries (N+1 entries)
+    fwd_terms   i   term id per forward entry
+    fwd_tf      i   term count per forward entry
+    doc_fp      B   16-byte ingest fingerprint per doc (see ingest.doc_fingerprint)
+
+``update_index`` rewrites the artifact after a KB edit: docs whose text and
+meta are unchanged keep their forward entries, even if an insert or delete
+renumbered their ids, so only added or changed docs are tokenized again. That
+is all it saves: postings and weights are still rebuilt in full from the
+counts (idf and average length are corpus-wide), and the file is replaced
+atomically.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import RAG_INDEX_FILE, RAG_KB_DIR
+from .index_bm25 import B, K1, BM25Index
+from .ingest import FINGERPRINT_SIZE, Doc, chunk_docs, doc_fingerprint, iter_chunks, iter_kb_docs, load_kb_docs
+
+
+MAGIC = b"KLRAGIDX"
+# Bump whenever tokenization, chunking, the stored weights or fingerprints change meaning
+FORMAT_VERSION = 4
+_PREFIX = struct.Struct("<8sII")
+
+
+class IndexArtifactError(Exception):
+    """The artifact is missing, corrupt, from another format version or stale."""
+
+
+def kb_source_digest(kb_root: Optional[str] = None) -> str:
+    """Hash of every file load_kb_docs() reads, to detect artifacts built from an older KB."""
+    root = Path(kb_root or RAG_KB_DIR)
+    h = hashlib.sha256()
+    for f in [root / "faq.json", *sorted((root / "deprecated").glob("*.json"))]:
+        try:
+            data = f.read_bytes()
+        except OSError:
+            continue
+        h.update(f.relative_to(root).as_posix().encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+
+def _fingerprints(index: BM25Index) -> List[bytes]:
+    fp = index.fingerprints
+    if fp is None:
+        return [doc_fingerprint(d) for d in index.docs]
+    return [bytes(fp[i:i + FINGERPRINT_SIZE]) for i in range(0, len(fp), FINGERPRINT_SIZE)]
+
+
+def _align(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def save_index(index: BM25Index, path: Optional[str] = None, source_digest: Optional[str] = None) -> Path:
+    """Write ``index`` atomically; returns the artifact path."""
+    out = Path(path or RAG_INDEX_FILE)
+    offsets = array("q", [0])
+    doc_blob = bytearray()
+    for d in index.docs:
+        doc_blob += json.dumps({"id": d.id, "text": d.text, "meta": d.meta}, ensure_ascii=False).encode("utf-8")
+        offsets.append(len(doc_blob))
+    terms = sorted(index.vocab, key=index.vocab.__getitem__)
+    if index.forward is None:
+        raise ValueError("index has no forward index")
+    fwd_ptr, fwd_terms, fwd_tf = index.forward
+    sections: List[Tuple[str, bytes, str]] = [
+        ("docs", offsets.tobytes(), "q"),
+        ("doc_blob", bytes(doc_blob), "B"),
+        ("vocab_blob", "\n".join(terms).encode("utf-8"), "B"),
+        ("df", array("i", index.df).tobytes(), "i"),
+        ("lengths", array("i", index.lengths).tobytes(), "i"),
+        ("ptr", array("I", index.ptr).tobytes(), "I"),
+        ("post_docs", array("i", index.post_docs).tobytes(), "i"),
+        ("post_weights", array("d", index.post_weights).tobytes(), "d"),
+        ("term_max", array("d", index.term_max).tobytes(), "d"),
+        ("fwd_ptr", array("I", fwd_ptr).tobytes(), "I"),
+        ("fwd_terms", array("i", fwd_terms).tobytes(), "i"),
+        ("fwd_tf", array("i", fwd_tf).tobytes(), "i"),
+        ("doc_fp", b"".join(_fingerprints(index)), "B"),
+    ]
+    header: Dict[str, Any] = {
+        "kind": "bm25",
+        "format": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "k1": K1,
+        "b": B,
+        "N": index.N,
+        "avg_len": index.avg_len,
+        "vocab_size": len(terms),
+        "langs": index.langs,
+        "postings": len(index.post_docs),
+        "source_digest": source_digest,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sections": {},
+    }
+    # Section offsets depend on the header length, which depends on the offsets: size with placeholders first
+    header["sections"] = {name: [0, len(data), tc] for name, data, tc in sections}
+    base = _PREFIX.size + len(json.dumps(header).encode("utf-8")) + 64 * len(sections)
+    base += -base % 8
+    pos = base
+    for name, data, tc in sections:
+        header["sections"][name] = [pos, len(data), tc]
+        pos += len(data) + (-len(data) % 8)
+    header_raw = json.dumps(header).encode("utf-8")
+    header_raw += b" " * (base - _PREFIX.size - len(header_raw))
+
+    buf = bytearray(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_raw)))
+    buf += header_raw
+    for name, data, _ in sections:
+        assert len(buf) == header["sections"][name][0]
+        buf += data
+        _align(buf)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_bytes(bytes(buf))
+    os.replace(tmp, out)
+    return out
+
+
+class _DocTable(Sequence):
+    """Docs decoded from the mapped blob on first access."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview) -> None:
+        self._offsets = offsets
+        self._blob = blob
+        self._cache: List[Optional[Doc]] = [None] * (len(offsets) - 1)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        d = self._cache[i]
+        if d is None:
+            if i < 0:
+                i += len(self)
+            rec = json.loads(bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]))
+            d = self._cache[i] = Doc(id=rec["id"], text=rec["text"], meta=rec["meta"])
+        return d
+
+
+def read_header(path: Optional[str] = None) -> Dict[str, Any]:
+    with open(path or RAG_INDEX_FILE, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise IndexArtifactError("truncated header")
+        magic, fmt, hlen = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise IndexArtifactError("not a RAG index artifact")
+        if fmt != FORMAT_VERSION:
+            raise IndexArtifactError(f"format {fmt}, expected {FORMAT_VERSION}")
+        return json.loads(f.read(hlen))
+
+
+def load_index(path: Optional[str] = None, expect_digest: Optional[str] = None) -> BM25Index:
+    """Memory-map an artifact. ``expect_digest`` rejects one built from a different KB."""
+    p = Path(path or RAG_INDEX_FILE)
+    try:
+        header = read_header(str(p))
+    except FileNotFoundError:
+        raise IndexArtifactError(f"{p} not found")
+    except (OSError, ValueError) as e:
+        raise IndexArtifactError(f"{p}: {e}")
+    if header.get("byteorder") != sys.byteorder:
+        raise IndexArtifactError(f"built for {header.get('byteorder')}-endian")
+    if header.get("k1") != K1 or header.get("b") != B:
+        raise IndexArtifactError("built with different BM25 parameters")
+    if expect_digest is not None and header.get("source_digest") != expect_digest:
+        raise IndexArtifactError("knowledge base changed since the artifact was built")
+
+    with open(p, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    sec: Dict[str, memoryview] = {}
+    try:
+        for name, (off, nbytes, tc) in header["sections"].items():
+            if off + nbytes > len(mm):
+                raise IndexArtifactError(f"section {name} out of bounds")
+            part = view[off:off + nbytes]
+            sec[name] = part if tc == "B" else part.cast(tc)
+        terms = bytes(sec["vocab_blob"]).decode("utf-8").split("\n") if header["vocab_size"] else []
+    except (KeyError, TypeError, ValueError) as e:
+        raise IndexArtifactError(f"{p}: malformed sections ({e})")
+    langs = header.get("langs") or [""]
+    if (len(terms) != header["vocab_size"] or len(sec["ptr"]) != len(terms) * len(langs) + 1
+            or len(sec["term_max"]) != len(terms)):
+        raise IndexArtifactError("vocabulary does not match postings")
+    if len(sec["fwd_ptr"]) != header["N"] + 1 or len(sec["doc_fp"]) != header["N"] * FINGERPRINT_SIZE:
+        raise IndexArtifactError("forward index does not match the documents")
+    index = BM25Index.from_arrays(
+        _DocTable(sec["docs"], sec["doc_blob"]),
+        {t: i for i, t in enumerate(terms)},
+        sec["df"],
+        sec["lengths"],
+        header["avg_len"],
+        sec["ptr"],
+        sec["post_docs"],
+        sec["post_weights"],
+        langs,
+        sec["term_max"],
+        (sec["fwd_ptr"], sec["fwd_terms"], sec["fwd_tf"]),
+    )
+    index.fingerprints = sec["doc_fp"]
+    index.backing = mm
+    return index
+
+
+def build_index(kb_root: Optional[str] = None) -> BM25Index:
+    return BM25Index(chunk_docs(load_kb_docs(kb_root)))
+
+
+def load_or_build(path: Optional[str] = None, kb_root: Optional[str] = None) -> Tuple[BM25Index, Optional[str]]:
+    """The artifact when it is current, else an in-memory build.
+
+    Returns the index and, when the artifact could not be used, the reason.
+    """
+    try:
+        return load_index(path, expect_digest=kb_source_digest(kb_root)), None
+    except IndexArtifactError as e:
+        return build_index(kb_root), str(e)
+
+
+@dataclass
+class IndexDelta:
+    """What an update did, in docs (chunks)."""
+
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+
+def reindex(old: Optional[BM25Index], docs: Iterable[Doc]) -> Tuple[BM25Index, IndexDelta]:
+    """Index ``docs``, tokenizing only those whose fingerprint ``old`` does not have.
+
+    Term counts are reused by content, whatever id the doc has now; the postings
+    are built from scratch either way.
+    """
+    known: Dict[bytes, List[int]] = {}
+    if old is not None and old.forward is not None:
+        for i, fp in enumerate(_fingerprints(old)):
+            known.setdefault(fp, []).append(i)
+    delta = IndexDelta()
+    kept: List[Doc] = []
+    tfs: List[Optional[Dict[str, int]]] = []
+    fps: List[bytes] = []
+    fresh_ids = set()
+    for d in docs:
+        fp = doc_fingerprint(d)
+        same = known.get(fp)
+        i = same.pop(0) if same else None
+        if i is None:
+            tfs.append(None)
+            fresh_ids.add(d.id)
+        else:
+            tfs.append(old.term_freqs(i))
+            delta.unchanged += 1
+        kept.append(d)
+        fps.append(fp)
+    # Whatever is left in ``known`` was removed or replaced by a doc with the same id
+    gone_ids = {old.docs[i].id for same in known.values() for i in same}
+    delta.changed = len(fresh_ids & gone_ids)
+    delta.added = len(fresh_ids) - delta.changed
+    delta.removed = len(gone_ids) - delta.changed
+    index = BM25Index(kept, term_freqs=tfs)
+    index.fingerprints = b"".join(fps)
+    return index, delta
+
+
+def update_index(path: Optional[str] = None, kb_root: Optional[str] = None,
+                 full: bool = False) -> Tuple[BM25Index, IndexDelta]:
+    """Bring the artifact at ``path`` up to date with the KB and return it.
+
+    An artifact that is missing, unreadable or from another format version
+    (or ``full=True``) is rebuilt from scratch; otherwise unchanged docs are
+    carried over from it. The returned index is the artifact itself when the
+    KB has not changed, else the in-memory index that was just written.
+    """
+    out = Path(path or RAG_INDEX_FILE)
+    digest = kb_source_digest(kb_root)
+    old: Optional[BM25Index] = None
+    if not full:
+        try:
+            old = load_index(str(out))
+        except IndexArtifactError:
+            old = None
+    if old is not None and read_header(str(out)).get("source_digest") == digest:
+        return old, IndexDelta(unchanged=old.N)
+    index, delta = reindex(old, iter_chunks(iter_kb_docs(kb_root)))
+    save_index(index, str(out), source_digest=digest)
+    return index, delta
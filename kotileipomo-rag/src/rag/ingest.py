@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from .config import RAG_KB_DIR
 from .tokenize import normalize
@@ -23,10 +24,22 @@ def _read_json(path: Path):
         return None
 
 
-def load_kb_docs(kb_root: Optional[str] = None) -> List[Doc]:
-    """Flatten multilingual FAQ and deprecated Q&A into docs."""
+FINGERPRINT_SIZE = 16
+
+
+def doc_fingerprint(d: Doc) -> bytes:
+    """Digest of a doc's text and meta; equal fingerprints mean nothing to re-tokenize.
+
+    The id is left out: FAQ ids are positional (``faq:{i}:{lang}``), so a doc
+    that only moved after an insert or delete keeps its fingerprint.
+    """
+    raw = json.dumps([d.text, d.meta], ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=FINGERPRINT_SIZE).digest()
+
+
+def iter_kb_docs(kb_root: Optional[str] = None) -> Iterator[Doc]:
+    """Flatten multilingual FAQ and deprecated Q&A into docs, one source row at a time."""
     root = Path(kb_root or RAG_KB_DIR)
-    docs: List[Doc] = []
 
     # FAQ: multilingual q/a
     faq = _read_json(root / "faq.json") or []
@@ -41,11 +54,11 @@ def load_kb_docs(kb_root: Optional[str] = None) -> List[Doc]:
                 if not ql or not al:
                     continue
                 text = f"Q: {ql}\nA: {al}"
-                docs.append(Doc(
+                yield Doc(
                     id=f"faq:{i}:{lang}",
                     text=text,
                     meta={"source":"faq.json","lang":lang,"section":"faq","tags":" ".join(tags)}
-                ))
+                )
 
     # Deprecated Q&A style files
     dep_dir = root / "deprecated"
@@ -58,35 +71,40 @@ def load_kb_docs(kb_root: Optional[str] = None) -> List[Doc]:
             a = (row.get("answer") or "").strip()
             if not q or not a:
                 continue
-            docs.append(Doc(
+            yield Doc(
                 id=f"deprecated:{f.name}:{i}",
                 text=f"Q: {q}\nA: {a}",
                 meta={"source":f"deprecated/{f.name}","lang":"en","section":"deprecated"}
-            ))
+            )
+
 
-    return docs
+def load_kb_docs(kb_root: Optional[str] = None) -> List[Doc]:
+    """Flatten multilingual FAQ and deprecated Q&A into docs."""
+    return list(iter_kb_docs(kb_root))
 
 
-def chunk_docs(docs: List[Doc], max_chars: int = 1600, overlap: int = 160) -> List[Doc]:
-    out: List[Doc] = []
+def iter_chunks(docs: Iterable[Doc], max_chars: int = 1600, overlap: int = 160) -> Iterator[Doc]:
     for d in docs:
         t = d.text
         if len(t) <= max_chars:
-            out.append(d)
+            yield d
             continue
         start = 0
         idx = 0
         while start < len(t):
             end = min(len(t), start + max_chars)
             chunk = t[start:end]
-            out.append(Doc(
+            yield Doc(
                 id=f"{d.id}#c{idx}",
                 text=chunk,
                 meta={**d.meta, "parent": d.id}
-            ))
+            )
             if end == len(t):
                 break
             start = end - overlap
             idx += 1
-    return out
+
+
+def chunk_docs(docs: Iterable[Doc], max_chars: int = 1600, overlap: int = 160) -> List[Doc]:
+    return list(iter_chunks(docs, max_chars, overlap))
 
@@ -1,38 +1,80 @@
 from __future__ import annotations
 
-from typing import List, Tuple
-from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Hashable, List, Tuple
 
 from .ingest import Doc
 from .index_bm25 import BM25Index
 from .index_embeddings import EmbIndex
+from .tokenize import tokenize_list
+
+
+_DocPrior = Tuple[str, float, FrozenSet[str]]  # lang, static bonus, tag/id tokens
 
 
 class Retriever:
+    """BM25 and dense hits fused by reciprocal rank, then nudged by per-doc priors.
+
+    Both lists are searched within the query language's partition first. When
+    the best same-language BM25 score is below ``lang_min_strength`` of the
+    query's upper bound (``BM25Index.max_score``) the language has no good
+    answer, and both lists are searched across all languages instead.
+
+    Raw BM25 and cosine scores are not comparable, so each list contributes
+    ``1 / (rrf_k + rank)`` per doc. The language, FAQ and tag bonuses are
+    fractions of a rank-1 contribution; doc languages, the FAQ bonus and tag
+    token sets are computed once per indexed doc.
+    """
+
+    lang_min_strength = 0.3
+    rrf_k = 60
+    lang_bonus = 0.1
+    faq_bonus = 0.05
+    tag_bonus = 0.1  # scaled by the share of query tokens found in the doc's tags/id
+
     def __init__(self, bm25: BM25Index, emb: EmbIndex | None = None):
         self.bm25 = bm25
         self.emb = emb or EmbIndex()
+        self._priors: Dict[str, _DocPrior] = {d.id: self._doc_prior(d) for d in bm25.docs}
 
-    def retrieve(self, query: str, lang: str, top_k: int = 8) -> List[Tuple[float, Doc]]:
-        # Hybrid union then simple re-rank by normalized similarity to metadata hints
-        bm = self.bm25.search(query, top_k=20)
-        ve = self.emb.search(query, top_k=20) if getattr(self.emb, "ready", False) else []
-        pool = {d.id: (s, d) for s, d in bm}
-        for s, d in ve:
-            pool[d.id] = max(pool.get(d.id, (s, d)), (s, d))
-        scored = list(pool.values())
-        # Light language preference and fuzzy tie-break
-        qn = query.lower()
-        rescored: List[Tuple[float, Doc]] = []
-        for s, d in scored:
-            bonus = 0.0
-            if d.meta.get("lang") == lang:
-                bonus += 0.1
-            # prefer FAQ first
-            if d.meta.get("source") == "faq.json":
-                bonus += 0.05
-            sim = SequenceMatcher(None, (d.meta.get("tags") or "") + d.id, qn).ratio()
-            rescored.append((s + bonus + 0.1 * sim, d))
-        rescored.sort(key=lambda x: x[0], reverse=True)
-        return rescored[:top_k]
+    @property
+    def index_version(self) -> Hashable:
+        """Changes whenever ``retrieve`` could return something else for the same query."""
+        emb = self.emb
+        if not getattr(emb, "ready", False):
+            return self.bm25.version, None
+        nlist = 0 if getattr(emb, "centroids", None) is None else len(emb.centroids)
+        return self.bm25.version, (len(emb.docs), emb.dim, emb.svd_dim, nlist, emb.nprobe)
 
+    def _doc_prior(self, d: Doc) -> _DocPrior:
+        static = self.faq_bonus if d.meta.get("source") == "faq.json" else 0.0
+        tags = frozenset(tokenize_list(f"{d.meta.get('tags') or ''} {d.id.replace(':', ' ')}"))
+        return d.meta.get("lang") or "", static, tags
+
+    def retrieve(self, query: str, lang: str, top_k: int = 8) -> List[Tuple[float, Doc]]:
+        part = lang if self.bm25.has_lang(lang) else None
+        bm = self.bm25.search(query, top_k=20, lang=part)
+        if part is not None and (not bm or bm[0][0] < self.lang_min_strength * self.bm25.max_score(query)):
+            part = None
+            bm = self.bm25.search(query, top_k=20)
+        ve = self.emb.search(query, top_k=20, lang=part) if getattr(self.emb, "ready", False) else []
+        # id -> [fused score, doc]; dict order (BM25 first) breaks exact ties
+        fused: Dict[str, list] = {}
+        for hits in (bm, ve):
+            for rank, (_, d) in enumerate(hits, 1):
+                entry = fused.setdefault(d.id, [0.0, d])
+                entry[0] += 1.0 / (self.rrf_k + rank)
+        qtoks = set(tokenize_list(query))
+        unit = 1.0 / (self.rrf_k + 1)
+        for entry in fused.values():
+            d = entry[1]
+            prior = self._priors.get(d.id)
+            if prior is None:
+                prior = self._priors[d.id] = self._doc_prior(d)
+            doc_lang, bonus, tags = prior
+            if doc_lang == lang:
+                bonus += self.lang_bonus
+            if qtoks and tags:
+                bonus += self.tag_bonus * len(qtoks & tags) / len(qtoks)
+            entry[0] += unit * bonus
+        ranked = sorted(fused.values(), key=lambda e: e[0], reverse=True)
+        return [(s, d) for s, d in ranked[:top_k]]
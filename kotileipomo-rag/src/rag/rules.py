@@ -0,0 +1,148 @@
+"""Canned-answer rules compiled into a single-pass substring matcher.
+
+A :class:`Rule` fires when every trigger group in ``all_of`` has at least one
+needle occurring as a substring of the normalized query, no ``none_of``
+needle occurs, the query language is in ``langs`` (if set) and the optional
+``guard`` accepts the :class:`Query`. Rules are ordered: the first rule that
+fires answers.
+
+:class:`RuleSet` collects every needle of every rule into one Aho-Corasick
+automaton, so a query is scanned once no matter how many rules exist, and
+only rules whose trigger groups all fired are looked at afterwards.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+from .tokenize import normalize
+
+
+Needles = Tuple[str, ...]
+Reply = Union[Mapping[str, str], Callable[[str], str]]
+
+
+@dataclass(frozen=True)
+class Query:
+    """What guards see: the normalized text, its words, the lowercased raw query and the fired needles."""
+
+    text: str
+    raw: str
+    words: Tuple[str, ...]
+    lang: str
+    found: FrozenSet[str]
+
+    def has(self, needles: Iterable[str]) -> bool:
+        return any(n in self.found for n in needles)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    all_of: Tuple[Needles, ...]
+    reply: Reply  # per-language texts, or a callable taking the language
+    none_of: Needles = ()
+    guard: Optional[Callable[[Query], bool]] = None
+    uses: Needles = ()  # needles the guard reads through Query.has
+    langs: Optional[FrozenSet[str]] = None
+
+    def render(self, lang: str) -> str:
+        return self.reply(lang) if callable(self.reply) else self.reply[lang]
+
+
+class _Automaton:
+    """Aho-Corasick over a fixed needle set; ``scan`` returns the ids of every needle found."""
+
+    def __init__(self, needles: Sequence[str]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Set[int]] = [set()]
+        for nid, needle in enumerate(needles):
+            state = 0
+            for ch in needle:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state].add(nid)
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f][ch] if ch in goto[f] and goto[f][ch] != nxt else 0
+                out[nxt] |= out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out: List[FrozenSet[int]] = [frozenset(o) for o in out]
+
+    def scan(self, text: str) -> Set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class RuleSet:
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        names = [r.name for r in rules]
+        dupes = {n for n in names if names.count(n) > 1}
+        if dupes:
+            raise ValueError(f"duplicate rule names: {sorted(dupes)}")
+        for r in rules:
+            if not r.all_of or not all(r.all_of):
+                raise ValueError(f"rule {r.name} needs at least one non-empty trigger group")
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        ids: Dict[str, int] = {}
+        for r in rules:
+            for n in (*(n for g in r.all_of for n in g), *r.none_of, *r.uses):
+                ids.setdefault(n, len(ids))
+        self._needles: Tuple[str, ...] = tuple(ids)
+        self._automaton = _Automaton(self._needles)
+        # needle id -> (rule index, group index) pairs it satisfies
+        self._triggers: List[List[Tuple[int, int]]] = [[] for _ in ids]
+        for ri, r in enumerate(rules):
+            for gi, group in enumerate(r.all_of):
+                for n in set(group):
+                    self._triggers[ids[n]].append((ri, gi))
+        self._blockers: Tuple[FrozenSet[int], ...] = tuple(frozenset(ids[n] for n in r.none_of) for r in rules)
+
+    def match(self, query: str, lang: str) -> Optional[Rule]:
+        text = normalize(query)
+        found = self._automaton.scan(text)
+        if not found:
+            return None
+        groups: Dict[int, Set[int]] = {}
+        for nid in found:
+            for ri, gi in self._triggers[nid]:
+                groups.setdefault(ri, set()).add(gi)
+        q: Optional[Query] = None
+        for ri in sorted(groups):
+            r = self.rules[ri]
+            if len(groups[ri]) < len(r.all_of) or not found.isdisjoint(self._blockers[ri]):
+                continue
+            if r.langs is not None and lang not in r.langs:
+                continue
+            if r.guard is not None:
+                if q is None:
+                    q = Query(text=text, raw=(query or "").lower(), words=tuple(text.split()), lang=lang,
+                              found=frozenset(self._needles[i] for i in found))
+                if not r.guard(q):
+                    continue
+            return r
+        return None
+
+    def answer(self, query: str, lang: str) -> Optional[str]:
+        r = self.match(query, lang)
+        return r.render(lang) if r else None
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the retrieval, intent-routing and rendering hot paths.
+
+Runs offline against fixtures: a KB grown to --kb-size from the real entries,
+a synthetic Ecwid catalog (scripts/fake_ecwid.py) injected into the intent
+router, and the real faq.json / faq_tree.json. Each benchmark is calibrated
+so one sample takes about --sample-ms, then sampled --repeat times; per-call
+min/median/mean are reported in microseconds.
+
+Compare mode reruns the suite (or loads --current) and exits 1 when a
+benchmark's median is slower than the baseline by more than --threshold.
+
+--ann-recall builds the dense RAG index over the same fixture corpus, adds
+IVF lists and reports recall@k and latency against exact search per nprobe.
+
+Usage:
+  python3 scripts/bench.py                                 # table
+  python3 scripts/bench.py --json bench.json --kb-size 2000
+  python3 scripts/bench.py --only 'ir.*' --repeat 9
+  python3 scripts/bench.py --compare bench.json --threshold 0.25
+  python3 scripts/bench.py --ann-recall --kb-size 20000 --nlist 128
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for p in (REPO_ROOT, REPO_ROOT / "kotileipomo-rag" / "src", Path(__file__).resolve().parent):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from fake_ecwid import build_catalog  # noqa: E402
+
+
+# Queries per intent, mixed languages; detect_intent must route each to its key
+INTENT_QUERIES: Dict[str, List[Tuple[str, str]]] = {
+    "hours": [("Mitkä ovat aukioloajat?", "fi"), ("What are your opening hours?", "en"), ("När har ni öppet?", "sv")],
+    "blackout": [("Oletteko kiinni jouluna?", "fi"), ("Are you closed on holidays?", "en")],
+    "menu": [("Näytä menu", "fi"), ("What products do you have?", "en"), ("Visa produkter", "sv")],
+    "allergens": [("Mitä allergeeneja tuotteissa on?", "fi"), ("Does the bun contain milk?", "en")],
+    "product_detail": [("Karjalanpiirakat ainesosat", "fi"), ("samosat allergens", "en")],
+    "diet": [("Onko teillä vegaanisia vaihtoehtoja?", "fi"), ("Do you have lactose free options?", "en")],
+    "faq": [("Miten nouto toimii?", "fi"), ("What is your address?", "en"), ("Var ligger butiken?", "sv")],
+    "product_suggest": [("karjalanpiirakat", "fi"), ("kanelipulla", "fi")],
+}
+KB_QUERIES = [
+    "Mitkä ovat aukioloajat?",
+    "Onko teillä gluteenittomia tuotteita?",
+    "Voiko piirakoita pakastaa?",
+    "How do I order for a party?",
+    "Do you have parking nearby?",
+    "Kan jag betala med kort?",
+    "Paljonko karjalanpiirakka maksaa",
+    "vegan samosa",
+]
+FAQ_PATHS = [
+    ["menu", "menu-tuoreet"],
+    ["menu", "ruokavaliot"],
+    ["menu", "ruokavaliot", "allergeenilistat"],
+    ["tilaus"],
+    ["tilaus", "nouto-ja-toimitus"],
+    ["maksaminen"],
+]
+
+Bench = Tuple[str, Callable[[], Any]]
+
+
+# ------------------------------------------------------------------ fixtures
+
+def fixture_kb(base: List[Dict[str, Any]], size: int, seed: int) -> List[Dict[str, Any]]:
+    """The real KB, grown to ``size`` with variants drawn from its own vocabulary."""
+    if not base:
+        raise SystemExit("No KB entries found to build the fixture from")
+    if size <= len(base):
+        return [dict(it) for it in base[:size]]
+    rng = random.Random(seed)
+    vocab = sorted({w for it in base for w in re.findall(r"\w{4,}", f"{it['question']} {it['answer']}".lower())})
+    out = [dict(it) for it in base]
+    i = 0
+    while len(out) < size:
+        src = base[i % len(base)]
+        extra = " ".join(rng.sample(vocab, min(6, len(vocab))))
+        out.append({
+            "question": f"{src['question']} ({extra})",
+            "answer": f"{src['answer']} {extra}",
+            "title": src.get("title") or "",
+            "file": "bench-fixture",
+        })
+        i += 1
+    return out
+
+
+def install_fixtures(kb_size: int, products: int, seed: int) -> Dict[str, Any]:
+    """Point the app and intent router at offline fixtures; returns handles for the benches."""
+    logging.disable(logging.WARNING)
+    import backend.app as app
+    import backend.intent_router as IR
+
+    kb = fixture_kb(app.load_kb_clean(), kb_size, seed)
+    app.KB = kb
+    app.build_index(app.KB)
+
+    catalog = build_catalog(products, 8, seed)
+    constraints = {"min_lead_minutes": 720, "max_days": 60, "blackout_dates": [
+        {"from": f"{datetime.now().year}-12-24", "to": f"{datetime.now().year}-12-26", "repeatedAnnually": True},
+    ]}
+    IR.ecwid.get_products = lambda limit=100, category=None: [
+        p for p in catalog["products"] if category is None or int(category) in p["categoryIds"]
+    ][:max(limit, 100)]
+    IR.ecwid.get_categories = lambda limit=200: catalog["categories"][:limit]
+    IR.ecwid.get_order_constraints = lambda debug=False: dict(constraints)
+    return {"app": app, "IR": IR, "kb": kb, "catalog": catalog}
+
+
+def rag_fixture_docs(kb: List[Dict[str, Any]]):
+    """The chunked RAG corpus, padded with the grown KB entries beyond it."""
+    from rag.ingest import Doc, chunk_docs, load_kb_docs
+    docs = chunk_docs(load_kb_docs())
+    docs += [
+        Doc(id=f"bench:{i}", text=f"Q: {it['question']}\nA: {it['answer']}",
+            meta={"source": "bench", "lang": "fi", "section": "bench"})
+        for i, it in enumerate(kb[len(docs):])
+    ]
+    return docs
+
+
+def _cycle(items):
+    it = itertools.cycle(items)
+    return lambda: next(it)
+
+
+# ---------------------------------------------------------------- benchmarks
+
+def collect_benches(fx: Dict[str, Any]) -> List[Bench]:
+    app, IR, kb = fx["app"], fx["IR"], fx["kb"]
+    benches: List[Bench] = []
+
+    benches.append(("kb.build_index", lambda: app.build_index(kb)))
+    nq = _cycle(KB_QUERIES)
+    benches.append(("kb.find_best_kb_match", lambda: app.find_best_kb_match(nq(), top_k=3)))
+
+    all_queries = [q for qs in INTENT_QUERIES.values() for q, _ in qs]
+    nd = _cycle(all_queries)
+    benches.append(("ir.detect_intent", lambda: IR.detect_intent(nd())))
+    for intent, queries in INTENT_QUERIES.items():
+        nxt = _cycle(queries)
+        benches.append((f"ir.answer.{intent}", lambda nxt=nxt: IR.answer(*nxt())))
+    benches.append(("ir.resolve_menu.fresh", lambda: IR.resolve_menu("fi")))
+    benches.append(("ir.resolve_menu.frozen", lambda: IR.resolve_menu("fi", query="pakasteet")))
+    nl = _cycle(["fi", "en", "sv"])
+    benches.append(("ir.build_dietary_menu", lambda: IR.build_dietary_menu(nl())))
+
+    from backend.faq_repository import FaqRepository
+    benches.append(("faq.reload", lambda: FaqRepository().reload()))
+    repo = FaqRepository()
+    repo.reload()
+    np_ = _cycle([(p, lang) for p in FAQ_PATHS for lang in ("fi", "en")])
+    benches.append(("faq.entries_for", lambda: repo.entries_for(*np_())))
+
+    try:
+        from rag.index_bm25 import BM25Index
+        from rag.ingest import Doc
+        from rag.retrieve import Retriever
+        from rag.generate import compose_answer, _special_answer
+    except Exception as e:  # the RAG package is optional for the app
+        print(f"skipping rag.* benchmarks: {e}", file=sys.stderr)
+        return benches
+    docs = rag_fixture_docs(kb)
+    benches.append(("rag.build_bm25", lambda: BM25Index(docs)))
+    import tempfile
+    from rag.index_store import load_index, reindex, save_index
+    artifact = Path(tempfile.mkdtemp()) / "rag_index.bin"
+    save_index(BM25Index(docs), str(artifact))
+    benches.append(("rag.load_index", lambda: load_index(str(artifact))))
+    # One edited doc against a saved index: only that doc is re-tokenized
+    stored = load_index(str(artifact))
+    edited = docs[:-1] + [Doc(docs[-1].id, docs[-1].text + " (päivitetty)", docs[-1].meta)]
+    benches.append(("rag.index_update", lambda: reindex(stored, edited)))
+    retriever = Retriever(BM25Index(docs))
+    rq = _cycle([(q, lang) for qs in INTENT_QUERIES.values() for q, lang in qs] + [(q, "fi") for q in KB_QUERIES])
+    benches.append(("rag.retrieve", lambda: retriever.retrieve(*rq(), top_k=6)))
+    from rag.index_embeddings import EmbIndex
+    emb = EmbIndex()
+    emb.build(docs)
+    if emb.ready:
+        benches.append(("rag.emb_build", lambda: EmbIndex().build(docs)))
+        benches.append(("rag.emb_search", lambda: emb.search(rq()[0], top_k=20)))
+        emb.build_ivf(max(2, int(len(docs) ** 0.5)))
+        benches.append(("rag.emb_search_ivf", lambda: emb.search(rq()[0], top_k=20)))
+    prepared = [(q, lang, retriever.retrieve(q, lang, top_k=6)) for q, lang in
+                [(q, lang) for qs in INTENT_QUERIES.values() for q, lang in qs] + [(q, "fi") for q in KB_QUERIES]]
+    cq = _cycle(prepared)
+
+    def _compose():
+        q, lang, hits = cq()
+        return compose_answer(q, hits, lang)
+
+    benches.append(("rag.compose_answer", _compose))
+    from rag.cache import QueryCache
+    qcache = QueryCache(compose_answer)
+    benches.append(("rag.cached_answer", lambda: qcache.answer(retriever, *rq(), top_k=6)))
+    sq = _cycle([(q, lang) for qs in INTENT_QUERIES.values() for q, lang in qs])
+    benches.append(("rag.special_answer", lambda: _special_answer(*sq())))
+    return benches
+
+
+# ------------------------------------------------------------------- timing
+
+def measure(fn: Callable[[], Any], repeat: int, sample_seconds: float) -> Dict[str, Any]:
+    fn()  # warm caches and lazy imports
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= sample_seconds or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * sample_seconds / max(elapsed, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_ROOT),
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_suite(args) -> Dict[str, Any]:
+    fx = install_fixtures(args.kb_size, args.products, args.seed)
+    results: Dict[str, Any] = {}
+    for name, fn in collect_benches(fx):
+        if args.only and not any(fnmatch.fnmatch(name, pat) for pat in args.only):
+            continue
+        results[name] = measure(fn, args.repeat, args.sample_ms / 1000.0)
+        print(f"{name:28} {results[name]['median_us']:>12.1f} us", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "kb_size": len(fx["kb"]),
+            "products": args.products,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def ann_recall(args) -> None:
+    """Recall@k and latency of IVF search against exact search, per nprobe."""
+    from rag.index_embeddings import EmbIndex
+    fx = install_fixtures(args.kb_size, args.products, args.seed)
+    docs = rag_fixture_docs(fx["kb"])
+    t0 = time.perf_counter()
+    emb = EmbIndex(nlist=0)
+    emb.build(docs)
+    if not emb.ready:
+        raise SystemExit("numpy is required for --ann-recall")
+    build_exact = time.perf_counter() - t0
+    nlist = args.nlist or max(2, int(len(docs) ** 0.5))
+    t0 = time.perf_counter()
+    emb.build_ivf(nlist)
+    build_ivf = time.perf_counter() - t0
+    rng = random.Random(args.seed)
+    queries = [q for qs in INTENT_QUERIES.values() for q, _ in qs] + KB_QUERIES
+    queries += [it["question"] for it in rng.sample(fx["kb"], min(200, len(fx["kb"])))]
+    k = args.k
+
+    def run(nprobe):
+        hits, t0 = [], time.perf_counter()
+        for q in queries:
+            hits.append({d.id for _, d in emb.search(q, top_k=k, nprobe=nprobe)})
+        return hits, (time.perf_counter() - t0) / len(queries) * 1e6
+
+    exact, exact_us = run(nlist)
+    print(f"docs={len(docs)} dims={emb.vectors.shape[1]} nlist={nlist} queries={len(queries)} k={k} "
+          f"build={build_exact:.2f}s + ivf {build_ivf:.2f}s")
+    print(f"{'nprobe':>8} {'recall@' + str(k):>10} {'mean':>12} {'speedup':>9}")
+    print(f"{'exact':>8} {1.0:>10.3f} {exact_us:>10.1f}us {1.0:>8.1f}x")
+    for nprobe in sorted({p for p in (1, 2, 4, 8, 16, 32, 64) if p < nlist} | {emb.nprobe} - {nlist}):
+        got, us = run(nprobe)
+        recall = statistics.fmean(len(g & e) / len(e) for g, e in zip(got, exact) if e)
+        print(f"{nprobe:>8} {recall:>10.3f} {us:>10.1f}us {exact_us / max(us, 1e-9):>8.1f}x")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print a comparison table; returns the names that regressed beyond threshold."""
+    regressed: List[str] = []
+    print(f"{'benchmark':28} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:28} {'-':>12} {cur['median_us']:>10.1f}us {'new':>9}")
+            continue
+        change = (cur["median_us"] - base["median_us"]) / max(base["median_us"], 1e-9)
+        flag = ""
+        if change > threshold:
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:28} {base['median_us']:>10.1f}us {cur['median_us']:>10.1f}us {change:>+8.1%}{flag}")
+    return regressed
+
+
+def print_table(report: Dict[str, Any]) -> None:
+    print(f"{'benchmark':28} {'median':>12} {'min':>12} {'mean':>12} {'calls':>9}")
+    for name, r in report["results"].items():
+        print(f"{name:28} {r['median_us']:>10.1f}us {r['min_us']:>10.1f}us {r['mean_us']:>10.1f}us "
+              f"{r['number'] * r['repeat']:>9}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Hot-path micro-benchmarks")
+    ap.add_argument("--kb-size", type=int, default=int(os.getenv("BENCH_KB_SIZE", "1000")))
+    ap.add_argument("--products", type=int, default=200, help="synthetic catalog size")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--sample-ms", type=float, default=100.0, help="target duration of one sample")
+    ap.add_argument("--only", action="append", help="glob of benchmark names to run (repeatable)")
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    ap.add_argument("--compare", help="baseline JSON; exit 1 on regressions")
+    ap.add_argument("--current", help="with --compare: compare this JSON instead of running the suite")
+    ap.add_argument("--threshold", type=float, default=0.20, help="allowed median slowdown (0.20 = 20%%)")
+    ap.add_argument("--ann-recall", action="store_true", help="report dense IVF recall@k vs exact search")
+    ap.add_argument("--nlist", type=int, default=0, help="with --ann-recall: IVF lists (default sqrt(N))")
+    ap.add_argument("-k", type=int, default=10, help="with --ann-recall: neighbours compared")
+    args = ap.parse_args()
+
+    if args.ann_recall:
+        ann_recall(args)
+        return
+    if args.current:
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    else:
+        current = run_suite(args)
+        if args.json_out:
+            Path(args.json_out).write_text(json.dumps(current, indent=2), encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressed = compare(baseline, current, args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} benchmark(s) regressed more than {args.threshold:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+        return
+    print_table(current)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ecwid REST API (v3), for load tests and offline runs.
+
+Serves /api/v3/{storeId}/...:
+- GET  /products (limit, offset, category, sku, keyword), /products/{id}
+- GET  /categories, /profile, /profile/shippingOptions
+- GET  /orders (keywords, limit), POST /orders, POST /orders/calculate
+
+The catalog is generated deterministically from --seed. Every request can be
+delayed (--latency-ms, --jitter-ms) and fail at random (--error-rate answers
+503, --throttle-rate answers 429). Any store id is accepted; --token makes the
+server require that bearer token.
+
+Point the backend and the scripts/place_* helpers at it with:
+  ECWID_API_BASE=http://127.0.0.1:8765/api/v3 ECWID_STORE_ID=1 ECWID_API_TOKEN=test
+
+Usage:
+  python3 scripts/fake_ecwid.py --port 8765 --products 500 --latency-ms 80 --error-rate 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+BASE_NAMES = [
+    ("Karjalanpiirakka", "Karelsk pirog", "Karelian pie"),
+    ("Voisilmäpulla", "Smörögabulle", "Butter-eye bun"),
+    ("Korvapuusti", "Kanelbulle", "Cinnamon roll"),
+    ("Ruisleipä", "Rågbröd", "Rye bread"),
+    ("Lihapiirakka", "Köttpirog", "Meat pastry"),
+    ("Riisipiirakka", "Rispirog", "Rice pastry"),
+    ("Mustikkapiirakka", "Blåbärspaj", "Blueberry pie"),
+    ("Täytekakku", "Gräddtårta", "Layer cake"),
+    ("Sämpylä", "Fralla", "Bread roll"),
+    ("Kaalipiirakka", "Kålpirog", "Cabbage pie"),
+]
+VARIANTS = ["", " (laktoositon)", " (vegaani)", " (gluteeniton)"]
+FORMS = ["paistettu", "raakapakaste", "paistopakaste"]
+PACKS = [1, 4, 10, 20]
+CATEGORY_NAMES = ["Tuoreet", "Pakasteet", "Juhlatuotteet", "Piirakat", "Pullat", "Leivät", "Kakut", "Suolaiset"]
+
+
+def build_catalog(products: int, categories: int, seed: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+    """Deterministic Ecwid-shaped categories and products."""
+    rng = random.Random(seed)
+    cats: List[Dict[str, Any]] = []
+    for i in range(max(1, categories)):
+        name = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+        if i >= len(CATEGORY_NAMES):
+            name = f"{name} {i // len(CATEGORY_NAMES) + 1}"
+        cats.append({
+            "id": 9000 + i,
+            "parentId": 9000 if i >= len(CATEGORY_NAMES) else None,
+            "name": name,
+            "enabled": True,
+            "productCount": 0,
+        })
+    items: List[Dict[str, Any]] = []
+    for i in range(products):
+        fi, sv, en = BASE_NAMES[i % len(BASE_NAMES)]
+        variant = VARIANTS[(i // len(BASE_NAMES)) % len(VARIANTS)]
+        form = FORMS[(i // (len(BASE_NAMES) * len(VARIANTS))) % len(FORMS)]
+        pack = PACKS[(i // (len(BASE_NAMES) * len(VARIANTS) * len(FORMS))) % len(PACKS)]
+        suffix = f" #{i // (len(BASE_NAMES) * len(VARIANTS) * len(FORMS) * len(PACKS)) + 1}" if i >= 480 else ""
+        cat = cats[rng.randrange(len(cats))]
+        cat["productCount"] += 1
+        items.append({
+            "id": 700000000 + i,
+            "sku": f"{i + 1:05d}",
+            "name": f"{fi}{variant}, {form}, {pack} kpl{suffix}",
+            "nameTranslated": {"fi": f"{fi}{variant}", "sv": sv, "en": en},
+            "price": round(rng.uniform(1.5, 45.0), 2),
+            "enabled": rng.random() > 0.05,
+            "inStock": True,
+            "categoryIds": [cat["id"]],
+            "defaultCategoryId": cat["id"],
+            "description": f"<p>{fi}{variant}. Valmistettu omassa leipomossa.</p>",
+            "descriptionTranslated": {"fi": f"<p>{fi}{variant}.</p>", "en": f"<p>{en}.</p>"},
+            "url": f"https://example.invalid/shop/p/{700000000 + i}",
+            "attributes": [],
+            "options": [],
+        })
+    return {"products": items, "categories": cats}
+
+
+def shipping_options(min_lead_minutes: int, max_days: int) -> List[Dict[str, Any]]:
+    year = date.today().year
+    hours = {"TUE": [["11:00", "17:00"]], "WED": [["11:00", "17:00"]], "THU": [["11:00", "17:00"]],
+             "FRI": [["11:00", "17:00"]], "SAT": [["11:00", "15:00"]]}
+    return [{
+        "id": "1000-pickup",
+        "title": "Nouto myymälästä",
+        "enabled": True,
+        "fulfilmentType": "pickup",
+        "pickupBusinessHours": json.dumps(hours),
+        "settings": {"pickupPreparationTimeMinutes": min_lead_minutes},
+        "availabilityPeriodCustomDays": max_days,
+        "blackoutDates": [
+            {"fromDate": f"{year}-12-24", "toDate": f"{year}-12-26", "repeatedAnnually": True},
+            {"fromDate": (date.today() + timedelta(days=40)).isoformat(),
+             "toDate": (date.today() + timedelta(days=42)).isoformat(), "repeatedAnnually": False},
+        ],
+    }]
+
+
+class FakeEcwidServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        products: int = 200,
+        categories: int = 8,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        token: Optional[str] = None,
+        min_lead_minutes: int = 720,
+        max_days: int = 60,
+        seed: int = 1,
+    ) -> None:
+        super().__init__(address, _Handler)
+        catalog = build_catalog(products, categories, seed)
+        self.products = catalog["products"]
+        self.categories = catalog["categories"]
+        self.by_id = {p["id"]: p for p in self.products}
+        self.by_sku = {p["sku"]: p for p in self.products}
+        self.shipping = shipping_options(min_lead_minutes, max_days)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.token = token
+        self.orders: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.hits: Dict[str, int] = {}
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def start(self) -> "FakeEcwidServer":
+        threading.Thread(target=self.serve_forever, name="fake-ecwid", daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients hanging up mid-response are expected under load and at shutdown
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+_PATH_RE = re.compile(r"^/api/v3/[^/]+(?P<path>/.*)$")
+
+
+def _page(items: List[Dict[str, Any]], q: Dict[str, str], default_limit: int = 100) -> Dict[str, Any]:
+    limit = max(0, min(int(q.get("limit") or default_limit), 100))
+    offset = max(0, int(q.get("offset") or 0))
+    chunk = items[offset:offset + limit]
+    return {"total": len(items), "count": len(chunk), "offset": offset, "limit": limit, "items": chunk}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeEcwidServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, data: Any) -> None:
+        raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _prelude(self) -> Optional[str]:
+        """Apply latency, auth and fault injection; returns the API path or None if answered."""
+        srv = self.server
+        url = urlparse(self.path)
+        m = _PATH_RE.match(url.path)
+        if not m:
+            self._json(404, {"errorMessage": "Unknown path"})
+            return None
+        path = m.group("path").rstrip("/") or "/"
+        with srv.lock:
+            srv.hits[path] = srv.hits.get(path, 0) + 1
+            roll = srv.rng.random()
+            jitter = srv.rng.uniform(0, srv.jitter_ms) if srv.jitter_ms else 0.0
+        delay = (srv.latency_ms + jitter) / 1000.0
+        if delay > 0:
+            time.sleep(delay)
+        if srv.token:
+            auth = self.headers.get("Authorization") or ""
+            if auth != f"Bearer {srv.token}" and self.headers.get("X-Ecwid-Api-Token") != srv.token:
+                self._json(403, {"errorMessage": "Invalid token"})
+                return None
+        if roll < srv.error_rate:
+            self._json(503, {"errorMessage": "Service temporarily unavailable"})
+            return None
+        if roll < srv.error_rate + srv.throttle_rate:
+            self._json(429, {"errorMessage": "Too many requests"})
+            return None
+        return path
+
+    def _query(self) -> Dict[str, str]:
+        return {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        path = self._prelude()
+        if path is None:
+            return
+        srv, q = self.server, self._query()
+        if path == "/products":
+            items = srv.products
+            if q.get("sku"):
+                items = [srv.by_sku[q["sku"]]] if q["sku"] in srv.by_sku else []
+            if q.get("category"):
+                cid = int(q["category"])
+                items = [p for p in items if cid in p["categoryIds"]]
+            if q.get("keyword"):
+                kw = q["keyword"].lower()
+                items = [p for p in items if kw in p["name"].lower()]
+            if q.get("enabled") == "true":
+                items = [p for p in items if p["enabled"]]
+            self._json(200, _page(items, q))
+            return
+        m = re.match(r"^/products/(\d+)$", path)
+        if m:
+            prod = srv.by_id.get(int(m.group(1)))
+            self._json(200 if prod else 404, prod or {"errorMessage": "Product not found"})
+            return
+        if path == "/categories":
+            self._json(200, _page(srv.categories, q))
+            return
+        if path == "/profile":
+            self._json(200, {
+                "generalInfo": {"storeId": 1, "storeUrl": "https://example.invalid/shop"},
+                "settings": {"storeName": "Fake Kotileipomo", "shipping": {"shippingOptions": srv.shipping}},
+            })
+            return
+        if path == "/profile/shippingOptions":
+            self._json(200, srv.shipping)
+            return
+        if path == "/orders":
+            kw = q.get("keywords") or ""
+            with srv.lock:
+                items = [o for o in srv.orders if not kw or kw in (o.get("customerComment") or "")]
+            self._json(200, _page(items, q))
+            return
+        self._json(404, {"errorMessage": "Unknown path"})
+
+    def do_POST(self):
+        # Drain the body first so an injected error leaves the keep-alive connection usable
+        body = self._body()
+        path = self._prelude()
+        if path is None:
+            return
+        srv = self.server
+        if path == "/orders/calculate":
+            total = sum(float(i.get("price") or 0) * int(i.get("quantity") or 1) for i in body.get("items") or [])
+            self._json(200, {**body, "subtotal": round(total, 2), "total": round(total, 2)})
+            return
+        if path == "/orders":
+            if not body.get("items"):
+                self._json(400, {"errorMessage": "Order must contain items"})
+                return
+            with srv.lock:
+                n = len(srv.orders) + 1
+                order = {**body, "id": 1000 + n, "orderNumber": f"FAKE{n}"}
+                srv.orders.append(order)
+            self._json(200, {"id": order["id"], "orderNumber": order["orderNumber"]})
+            return
+        self._json(404, {"errorMessage": "Unknown path"})
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Local Ecwid REST stand-in")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--products", type=int, default=200)
+    ap.add_argument("--categories", type=int, default=8)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    ap.add_argument("--token", default=None, help="require this API token")
+    ap.add_argument("--min-lead-minutes", type=int, default=720)
+    ap.add_argument("--max-days", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    srv = FakeEcwidServer(
+        (args.host, args.port),
+        products=args.products,
+        categories=args.categories,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        token=args.token,
+        min_lead_minutes=args.min_lead_minutes,
+        max_days=args.max_days,
+        seed=args.seed,
+    )
+    print(f"Fake Ecwid listening on {srv.api_base} ({len(srv.products)} products)")
+    print(f"  export ECWID_API_BASE={srv.api_base} ECWID_STORE_ID=1 ECWID_API_TOKEN={args.token or 'test'}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Load-test the backend: /api/chat, /faq/* and /api/v2/* with a weighted mix.
+
+Runs N concurrent clients for a fixed duration (or request count) and prints
+count, error count, throughput and p50/p95/p99 latency per endpoint and per
+group. --json writes the same report for tracking between runs.
+
+With --spawn the script starts scripts/fake_ecwid.py in-process and a uvicorn
+backend pointed at it (ECWID_API_BASE), so Ecwid-facing paths can be measured
+without touching the live store. Otherwise it drives an already running
+backend at --base.
+
+Usage:
+  python3 scripts/load_test.py --spawn --duration 20 --concurrency 16
+  python3 scripts/load_test.py --spawn --ecwid-latency-ms 120 --ecwid-error-rate 0.05 --mix chat=1,v2=3
+  python3 scripts/load_test.py --base http://localhost:8000 --requests 2000 --json load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ecwid import FakeEcwidServer  # noqa: E402
+
+
+CHAT_MESSAGES = [
+    ("Mitkä ovat aukioloajat?", "fi"),
+    ("Missä leipomo sijaitsee?", "fi"),
+    ("Onko teillä gluteenittomia tuotteita?", "fi"),
+    ("Paljonko karjalanpiirakat maksavat?", "fi"),
+    ("Voinko tilata juhliin?", "fi"),
+    ("What are your opening hours?", "en"),
+    ("Do you have vegan pastries?", "en"),
+    ("Is there parking?", "en"),
+    ("Vilka är era öppettider?", "sv"),
+    ("Har ni laktosfria produkter?", "sv"),
+]
+FAQ_LANGS = ["fi", "en", "sv"]
+
+
+@dataclass
+class Scenario:
+    group: str
+    name: str
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    body: Any = None
+    headers: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class Stats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+def _next_weekday(wd: int, weeks_ahead: int = 1) -> date:
+    today = date.today()
+    return today + timedelta(days=((wd - today.weekday()) % 7) + 7 * weeks_ahead)
+
+
+def build_scenarios(include_orders: bool) -> List[Scenario]:
+    slot = f"{_next_weekday(3).isoformat()}T12:00"  # Thursday noon next week
+    out: List[Scenario] = []
+    for msg, lang in CHAT_MESSAGES:
+        out.append(Scenario("chat", "POST /api/chat", "POST", "/api/chat", body={"message": msg, "lang": lang}))
+    for lang in FAQ_LANGS:
+        out.append(Scenario("faq", "GET /faq/tree", "GET", "/faq/tree", params={"lang": lang}))
+        out.append(Scenario("faq", "GET /faq/menu", "GET", "/faq/menu", params={"lang": lang}))
+        out.append(Scenario("faq", "GET /faq/menu?frozen", "GET", "/faq/menu", params={"lang": lang, "menu_type": "frozen"}))
+        out.append(Scenario("faq", "GET /faq/menu/diet", "GET", "/faq/menu/diet", params={"lang": lang}))
+    out += [
+        Scenario("v2", "GET /api/v2/products", "GET", "/api/v2/products"),
+        Scenario("v2", "GET /api/v2/categories", "GET", "/api/v2/categories"),
+        Scenario("v2", "GET /api/v2/order_constraints", "GET", "/api/v2/order_constraints"),
+        Scenario("v2", "GET /api/v2/pickup_slots", "GET", "/api/v2/pickup_slots", params={"days": 14}),
+        Scenario("v2", "GET /api/v2/check_pickup", "GET", "/api/v2/check_pickup", params={"iso": slot}),
+        Scenario("v2", "POST /api/v2/check_pickup_batch", "POST", "/api/v2/check_pickup_batch",
+                 body={"times": [f"{(_next_weekday(d)).isoformat()}T{h:02d}:00" for d in range(7) for h in (10, 12, 14, 16)]}),
+    ]
+    if include_orders:
+        out.append(Scenario("v2", "POST /api/v2/order", "POST", "/api/v2/order", body={
+            "items": [{"sku": "00001", "quantity": 2}, {"sku": "00002", "quantity": 1}],
+            "name": "Load Test",
+            "phone": "+358 40 000 0000",
+            "pickup_time": slot,
+        }))
+    return out
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        key, _, weight = part.partition("=")
+        mix[key.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_vals: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(pct / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def summarize(stats: Dict[str, Stats], elapsed: float) -> Dict[str, Any]:
+    def row(s: Stats) -> Dict[str, Any]:
+        lat = sorted(s.latencies)
+        n = len(lat)
+        return {
+            "count": n,
+            "errors": s.errors,
+            "rps": round(n / elapsed, 2) if elapsed > 0 else 0.0,
+            "mean_ms": round(sum(lat) / n * 1000, 2) if n else 0.0,
+            "p50_ms": round(percentile(lat, 50) * 1000, 2),
+            "p95_ms": round(percentile(lat, 95) * 1000, 2),
+            "p99_ms": round(percentile(lat, 99) * 1000, 2),
+            "statuses": {str(k): v for k, v in sorted(s.statuses.items())},
+        }
+
+    groups: Dict[str, Stats] = {}
+    total = Stats()
+    for name, s in stats.items():
+        g = groups.setdefault(name.split("|", 1)[0], Stats())
+        for agg in (g, total):
+            agg.latencies.extend(s.latencies)
+            agg.errors += s.errors
+            for code, c in s.statuses.items():
+                agg.statuses[code] = agg.statuses.get(code, 0) + c
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total": row(total),
+        "groups": {g: row(s) for g, s in sorted(groups.items())},
+        "endpoints": {name.split("|", 1)[1]: row(s) for name, s in sorted(stats.items())},
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    header = f"{'endpoint':40} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header)
+    print("-" * len(header))
+
+    def line(name: str, r: Dict[str, Any]) -> None:
+        print(f"{name:40} {r['count']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms")
+
+    for name, r in report["endpoints"].items():
+        line(name, r)
+    print("-" * len(header))
+    for name, r in report["groups"].items():
+        line(f"[{name}]", r)
+    line("[total]", report["total"])
+    print(f"elapsed {report['elapsed_s']}s")
+
+
+async def run_load(base: str, scenarios: List[Scenario], mix: Dict[str, float], concurrency: int,
+                   duration: float, max_requests: Optional[int], timeout: float, seed: int) -> Dict[str, Any]:
+    weights = [mix.get(s.group, 0.0) / max(1, sum(1 for o in scenarios if o.group == s.group)) for s in scenarios]
+    if not any(weights):
+        raise SystemExit("--mix selects no scenarios")
+    rng = random.Random(seed)
+    stats: Dict[str, Stats] = {}
+    issued = 0
+    deadline = time.perf_counter() + duration if max_requests is None else float("inf")
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal issued
+        while time.perf_counter() < deadline:
+            if max_requests is not None:
+                if issued >= max_requests:
+                    return
+                issued += 1
+            sc = rng.choices(scenarios, weights)[0]
+            headers = dict(sc.headers or {})
+            if sc.path == "/api/v2/order":
+                headers["Idempotency-Key"] = uuid.uuid4().hex
+            st = stats.setdefault(f"{sc.group}|{sc.name}", Stats())
+            started = time.perf_counter()
+            try:
+                r = await client.request(sc.method, sc.path, params=sc.params, json=sc.body, headers=headers)
+                await r.aread()
+                code = r.status_code
+            except httpx.HTTPError:
+                code = 0
+            st.latencies.append(time.perf_counter() - started)
+            st.statuses[code] = st.statuses.get(code, 0) + 1
+            if code == 0 or code >= 500:
+                st.errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(stats, elapsed)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_backend(api_base: str, port: int, workers: int, queue_path: str, log_path: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "ECWID_API_BASE": api_base,
+        "ECWID_STORE_ID": os.environ.get("ECWID_STORE_ID", "1"),
+        "ECWID_API_TOKEN": os.environ.get("ECWID_API_TOKEN", "test"),
+        "ENABLE_CHAT_ORDERING": "true",
+        "CHAT_ENABLED": "true",
+        "ORDER_QUEUE_PATH": queue_path,
+    }
+    cmd = [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    log = open(log_path, "wb")
+    proc = subprocess.Popen(cmd, cwd=str(REPO_ROOT), env=env, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    url = f"http://127.0.0.1:{port}/api/health"
+    for _ in range(300):
+        if proc.poll() is not None:
+            tail = Path(log_path).read_text(encoding="utf-8", errors="replace")[-2000:]
+            raise SystemExit(f"backend exited with code {proc.returncode}:\n{tail}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("backend did not become healthy within 30s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Backend load test")
+    ap.add_argument("--base", default="http://127.0.0.1:8000", help="backend URL (ignored with --spawn)")
+    ap.add_argument("--spawn", action="store_true", help="start a fake Ecwid and a uvicorn backend")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    ap.add_argument("--backend-log", default=None, help="keep the spawned backend's output in this file")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds")
+    ap.add_argument("--requests", type=int, default=None, help="send exactly this many requests (overrides --duration)")
+    ap.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded load first")
+    ap.add_argument("--mix", default="chat=4,faq=3,v2=3", help="group weights, e.g. chat=1,v2=5")
+    ap.add_argument("--orders", action="store_true", help="include POST /api/v2/order in the v2 mix")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", dest="json_out", default=None, help="write the report to this file")
+    ap.add_argument("--products", type=int, default=200, help="fake catalog size with --spawn")
+    ap.add_argument("--ecwid-latency-ms", type=float, default=50.0)
+    ap.add_argument("--ecwid-jitter-ms", type=float, default=20.0)
+    ap.add_argument("--ecwid-error-rate", type=float, default=0.0)
+    ap.add_argument("--ecwid-throttle-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    scenarios = build_scenarios(args.orders)
+    mix = parse_mix(args.mix)
+    fake: Optional[FakeEcwidServer] = None
+    backend: Optional[subprocess.Popen] = None
+    tmp = tempfile.TemporaryDirectory()
+    base = args.base
+    try:
+        if args.spawn:
+            fake = FakeEcwidServer(
+                products=args.products,
+                latency_ms=args.ecwid_latency_ms,
+                jitter_ms=args.ecwid_jitter_ms,
+                error_rate=args.ecwid_error_rate,
+                throttle_rate=args.ecwid_throttle_rate,
+                seed=args.seed,
+            ).start()
+            port = _free_port()
+            log_path = args.backend_log or str(Path(tmp.name) / "backend.log")
+            backend = spawn_backend(fake.api_base, port, args.workers, str(Path(tmp.name) / "orders.sqlite3"), log_path)
+            base = f"http://127.0.0.1:{port}"
+            print(f"fake Ecwid at {fake.api_base}, backend at {base}")
+        if args.warmup > 0:
+            asyncio.run(run_load(base, scenarios, mix, args.concurrency, args.warmup, None, args.timeout, args.seed))
+        report = asyncio.run(run_load(base, scenarios, mix, args.concurrency, args.duration, args.requests,
+                                      args.timeout, args.seed))
+        report["config"] = {
+            "base": base,
+            "spawn": args.spawn,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "orders": args.orders,
+        }
+        if fake is not None:
+            report["config"]["ecwid"] = {
+                "products": args.products,
+                "latency_ms": args.ecwid_latency_ms,
+                "jitter_ms": args.ecwid_jitter_ms,
+                "error_rate": args.ecwid_error_rate,
+                "throttle_rate": args.ecwid_throttle_rate,
+            }
+            report["ecwid_hits"] = dict(sorted(fake.hits.items()))
+        print_report(report)
+        if args.json_out:
+            Path(args.json_out).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    finally:
+        if backend is not None:
+            backend.terminate()
+            try:
+                backend.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                backend.kill()
+        if fake is not None:
+            fake.stop()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -88,7 +88,7 @@ def main():
         except Exception:
             body = {"raw": r.text}
         print(json.dumps({"attempt": iso, "status": r.status_code, "body": body}, ensure_ascii=False))
-        if r.status_code == 200:
+        if r.status_code in (200, 202):
             break
 
 
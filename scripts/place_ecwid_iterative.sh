@@ -2,9 +2,10 @@
 set -euo pipefail
 
 # Load creds from .env (do not print)
-STORE_ID=$(awk -F= '/^ECWID_STORE_ID=/{print $2}' .env)
-TOKEN=$(awk -F= '/^ECWID_API_TOKEN=/{print $2}' .env)
-BASE="https://app.ecwid.com/api/v3/${STORE_ID}"
+# (environment overrides .env; ECWID_API_BASE can point at scripts/fake_ecwid.py)
+STORE_ID=${ECWID_STORE_ID:-$(awk -F= '/^ECWID_STORE_ID=/{print $2}' .env)}
+TOKEN=${ECWID_API_TOKEN:-$(awk -F= '/^ECWID_API_TOKEN=/{print $2}' .env)}
+BASE="${ECWID_API_BASE:-https://app.ecwid.com/api/v3}/${STORE_ID}"
 
 # Fetch shipping options and find Pickup method
 OPTS_JSON=$(curl -sS "$BASE/profile/shippingOptions" -H "Authorization: Bearer $TOKEN")
@@ -3,7 +3,8 @@
 Place an order directly via Ecwid API using credentials in .env.
 
 Steps:
-- Read ECWID_STORE_ID and ECWID_API_TOKEN from .env
+- Read ECWID_STORE_ID and ECWID_API_TOKEN from the environment or .env
+  (ECWID_API_BASE overrides the API URL, e.g. for scripts/fake_ecwid.py)
 - Fetch shipping options, find the pickup method, compute next valid slot
 - Fetch products, pick the first enabled product
 - Create an order using preferredDeliveryDate/Time and the pickup method id
@@ -22,7 +23,10 @@ from datetime import datetime, timedelta, time, date
 
 
 def read_env_vars(path: str = ".env") -> tuple[str, str]:
-    store_id, token = None, None
+    # Environment wins over .env so the script can target a local fake Ecwid
+    store_id, token = os.getenv("ECWID_STORE_ID"), os.getenv("ECWID_API_TOKEN")
+    if store_id and token:
+        return store_id, token
     try:
         with open(path, "r", encoding="utf-8") as f:
             for line in f:
@@ -95,7 +99,8 @@ def choose_pickup_and_slot(opts: list[dict]) -> tuple[dict, str, str]:
 
 def main():
     store_id, token = read_env_vars()
-    base = f"https://app.ecwid.com/api/v3/{store_id}"
+    api = (os.getenv("ECWID_API_BASE") or "https://app.ecwid.com/api/v3").rstrip("/")
+    base = f"{api}/{store_id}"
 
     # Shipping options
     opts = get_json(f"{base}/profile/shippingOptions", token)
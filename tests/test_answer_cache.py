@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+import backend.app as app_module
+from backend.app import app
+from backend.answer_cache import AnswerCache
+
+
+class TestAnswerCacheUnit(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = AnswerCache(max_entries=2, ttl_seconds=60)
+        cache.set('a', 1, 'A')
+        cache.set('b', 1, 'B')
+        self.assertEqual(cache.get('a', 1), 'A')  # 'a' becomes most recent
+        cache.set('c', 1, 'C')
+        self.assertIsNone(cache.get('b', 1))
+        self.assertEqual(cache.get('a', 1), 'A')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_generation_bump_invalidates(self):
+        cache = AnswerCache(max_entries=8, ttl_seconds=60)
+        cache.set('q', (1, 1, 1), 'old')
+        self.assertEqual(cache.get('q', (1, 1, 1)), 'old')
+        self.assertIsNone(cache.get('q', (1, 2, 1)))
+        stats = cache.stats()
+        self.assertEqual(stats['invalidations'], 1)
+        self.assertEqual(stats['entries'], 0)
+
+    def test_ttl_expiry(self):
+        cache = AnswerCache(max_entries=8, ttl_seconds=-1)
+        cache.set('q', 1, 'val')
+        self.assertIsNone(cache.get('q', 1))
+
+    def test_disabled(self):
+        cache = AnswerCache(max_entries=0)
+        calls = []
+        cache.get_or_compute('q', 1, lambda: calls.append(1) or 'x')
+        cache.get_or_compute('q', 1, lambda: calls.append(1) or 'x')
+        self.assertEqual(len(calls), 2)
+
+
+class TestChatAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        app_module.ANSWER_CACHE.clear()
+
+    def test_repeated_question_hits_cache(self):
+        with patch.object(app_module, 'CHAT_ENABLED', True), \
+             patch.object(app_module, '_answer_chat', wraps=app_module._answer_chat) as spy:
+            before = app_module.ANSWER_CACHE.stats()['hits']
+            r1 = self.client.post('/api/chat', json={'message': 'Mitkä ovat aukioloajat?'})
+            r2 = self.client.post('/api/chat', json={'message': '  mitkä ovat AUKIOLOAJAT '})
+        self.assertEqual(r1.status_code, 200)
+        self.assertEqual(r1.json()['reply'], r2.json()['reply'])
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(app_module.ANSWER_CACHE.stats()['hits'], before + 1)
+        health = self.client.get('/api/health').json()
+        self.assertIn('answer_cache', health)
+
+    def test_kb_version_bump_recomputes(self):
+        with patch.object(app_module, 'CHAT_ENABLED', True), \
+             patch.object(app_module, '_answer_chat', wraps=app_module._answer_chat) as spy:
+            self.client.post('/api/chat', json={'message': 'Mitkä ovat aukioloajat?'})
+            with patch.object(app_module, 'KB_VERSION', app_module.KB_VERSION + 1):
+                self.client.post('/api/chat', json={'message': 'Mitkä ovat aukioloajat?'})
+        self.assertEqual(spy.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
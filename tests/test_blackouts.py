@@ -0,0 +1,53 @@
+import unittest
+from datetime import date, datetime
+
+from backend.constraints_service import ConstraintsService
+from backend.time_rules import BlackoutIndex, compile_blackouts, is_blackout, next_available_date
+
+
+BLACKOUTS = [
+    {"from": "2025-10-08", "to": "2025-10-11", "repeatedAnnually": False},
+    {"fromDate": "2025-10-10", "toDate": "2025-10-14", "repeatedAnnually": False},
+    {"from": "2000-12-24", "to": "2000-01-02", "repeatedAnnually": True},
+    {"from": "2025-07-01", "to": "2025-07-31", "repeatedAnnually": True},
+]
+
+
+class TestBlackoutIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = BlackoutIndex(BLACKOUTS)
+
+    def test_overlapping_ranges_are_merged(self):
+        self.assertEqual(len(self.index._fixed_starts), 1)
+        self.assertTrue(self.index.contains(date(2025, 10, 13)))
+        self.assertFalse(self.index.contains(date(2025, 10, 15)))
+
+    def test_annual_ranges_match_any_year_and_wrap_new_year(self):
+        self.assertTrue(self.index.contains(datetime(2031, 7, 15, 12, 0)))
+        self.assertTrue(self.index.contains(date(2031, 12, 31)))
+        self.assertTrue(self.index.contains(date(2032, 1, 2)))
+        self.assertFalse(self.index.contains(date(2032, 1, 3)))
+
+    def test_next_available(self):
+        self.assertEqual(self.index.next_available(date(2025, 10, 9)), date(2025, 10, 15))
+        self.assertEqual(self.index.next_available(date(2030, 12, 26)), date(2031, 1, 3))
+        self.assertEqual(self.index.next_available(date(2030, 6, 30)), date(2030, 6, 30))
+        full_year = BlackoutIndex([{"from": "2000-01-01", "to": "2000-12-31", "repeatedAnnually": True}])
+        self.assertIsNone(full_year.next_available(date(2030, 1, 1)))
+
+    def test_matches_previous_semantics(self):
+        self.assertTrue(is_blackout(datetime(2025, 10, 8, 0, 0), BLACKOUTS))
+        self.assertTrue(is_blackout(datetime(2025, 10, 14, 23, 59), BLACKOUTS))
+        self.assertFalse(is_blackout(datetime(2025, 10, 7, 23, 59), BLACKOUTS))
+        self.assertFalse(is_blackout(datetime(2025, 10, 7), [{"from": "bad", "to": "2025-10-08"}]))
+        self.assertEqual(next_available_date(date(2025, 10, 8), BLACKOUTS), date(2025, 10, 15))
+
+    def test_compiled_once_per_list(self):
+        self.assertIs(compile_blackouts(BLACKOUTS), compile_blackouts(BLACKOUTS))
+        svc = ConstraintsService(fetch=lambda: ([{"blackoutDates": BLACKOUTS[:1]}], {}), ttl_seconds=60)
+        self.assertIs(svc.blackout_index(), svc.blackout_index())
+        self.assertTrue(svc.blackout_index().contains(date(2025, 10, 9)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+import backend.app as app_module
+from backend.app import app, ChatResponse
+
+
+def _slow_legacy(user_msg, respond_lang, session_id=None):
+    time.sleep(1.0)
+    return ChatResponse(reply="slow legacy", source="KB", match=1.0, session_id=session_id)
+
+
+def _fast_rag(user_msg, respond_lang, session_id=None):
+    return ChatResponse(reply="fast rag", source="RAG", match=None, session_id=session_id)
+
+
+class TestChatDualConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        app_module.ANSWER_CACHE.clear()
+
+    def _post(self, **extra):
+        return self.client.post('/api/chat_dual', json={'message': 'Mitkä ovat aukioloajat?', **extra})
+
+    def test_slow_branch_gets_placeholder(self):
+        with patch.object(app_module, 'CHAT_ENABLED', True), \
+             patch.object(app_module, 'CHAT_DUAL_TIMEOUT_SECS', 0.2), \
+             patch.object(app_module, '_answer_legacy', _slow_legacy), \
+             patch.object(app_module, '_answer_rag', _fast_rag):
+            started = time.monotonic()
+            r = self._post()
+            elapsed = time.monotonic() - started
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data['rag']['reply'], 'fast rag')
+        self.assertEqual(data['legacy']['source'], 'Legacy (timeout)')
+        self.assertLess(elapsed, 0.9)
+
+    def test_disabled_branch_is_not_computed(self):
+        with patch.object(app_module, 'CHAT_ENABLED', True), \
+             patch.object(app_module, '_answer_rag', _fast_rag):
+            r = self._post(rag=False)
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data['rag']['source'], 'RAG (disabled)')
+        self.assertTrue(data['legacy']['reply'])
+
+    def test_rag_warming_up_answers_at_once_and_is_not_cached(self):
+        ready = threading.Event()
+        init = {"started": True, "error": None, "docs": 0, "seconds": None}
+        with patch.object(app_module, 'CHAT_ENABLED', True), \
+             patch.object(app_module, 'RAG_ENABLED', True), \
+             patch.object(app_module, '_RAG_READY', ready), \
+             patch.object(app_module, '_RAG_INIT', init), \
+             patch.object(app_module, '_start_rag_init', lambda: None), \
+             patch.object(app_module, '_answer_rag', _fast_rag):
+            self.assertEqual(self.client.get('/api/health').json()['rag']['status'], 'warming_up')
+            data = self._post().json()
+            self.assertEqual(data['rag']['source'], 'RAG (warming up)')
+            self.assertTrue(data['legacy']['reply'])
+
+            init["error"] = "OSError: boom"
+            self.assertEqual(self._post().json()['rag']['source'], 'RAG (failed)')
+            health = self.client.get('/api/health').json()['rag']
+            self.assertEqual((health['status'], health['error']), ('failed', 'OSError: boom'))
+
+            init["error"] = None
+            ready.set()
+            self.assertEqual(self._post().json()['rag']['reply'], 'fast rag')
+            self.assertEqual(self.client.get('/api/health').json()['rag']['status'], 'ready')
+
+
+class TestRagInitRetry(unittest.TestCase):
+    def test_failed_load_is_retried_after_backoff(self):
+        ready = threading.Event()
+        init = {"started": False, "error": None, "docs": 0, "seconds": None, "failures": 0, "retry_at": 0.0}
+        loads = []
+
+        def load_index():
+            loads.append(1)
+            if len(loads) == 1:
+                raise OSError("transient read error")
+            return type("Index", (), {"docs": ["a", "b"]})(), None
+
+        def wait_for(cond):
+            deadline = time.monotonic() + 5
+            while not cond() and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        with patch.object(app_module, 'RAG_ENABLED', True), \
+             patch.object(app_module, '_RAG_READY', ready), \
+             patch.object(app_module, '_RAG_INIT', init), \
+             patch.object(app_module, '_RAG_RET', None), \
+             patch.object(app_module, 'RAG_INIT_RETRY_SECS', 60), \
+             patch.object(app_module, '_rag_load_index', load_index, create=True), \
+             patch.object(app_module, '_RAG_EMB_FLAG', False, create=True), \
+             patch.object(app_module, '_RagEmb', lambda: type("Emb", (), {"ready": False})(), create=True), \
+             patch.object(app_module, '_RagRet', lambda bm25, emb: "retriever", create=True):
+            app_module._start_rag_init()
+            wait_for(lambda: not init["started"])
+            self.assertEqual(app_module._rag_status(), 'failed')
+            self.assertEqual(init["error"], "OSError: transient read error")
+
+            # Within the backoff another request does not start a new load
+            app_module._start_rag_init()
+            self.assertEqual((len(loads), init["started"]), (1, False))
+
+            init["retry_at"] = 0.0  # the backoff has passed
+            app_module._start_rag_init()
+            wait_for(ready.is_set)
+            self.assertEqual(app_module._rag_status(), 'ready')
+            self.assertEqual((len(loads), init["docs"], init["error"]), (2, 2, None))
+            self.assertEqual(app_module._RAG_RET, "retriever")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+import backend.app as app_module
+from backend.app import app
+
+FAKE_TOKENS = ["Leivomme ", "karjalan", "piirakoita ", "joka päivä."]
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /v1/chat/completions that streams FAKE_TOKENS."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for tok in FAKE_TOKENS:
+            chunk = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def _parse_sse(text: str):
+    events = []
+    for block in text.split("\n\n"):
+        if not block.strip():
+            continue
+        event, data = "message", ""
+        for line in block.splitlines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data += line[len("data:"):].strip()
+        events.append((event, json.loads(data) if data else None))
+    return events
+
+
+class TestChatStream(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        app_module.ANSWER_CACHE.clear()
+
+    def test_deterministic_answer_is_single_event(self):
+        with patch.object(app_module, 'CHAT_ENABLED', True):
+            r = self.client.post('/api/chat/stream', json={'message': 'Mitkä ovat aukioloajat?'})
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.headers['content-type'].startswith('text/event-stream'))
+        events = _parse_sse(r.text)
+        self.assertEqual(len(events), 1)
+        name, data = events[0]
+        self.assertEqual(name, 'answer')
+        self.assertTrue(data['reply'])
+
+    def test_llm_answer_streams_from_fake_server(self):
+        try:
+            from openai import OpenAI
+        except Exception:
+            self.skipTest('openai package not installed')
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAIHandler)
+        server.requests = []
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1")
+            kb_item = {"question": "Mitä leivotte?", "answer": "Karjalanpiirakoita.", "file": "db"}
+            with patch.object(app_module, 'CHAT_ENABLED', True), \
+                 patch.object(app_module, 'OPENAI_CLIENT', client), \
+                 patch.object(app_module, 'LLM_ENABLED', True), \
+                 patch.object(app_module, 'find_best_kb_match', return_value=[(5.0, 5.0, 0.9, 0.5, kb_item)]):
+                r = self.client.post('/api/chat/stream', json={'message': 'Kertokaa leipomon arjesta'})
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(r.status_code, 200)
+        events = _parse_sse(r.text)
+        names = [e[0] for e in events]
+        self.assertEqual(names[0], 'start')
+        self.assertEqual(names[-1], 'done')
+        deltas = [d['text'] for n, d in events if n == 'delta']
+        self.assertEqual(deltas, FAKE_TOKENS)
+        self.assertEqual(events[-1][1]['reply'], "".join(FAKE_TOKENS).strip())
+        self.assertEqual(events[-1][1]['source'], 'KB • LLM')
+        self.assertTrue(server.requests[0].get('stream'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import threading
 import unittest
 from backend.order_constraints import infer_constraints
+from backend.constraints_service import ConstraintsService
 
 
 class TestConstraints(unittest.TestCase):
@@ -35,5 +37,64 @@ class TestConstraints(unittest.TestCase):
         )
 
 
+PICKUP_OPTS = [{"title": "Nouto", "fulfillmentTimeInMinutes": 660, "availabilityPeriod": "ONE_MONTH"}]
+
+
+class TestConstraintsService(unittest.TestCase):
+    def test_fresh_snapshot_fetches_once(self):
+        calls = []
+        svc = ConstraintsService(fetch=lambda: calls.append(1) or (PICKUP_OPTS, {}), ttl_seconds=60, stale_seconds=60)
+        a = svc.get()
+        b = svc.get()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(a, b)
+        self.assertEqual(a["min_lead_minutes"], 660)
+        self.assertEqual(a["source"], "ecwid")
+        self.assertEqual(svc.shipping_options(), PICKUP_OPTS)
+
+    def test_stale_snapshot_served_while_refreshing(self):
+        release = threading.Event()
+        results = [(PICKUP_OPTS, {})]
+
+        def fetch():
+            if results:
+                return results.pop()
+            release.wait(2)
+            return ([{"fulfillmentTimeInMinutes": 120}], {})
+
+        svc = ConstraintsService(fetch=fetch, ttl_seconds=0, stale_seconds=60)
+        self.assertEqual(svc.get()["min_lead_minutes"], 660)
+        # expired but within the stale window: old value returned without waiting
+        self.assertEqual(svc.get()["min_lead_minutes"], 660)
+        release.set()
+        for _ in range(100):
+            if svc.refreshes >= 2 and svc.snapshot().constraints["min_lead_minutes"] == 120:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(svc._snap.constraints["min_lead_minutes"], 120)
+
+    def test_failed_refresh_keeps_previous_values(self):
+        state = {"fail": False}
+
+        def fetch():
+            if state["fail"]:
+                raise RuntimeError("upstream down")
+            return PICKUP_OPTS, {}
+
+        svc = ConstraintsService(fetch=fetch, ttl_seconds=-1, stale_seconds=0)
+        self.assertEqual(svc.get()["max_days"], 30)
+        state["fail"] = True
+        snap = svc.snapshot()
+        self.assertEqual(snap.constraints["max_days"], 30)
+        self.assertEqual(snap.error, "upstream down")
+
+    def test_no_data_falls_back_to_defaults(self):
+        def fetch():
+            raise RuntimeError("ECWID_STORE_ID is not set")
+        res = ConstraintsService(fetch=fetch).get()
+        self.assertEqual(res["source"], "defaults")
+        self.assertEqual(res["blackout_dates"], [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+from backend.app import app
+
+_RealAsyncClient = httpx.AsyncClient
+
+
+def _mock_async_client(handler):
+    def factory(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return _RealAsyncClient(*args, **kwargs)
+    return factory
+
+
+async def _slow_ecwid(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(0.3)
+    path = request.url.path
+    if path.endswith("/profile"):
+        return httpx.Response(200, json={"generalInfo": {"storeId": 1, "storeName": "Test"}})
+    if path.endswith("/profile/shippingOptions"):
+        return httpx.Response(200, json=[{"id": "p1", "title": "Nouto", "fulfillmentType": "PICKUP"}])
+    if path.endswith("/orders"):
+        return httpx.Response(200, json={"items": []})
+    if path.endswith("/products"):
+        return httpx.Response(200, json={"items": [{"id": 1, "name": "Karjalanpiirakka", "price": 2.5}]})
+    return httpx.Response(404)
+
+
+ENV = {"ECWID_STORE_ID": "1", "ECWID_API_TOKEN": "t"}
+
+
+class TestEcwidAsyncRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_ecwid_status_runs_calls_concurrently(self):
+        with patch.dict("os.environ", ENV), \
+             patch("httpx.AsyncClient", _mock_async_client(_slow_ecwid)):
+            started = time.monotonic()
+            r = self.client.get("/api/v2/ecwid_status")
+            elapsed = time.monotonic() - started
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertTrue(data["profile_ok"])
+        self.assertEqual(data["storeName"], "Test")
+        self.assertEqual(data["shipping_count"], 1)
+        self.assertEqual(data["orders_get_status"], 200)
+        # three 0.3s upstream calls; sequential would take ~0.9s
+        self.assertLess(elapsed, 0.75)
+
+    def test_ecwid_status_reports_partial_failure(self):
+        async def handler(request):
+            if request.url.path.endswith("/orders"):
+                return httpx.Response(403)
+            if request.url.path.endswith("/profile"):
+                return httpx.Response(401)
+            return await _slow_ecwid(request)
+        with patch.dict("os.environ", ENV), patch("httpx.AsyncClient", _mock_async_client(handler)):
+            data = self.client.get("/api/v2/ecwid_status").json()
+        self.assertFalse(data["profile_ok"])
+        self.assertTrue(data["shipping_ok"])
+        self.assertEqual(data["orders_get_status"], 403)
+
+    def test_products_route_is_async(self):
+        with patch.dict("os.environ", ENV), patch("httpx.AsyncClient", _mock_async_client(_slow_ecwid)):
+            r = self.client.get("/api/v2/products")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["items"][0]["name"], "Karjalanpiirakka")
+
+
+if __name__ == "__main__":
+    unittest.main()
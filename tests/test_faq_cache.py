@@ -0,0 +1,73 @@
+import json
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from backend.app import app
+from backend.faq_repository import FaqRepository
+
+
+class TestFaqResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.repo = FaqRepository()
+        self.repo.reload()
+
+    def test_tree_payload_matches_live_tree(self):
+        payload = self.repo.tree_payload('en')
+        data = json.loads(payload.body.decode('utf-8'))
+        self.assertEqual(data['version'], self.repo.version)
+        self.assertEqual(data['tree'], self.repo.tree('en'))
+        self.assertTrue(payload.etag.startswith(f'"{self.repo.version}-'))
+
+    def test_tree_etag_and_not_modified(self):
+        r = self.client.get('/faq/tree?lang=fi')
+        self.assertEqual(r.status_code, 200)
+        etag = r.headers.get('etag')
+        self.assertTrue(etag)
+        self.assertIn('tree', r.json())
+        r2 = self.client.get('/faq/tree?lang=fi', headers={'If-None-Match': etag})
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(r2.content, b'')
+
+    def test_entries_etag_differs_per_language(self):
+        r_fi = self.client.get('/faq/entries?path=menu&lang=fi')
+        r_en = self.client.get('/faq/entries?path=menu&lang=en')
+        self.assertEqual(r_fi.status_code, 200)
+        self.assertEqual(r_en.status_code, 200)
+        self.assertNotEqual(r_fi.headers['etag'], r_en.headers['etag'])
+        r2 = self.client.get('/faq/entries?path=menu&lang=en', headers={'If-None-Match': r_fi.headers['etag']})
+        self.assertEqual(r2.status_code, 200)
+
+    def test_parent_path_aggregates_descendants_in_entry_order(self):
+        parent = ('menu',)
+        self.assertNotIn(parent, self.repo._items_by_path)
+        items = self.repo.entries_for(list(parent), 'fi')
+        expected = [
+            it for path, lst in self.repo._items_by_path.items()
+            if path[:1] == parent for it in lst
+        ]
+        self.assertEqual(len(items), len(expected))
+        orders = [self.repo._records_by_question[it['question']['fi']].order
+                  for it in items if it['question']['fi'] in self.repo._records_by_question]
+        self.assertEqual(orders, sorted(orders))
+
+    def test_refresh_swaps_snapshot(self):
+        before = FaqRepository.instance()
+        after = FaqRepository.refresh()
+        self.assertIsNot(before, after)
+        self.assertIs(FaqRepository.instance(), after)
+        self.assertEqual(before.tree_payload('fi').etag, after.tree_payload('fi').etag)
+
+    def test_request_path_does_not_stat_sources(self):
+        FaqRepository.instance()
+        with patch('backend.faq_repository._source_mtimes', side_effect=AssertionError('stat on request path')):
+            r = self.client.get('/faq/tree?lang=fi')
+            self.assertEqual(r.status_code, 200)
+
+    def test_unknown_path_is_404(self):
+        r = self.client.get('/faq/entries?path=does-not-exist&lang=fi')
+        self.assertEqual(r.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
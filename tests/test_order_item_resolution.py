@@ -0,0 +1,115 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from backend.app import app
+from backend.constraints_service import ConstraintsService
+import backend.intent_router as IR
+import backend.routers.orders as orders
+from backend.order_queue import OrderQueue
+
+
+def _thursday_noon_next_week() -> str:
+    now = datetime.now()
+    days_ahead = ((3 - now.weekday()) % 7) + 7
+    dt = (now + timedelta(days=days_ahead)).replace(hour=12, minute=0, second=0, microsecond=0)
+    return dt.strftime('%Y-%m-%dT%H:%M')
+
+
+CATALOG = [
+    {"id": 1, "sku": "00001", "name": "Karjalanpiirakka", "price": 2.5, "weight": 0.1},
+    {"id": 2, "sku": "00002", "name": "Mustikkakukko", "price": 12.0, "weight": 0.8},
+]
+
+
+class TestOrderItemResolution(unittest.TestCase):
+    def setUp(self):
+        IR._CACHE.clear()
+        IR._PRODUCT_INDEX.clear()
+        self.gets = []
+        self.posted = {}
+        self.lock = threading.Lock()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = OrderQueue(str(Path(self.tmp.name) / "q.sqlite3"), orders._submit_to_ecwid, autostart=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fake_client(self):
+        test = self
+
+        class FakeResp:
+            def __init__(self, status_code, data):
+                self.status_code = status_code
+                self._data = data
+                self.text = ""
+
+            def json(self):
+                return self._data
+
+            def raise_for_status(self):
+                return None
+
+        class FakeClient:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, exc_type, exc, tb):
+                return False
+
+            def get(self, url, headers=None, params=None):
+                with test.lock:
+                    test.gets.append(url)
+                if url.endswith("/products/3"):
+                    return FakeResp(200, {"id": 3, "name": "Samosa", "price": 4.0})
+                return FakeResp(404, {})
+
+            def post(self, url, headers=None, json=None):
+                test.posted = json
+                return FakeResp(200, {"id": 9, "orderNumber": "T9"})
+
+        return FakeClient
+
+    def test_catalog_hits_skip_upstream_and_misses_are_fetched(self):
+        env = {"ENABLE_CHAT_ORDERING": "true", "ECWID_STORE_ID": "1", "ECWID_API_TOKEN": "t"}
+        payload = {
+            "items": [
+                {"productId": 1, "quantity": 2},
+                {"sku": "00002", "quantity": 1},
+                {"productId": 3, "quantity": 1},
+            ],
+            "name": "Test",
+            "pickup_time": _thursday_noon_next_week(),
+        }
+        with patch.dict("os.environ", env), \
+             patch.object(IR.ecwid, "get_products", lambda limit=100, category=None: CATALOG), \
+             patch("backend.routers.orders.get_constraints_service", return_value=ConstraintsService(fetch=lambda: ([], {}))), \
+             patch("backend.routers.orders._order_queue", return_value=self.queue), \
+             patch("backend.routers.orders.httpx.Client", self._fake_client()):
+            r = TestClient(app).post("/api/v2/order", json=payload)
+            self.assertEqual(r.status_code, 202, r.text)
+            self.queue.run_pending()
+        self.assertEqual(self.queue.get(r.json()["ref"])["status"], "submitted")
+        self.assertEqual(self.gets, ["https://app.ecwid.com/api/v3/1/products/3"])
+        items = self.posted["items"]
+        self.assertEqual([i["name"] for i in items], ["Karjalanpiirakka", "Mustikkakukko", "Samosa"])
+        self.assertEqual(items[1]["price"], 12.0)
+        self.assertEqual(items[0]["weight"], 0.1)
+
+    def test_product_indexes_reused_until_refetch(self):
+        with patch.object(IR.ecwid, "get_products", lambda limit=100, category=None: CATALOG):
+            a = IR.product_indexes()
+            b = IR.product_indexes()
+        self.assertIs(a[0], b[0])
+        self.assertEqual(a[1]["00002"]["id"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,290 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from fastapi.testclient import TestClient
+from backend.app import app
+from backend.constraints_service import ConstraintsService
+from backend.order_queue import IdempotencyConflict, OrderQueue
+import backend.order_queue as order_queue
+import backend.routers.orders as orders
+
+
+class _EcwidStandIn(BaseHTTPRequestHandler):
+    """Local Ecwid orders API with scripted faults.
+
+    server.faults is consumed one entry per POST /orders: "503" answers with an
+    error, "drop" stores the order but closes the connection without a response,
+    "400" rejects it.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, data):
+        raw = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/orders"):
+            kw = (parse_qs(url.query).get("keywords") or [""])[0]
+            with self.server.lock:
+                items = [o for o in self.server.orders if kw and kw in o.get("customerComment", "")]
+            self._json(200, {"items": items})
+            return
+        self._json(404, {})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = urlparse(self.path).path
+        if path.endswith("/orders/calculate"):
+            self._json(404, {"errorMessage": "not supported"})
+            return
+        with self.server.lock:
+            fault = self.server.faults.pop(0) if self.server.faults else None
+            if fault == "503":
+                self._json(503, {"errorMessage": "busy"})
+                return
+            if fault == "400":
+                self._json(400, {"errorMessage": "Invalid pickup time"})
+                return
+            n = len(self.server.orders) + 1
+            order = {**body, "id": 1000 + n, "orderNumber": f"T{n}"}
+            self.server.orders.append(order)
+        if fault == "drop":
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self._json(200, {"id": order["id"], "orderNumber": order["orderNumber"]})
+
+
+BODY = {"items": [{"sku": "00001", "name": "Karjalanpiirakka", "price": 2.5, "quantity": 2}], "customerComment": "Pickup"}
+
+
+class OrderQueueTestBase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _EcwidStandIn)
+        self.server.faults = []
+        self.server.orders = []
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "orders.sqlite3")
+        self.queue = OrderQueue(self.path, orders._submit_to_ecwid, retry_base_seconds=0, autostart=False)
+        self.env = patch.dict("os.environ", {
+            "ECWID_API_BASE": f"http://127.0.0.1:{self.server.server_address[1]}/api/v3",
+            "ECWID_STORE_ID": "1",
+            "ECWID_API_TOKEN": "t",
+            "ENABLE_CHAT_ORDERING": "true",
+        })
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+
+class TestOrderQueueRetries(OrderQueueTestBase):
+    def test_retries_transient_errors_then_submits_once(self):
+        self.server.faults = ["503", "503"]
+        intent = self.queue.enqueue("k1", BODY)
+        self.assertEqual(intent["status"], "pending")
+        self.queue.run_pending()
+        done = self.queue.get(intent["ref"])
+        self.assertEqual(done["status"], "submitted")
+        self.assertEqual(done["attempts"], 3)
+        self.assertEqual(done["orderNumber"], "T1")
+        self.assertEqual(len(self.server.orders), 1)
+
+    def test_lost_response_does_not_duplicate(self):
+        self.server.faults = ["drop"]
+        intent = self.queue.enqueue("k2", BODY)
+        self.queue.run_pending()
+        done = self.queue.get(intent["ref"])
+        self.assertEqual(done["status"], "submitted")
+        self.assertEqual(done["attempts"], 2)
+        self.assertEqual(len(self.server.orders), 1)
+        self.assertIn(f"Ref: {intent['ref']}", self.server.orders[0]["customerComment"])
+
+    def test_client_error_fails_without_retry(self):
+        self.server.faults = ["400"]
+        intent = self.queue.enqueue("k3", BODY)
+        self.queue.run_pending()
+        done = self.queue.get(intent["ref"])
+        self.assertEqual(done["status"], "failed")
+        self.assertEqual(done["attempts"], 1)
+        self.assertEqual(done["error"], "Invalid pickup time")
+
+    def test_gives_up_after_max_attempts(self):
+        queue = OrderQueue(self.path, orders._submit_to_ecwid, max_attempts=2, retry_base_seconds=0, autostart=False)
+        self.server.faults = ["503"] * 5
+        intent = queue.enqueue("k4", BODY)
+        queue.run_pending()
+        self.assertEqual(queue.get(intent["ref"])["status"], "failed")
+        self.assertEqual(self.server.orders, [])
+
+    def test_interrupted_submission_resumes_after_restart(self):
+        intent = self.queue.enqueue("k5", BODY)
+        self.queue._claim_due()  # simulate a crash mid-submission
+        self.assertEqual(self.queue.get(intent["ref"])["status"], "submitting")
+        # Opening the queue again (another worker starting) leaves a live claim alone
+        reopened = OrderQueue(self.path, orders._submit_to_ecwid, retry_base_seconds=0, autostart=False)
+        self.assertEqual(reopened.run_pending(), 0)
+        self.assertEqual(reopened.get(intent["ref"])["status"], "submitting")
+        # Once the claim has expired the intent is taken over and submitted once
+        expired = OrderQueue(self.path, orders._submit_to_ecwid, retry_base_seconds=0,
+                             claim_timeout_seconds=0, autostart=False)
+        self.assertEqual(expired.run_pending(), 1)
+        self.assertEqual(expired.get(intent["ref"])["status"], "submitted")
+        self.assertEqual(expired.get(intent["ref"])["attempts"], 2)
+        self.assertEqual(len(self.server.orders), 1)
+
+    def test_two_queues_on_one_file_submit_each_ref_once(self):
+        calls, release = {}, threading.Event()
+
+        def submit(ref, body, attempt):
+            calls[ref] = calls.get(ref, 0) + 1
+            release.wait(5)
+            return orders._submit_to_ecwid(ref, body, attempt)
+
+        first = OrderQueue(self.path, submit, retry_base_seconds=0, autostart=False)
+        refs = [first.enqueue(f"k{i}", BODY)["ref"] for i in range(3)]
+        def wait_for_calls(n):
+            deadline = time.monotonic() + 5
+            while len(calls) < n and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        workers = [threading.Thread(target=first.run_pending)]
+        workers[0].start()
+        wait_for_calls(1)
+        # A second worker opening the file while the first is mid-submission must not take
+        # over its claim; it goes on to the next pending intent instead
+        second = OrderQueue(self.path, submit, retry_base_seconds=0, autostart=False)
+        workers.append(threading.Thread(target=second.run_pending))
+        workers[1].start()
+        wait_for_calls(2)
+        release.set()
+        for worker in workers:
+            worker.join(10)
+        self.assertEqual(calls, {ref: 1 for ref in refs})
+        self.assertEqual(len(self.server.orders), 3)
+        for ref in refs:
+            self.assertEqual(second.get(ref)["status"], "submitted")
+
+    def test_two_queues_enqueueing_one_key_share_the_intent(self):
+        first = self.queue.enqueue("k6", BODY)
+        second = OrderQueue(self.path, orders._submit_to_ecwid, retry_base_seconds=0, autostart=False)
+        real_find = second._find_row
+        lookups = []
+
+        def racing_find(*args):
+            # Each enqueue's first lookup runs before the first worker's INSERT landed
+            lookups.append(args)
+            return None if len(lookups) % 2 else real_find(*args)
+
+        with patch.object(second, "_find_row", side_effect=racing_find):
+            again = second.enqueue("k6", BODY)
+            self.assertEqual((again["ref"], again["created"]), (first["ref"], False))
+            with self.assertRaises(IdempotencyConflict):
+                second.enqueue("k6", dict(BODY, customerComment="Other"))
+        self.assertEqual(len(second.intents()), 1)
+
+
+    def test_startup_resumes_intents_left_by_a_previous_process(self):
+        intent = self.queue.enqueue("k7", BODY)  # accepted, then the process restarted
+        missing = str(Path(self.tmp.name) / "missing.sqlite3")
+        with patch("backend.order_queue.ORDER_QUEUE_PATH", missing), patch("backend.order_queue._QUEUE", None):
+            orders.resume_pending_orders()
+            self.assertFalse(Path(missing).exists())
+        with patch("backend.order_queue.ORDER_QUEUE_PATH", self.path), patch("backend.order_queue._QUEUE", None):
+            orders.resume_pending_orders()
+            resumed = order_queue._QUEUE
+            try:
+                deadline = time.monotonic() + 5
+                while resumed.get(intent["ref"])["status"] != "submitted" and time.monotonic() < deadline:
+                    time.sleep(0.02)
+            finally:
+                resumed.stop(join=True)
+        self.assertEqual(self.queue.get(intent["ref"])["status"], "submitted")
+        self.assertEqual(len(self.server.orders), 1)
+
+
+def _thursday_noon_next_week() -> str:
+    today = date.today()
+    d = today + timedelta(days=((3 - today.weekday()) % 7) + 7)
+    return f"{d.isoformat()}T12:00"
+
+
+class TestOrderEndpointIdempotency(OrderQueueTestBase):
+    def _post(self, payload, key):
+        # A pickup option with an id exercises the shipping-option lookup in the handler
+        pickup = {"id": "1000-pickup", "title": "Nouto", "fulfilmentType": "pickup"}
+        service = ConstraintsService(fetch=lambda: ([pickup], {}))
+        with patch("backend.routers.orders.get_constraints_service", return_value=service), \
+             patch("backend.routers.orders._order_queue", return_value=self.queue):
+            return TestClient(app).post("/api/v2/order", json=payload, headers={"Idempotency-Key": key})
+
+    def test_same_key_returns_same_pending_reference(self):
+        payload = {
+            "items": [{"sku": "00001", "name": "Karjalanpiirakka", "price": 2.5, "quantity": 2}],
+            "name": "Test",
+            "pickup_time": _thursday_noon_next_week(),
+        }
+        r1 = self._post(payload, "abc")
+        r2 = self._post(payload, "abc")
+        self.assertEqual(r1.status_code, 202, r1.text)
+        self.assertEqual(r1.json()["status"], "pending")
+        self.assertTrue(r1.json()["created"])
+        self.assertEqual(r2.json()["ref"], r1.json()["ref"])
+        self.assertFalse(r2.json()["created"])
+        self.queue.run_pending()
+        with patch("backend.routers.orders._order_queue", return_value=self.queue):
+            status = TestClient(app).get(f"/api/v2/order/{r1.json()['ref']}").json()
+        self.assertEqual(status["status"], "submitted")
+        self.assertEqual(status["orderNumber"], "T1")
+        self.assertEqual(len(self.server.orders), 1)
+
+    def test_distinct_keys_create_distinct_intents(self):
+        payload = {
+            "items": [{"sku": "00001", "name": "Karjalanpiirakka", "price": 2.5, "quantity": 2}],
+            "name": "Test",
+            "pickup_time": _thursday_noon_next_week(),
+        }
+        r1 = self._post(payload, "first")
+        r2 = self._post(payload, "second")
+        self.assertTrue(r2.json()["created"])
+        self.assertNotEqual(r1.json()["ref"], r2.json()["ref"])
+        self.assertEqual(len(self.queue.intents()), 2)
+
+    def test_key_reused_for_other_order_conflicts(self):
+        payload = {
+            "items": [{"sku": "00001", "name": "Karjalanpiirakka", "price": 2.5, "quantity": 2}],
+            "name": "Test",
+            "pickup_time": _thursday_noon_next_week(),
+        }
+        self.assertEqual(self._post(payload, "xyz").status_code, 202)
+        payload["items"][0]["quantity"] = 3
+        self.assertEqual(self._post(payload, "xyz").status_code, 409)
+
+    def test_unknown_reference(self):
+        with patch("backend.routers.orders._order_queue", return_value=self.queue):
+            self.assertEqual(TestClient(app).get("/api/v2/order/nope").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from backend.app import app
+from backend.constraints_service import ConstraintsService
+import backend.routers.orders as orders
+from backend.time_rules import BlackoutIndex, pickup_slots, validate_pickup_time
+
+
+def _next_weekday(dow: int, weeks: int = 1) -> date:
+    today = date.today()
+    return today + timedelta(days=((dow - today.weekday()) % 7) + 7 * weeks)
+
+
+class TestPickupSlotsRules(unittest.TestCase):
+    def test_lead_time_and_exceptions(self):
+        thu = date(2025, 10, 16)
+        earliest = datetime(2025, 10, 16, 13, 30)
+        out = pickup_slots(
+            thu, 3, earliest, None, BlackoutIndex([]),
+            exceptions={"2025-10-17": [("12:00", "14:00")]},
+        )
+        self.assertEqual(out[0], {"date": "2025-10-16", "slots": ["14:00", "15:00", "16:00", "17:00"]})
+        self.assertEqual(out[1], {"date": "2025-10-17", "slots": ["12:00", "13:00", "14:00"]})
+        self.assertEqual(out[2]["date"], "2025-10-18")
+
+    def test_last_day_and_closed_exception(self):
+        out = pickup_slots(
+            date(2025, 10, 16), 14, datetime(2025, 10, 1), date(2025, 10, 23), BlackoutIndex([]),
+            exceptions={"2025-10-17": []},
+        )
+        self.assertEqual([d["date"] for d in out], ["2025-10-16", "2025-10-18", "2025-10-23"])
+
+
+class TestPickupSlotsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        orders._SLOTS_CACHE.clear()
+        self.blackout = _next_weekday(3)  # a Thursday next week
+        opts = [{
+            "fulfillmentTimeInMinutes": 60,
+            "availabilityPeriod": "ONE_MONTH",
+            "blackoutDates": [{"fromDate": self.blackout.isoformat(), "toDate": self.blackout.isoformat()}],
+        }]
+        self.service = ConstraintsService(fetch=lambda: (opts, {}), ttl_seconds=60)
+
+    def _get(self, url="/api/v2/pickup_slots"):
+        with patch("backend.routers.orders.get_constraints_service", return_value=self.service):
+            return self.client.get(url)
+
+    def test_slots_agree_with_order_validation(self):
+        r = self._get()
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data["max_days"], 30)
+        self.assertIn(self.blackout.isoformat(), data["blackout_dates"])
+        dates = [d["date"] for d in data["dates"]]
+        self.assertNotIn(self.blackout.isoformat(), dates)
+        self.assertEqual(data["first_available"], dates[0])
+        now = datetime.now()
+        for d in data["dates"]:
+            for t in d["slots"]:
+                iso = f"{d['date']}T{t}"
+                self.assertEqual(validate_pickup_time(iso), (True, None), iso)
+                dt = datetime.strptime(iso, "%Y-%m-%dT%H:%M")
+                self.assertGreaterEqual(dt, now + timedelta(minutes=60))
+                self.assertLessEqual(dt.date(), (now + timedelta(days=30)).date())
+
+    def test_hours_exception_closes_day(self):
+        fri = _next_weekday(4)
+        with patch("backend.routers.orders._hours_exceptions", return_value={fri.isoformat(): []}):
+            data = self._get(f"/api/v2/pickup_slots?from={fri.isoformat()}&days=2").json()
+        self.assertEqual([d["date"] for d in data["dates"]], [(fri + timedelta(days=1)).isoformat()])
+
+    def test_cached_within_hour(self):
+        with patch("backend.routers.orders.pickup_slots", wraps=pickup_slots) as spy:
+            self._get()
+            self._get()
+        self.assertEqual(spy.call_count, 1)
+
+    def test_invalid_from(self):
+        self.assertEqual(self._get("/api/v2/pickup_slots?from=tomorrow").status_code, 400)
+
+    def test_blackouts_come_from_the_same_snapshot(self):
+        first = self.service.snapshot()
+        refreshed = replace(first, constraints={**first.constraints, "blackout_dates": []})
+        # A refresh lands right after the handler read its snapshot
+        with patch.object(self.service, "snapshot", side_effect=[first, refreshed, refreshed]):
+            data = self._get().json()
+        self.assertIn(self.blackout.isoformat(), data["blackout_dates"])
+        self.assertNotIn(self.blackout.isoformat(), [d["date"] for d in data["dates"]])
+
+
+class TestPickupBatch(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.blackout = _next_weekday(4)  # a Friday next week
+        opts = [{
+            "fulfillmentTimeInMinutes": 120,
+            "availabilityPeriod": "ONE_MONTH",
+            "blackoutDates": [{"fromDate": self.blackout.isoformat(), "toDate": self.blackout.isoformat()}],
+        }]
+        self.service = ConstraintsService(fetch=lambda: (opts, {}), ttl_seconds=60)
+
+    def _post(self, times):
+        with patch("backend.routers.orders.get_constraints_service", return_value=self.service):
+            return self.client.post("/api/v2/check_pickup_batch", json={"times": times})
+
+    def test_per_item_verdicts(self):
+        thu = _next_weekday(3)
+        far_thu = _next_weekday(3, weeks=6)
+        times = [
+            f"{thu.isoformat()}T12:00",
+            f"{thu.isoformat()}T20:00",
+            f"{self.blackout.isoformat()}T12:00",
+            f"{far_thu.isoformat()}T12:00",
+            "not-a-time",
+        ]
+        with patch.object(self.service, "snapshot", wraps=self.service.snapshot) as spy:
+            r = self._post(times)
+        self.assertEqual(spy.call_count, 1)  # constraints and blackouts from one snapshot
+        self.assertEqual(r.status_code, 200)
+        res = r.json()["results"]
+        self.assertEqual([x["iso"] for x in res], times)
+        self.assertEqual([x["ok"] for x in res], [True, False, False, False, False])
+        self.assertEqual(res[1]["reason"], "Outside pickup hours.")
+        self.assertIn("blackout", res[2]["reason"])
+        self.assertIn("days ahead", res[3]["reason"])
+
+    def test_lead_time_rejected(self):
+        soon = datetime.now() + timedelta(minutes=30)
+        iso = soon.strftime("%Y-%m-%dT%H:%M")
+        with patch("backend.routers.orders.validate_pickup_time", return_value=(True, None)):
+            res = self._post([iso]).json()["results"][0]
+        self.assertFalse(res["ok"])
+        self.assertIn("at least 2 hours", res["reason"])
+
+    def test_batch_size_limit(self):
+        self.assertEqual(self._post(["2025-01-01T12:00"] * 201).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import unittest
+from collections import Counter
+from math import log
+from pathlib import Path
+
+_RAG_SRC = Path(__file__).resolve().parents[1] / "kotileipomo-rag" / "src"
+if str(_RAG_SRC) not in sys.path:
+    sys.path.insert(0, str(_RAG_SRC))
+
+from rag.ingest import Doc, chunk_docs, load_kb_docs
+from rag.index_bm25 import BM25Index
+from rag.tokenize import tokenize_list
+
+QUERIES = [
+    "Käytättekö ympäristöystävällisiä pakkauksia?",
+    "Mitkä ovat aukioloajat?",
+    "vegaaninen samosa samosa",
+    "Can I pay by card?",
+    "Har ni laktosfria produkter?",
+    "zzzz-no-such-term",
+]
+
+
+def _reference_search(docs, query, top_k):
+    """Full-scan BM25 the index must reproduce exactly."""
+    toks = [tokenize_list(d.text) for d in docs]
+    df = Counter(t for ts in toks for t in set(ts))
+    n = len(docs)
+    avg = sum(len(ts) for ts in toks) / max(1, n)
+    q = tokenize_list(query)
+    scored = []
+    for d, ts in zip(docs, toks):
+        if not ts:
+            continue
+        tf = Counter(ts)
+        s = 0.0
+        for qt in q:
+            if not df.get(qt):
+                continue
+            idf = log(1 + (n - df[qt] + 0.5) / (df[qt] + 0.5))
+            f = tf.get(qt, 0)
+            s += idf * ((f * 2.4) / ((f + 1.4 * (1 - 0.75 + 0.75 * (len(ts) / (avg or 1)))) or 1))
+        if s > 0:
+            scored.append((s, d))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:top_k]
+
+
+class TestBM25Postings(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.docs = chunk_docs(load_kb_docs())
+        cls.index = BM25Index(cls.docs)
+
+    def test_matches_full_scan_scores_and_order(self):
+        for q in QUERIES:
+            got = self.index.search(q, top_k=20)
+            want = _reference_search(self.docs, q, 20)
+            self.assertEqual([d.id for _, d in got], [d.id for _, d in want], q)
+            for (gs, _), (ws, _) in zip(got, want):
+                self.assertAlmostEqual(gs, ws, places=9)
+
+    def test_returns_indexed_docs_not_copies(self):
+        hits = self.index.search("Mitkä ovat aukioloajat?", top_k=3)
+        self.assertTrue(hits)
+        for _, d in hits:
+            self.assertTrue(any(d is src for src in self.docs))
+
+    def test_language_partitions_keep_corpus_wide_scores(self):
+        self.assertEqual(self.index.langs, ["en", "fi", "sv"])
+        for q in QUERIES:
+            everything = self.index.search(q, top_k=len(self.docs))
+            for lang in ("fi", "sv", "en"):
+                want = [(s, d.id) for s, d in everything if d.meta.get("lang") == lang][:5]
+                self.assertEqual([(s, d.id) for s, d in self.index.search(q, top_k=5, lang=lang)], want, (q, lang))
+            if everything:
+                self.assertLessEqual(everything[0][0], self.index.max_score(q) + 1e-9)
+        self.assertEqual(self.index.search("aukioloajat", lang="de"), [])
+
+    def test_ties_keep_corpus_order_and_empty_docs(self):
+        docs = [Doc("a", "", {}), Doc("b", "pulla", {}), Doc("c", "pulla", {}), Doc("d", "leipä", {})]
+        index = BM25Index(docs)
+        self.assertEqual([d.id for _, d in index.search("pulla")], ["b", "c"])
+        self.assertEqual(index.search(""), [])
+        self.assertEqual(index.N, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys
+import unittest
+from pathlib import Path
+
+_RAG_SRC = Path(__file__).resolve().parents[1] / "kotileipomo-rag" / "src"
+if str(_RAG_SRC) not in sys.path:
+    sys.path.insert(0, str(_RAG_SRC))
+
+from rag.cache import LRUCache, QueryCache
+from rag.generate import compose_answer
+from rag.index_bm25 import BM25Index
+from rag.ingest import Doc, chunk_docs, load_kb_docs
+from rag.retrieve import Retriever
+
+
+class _CountingRetriever(Retriever):
+    def __init__(self, bm25):
+        super().__init__(bm25)
+        self.calls = 0
+
+    def retrieve(self, query, lang, top_k=8):
+        self.calls += 1
+        return super().retrieve(query, lang, top_k)
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction_and_stats(self):
+        cache = LRUCache(2)
+        cache.put("a", [])
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), [])  # falsy values are still hits
+        cache.put("c", "C")
+        self.assertIsNone(cache.get("b"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["entries"]), (1, 1, 1, 2))
+
+
+class TestQueryCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.bm25 = BM25Index(chunk_docs(load_kb_docs()))
+
+    def test_repeated_queries_reuse_hits_and_answers(self):
+        ret = _CountingRetriever(self.bm25)
+        composed = []
+        cache = QueryCache(lambda q, hits, lang: composed.append(q) or compose_answer(q, hits, lang))
+        first = cache.answer(ret, "Kan jag betala med kort?", "sv", top_k=6)
+        self.assertEqual(first, compose_answer("Kan jag betala med kort?", ret.retrieve("Kan jag betala med kort?", "sv", 6), "sv"))
+        ret.calls = 0
+        self.assertEqual(cache.answer(ret, "  kan jag BETALA med kort?", "sv", top_k=6), first)
+        self.assertEqual((ret.calls, len(composed)), (0, 1))
+        # The hit list is keyed by the normalized query: punctuation differences share it
+        cache.answer(ret, "Kan jag betala med kort", "sv", top_k=6)
+        self.assertEqual((ret.calls, len(composed)), (0, 2))
+        # Language and top_k are part of the key
+        cache.answer(ret, "Kan jag betala med kort?", "fi", top_k=6)
+        cache.retrieve(ret, "Kan jag betala med kort?", "sv", top_k=3)
+        self.assertEqual(ret.calls, 2)
+        stats = cache.stats()
+        self.assertEqual((stats["answers"]["hits"], stats["answers"]["misses"]), (1, 3))
+        self.assertEqual((stats["hits"]["hits"], stats["hits"]["misses"]), (1, 3))
+
+    def test_compose_change_keeps_hits_and_new_index_misses(self):
+        ret = _CountingRetriever(self.bm25)
+        cache = QueryCache(compose_answer)
+        cache.answer(ret, "Mitkä ovat aukioloajat?", "fi")
+        cache.set_compose(lambda q, hits, lang: f"{len(hits)} hits")
+        self.assertEqual(cache.answer(ret, "Mitkä ovat aukioloajat?", "fi"), f"{len(ret.retrieve('Mitkä ovat aukioloajat?', 'fi'))} hits")
+        self.assertEqual(ret.calls, 2)  # the first answer plus the direct call above
+
+        rebuilt = _CountingRetriever(BM25Index([Doc("x", "aukioloajat", {"lang": "fi"})]))
+        self.assertNotEqual(rebuilt.index_version, ret.index_version)
+        self.assertEqual(cache.answer(rebuilt, "Mitkä ovat aukioloajat?", "fi"), "1 hits")
+        self.assertEqual(rebuilt.calls, 1)
+        # Same docs, same version, even for a separately built index
+        self.assertEqual(Retriever(BM25Index(chunk_docs(load_kb_docs()))).index_version, ret.index_version)
+
+    def test_clock_times_are_not_merged_by_normalization(self):
+        cache = QueryCache(compose_answer)
+        ret = Retriever(self.bm25)
+        for q in ("Voinko noutaa 19:00?", "Voinko noutaa 19 00?"):
+            self.assertEqual(cache.answer(ret, q, "fi"), compose_answer(q, ret.retrieve(q, "fi"), "fi"), q)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+_RAG_SRC = Path(__file__).resolve().parents[1] / "kotileipomo-rag" / "src"
+if str(_RAG_SRC) not in sys.path:
+    sys.path.insert(0, str(_RAG_SRC))
+
+from rag.index_bm25 import BM25Index
+from rag.index_embeddings import EmbIndex, load_or_build_emb, np
+from rag.index_store import IndexArtifactError
+from rag.ingest import Doc, chunk_docs, load_kb_docs
+from rag.retrieve import Retriever
+
+DOCS = [
+    Doc("pack", "Käytämme ympäristöystävällisiä pakkauksia.", {"lang": "fi"}),
+    Doc("hours", "Olemme avoinna torstaista lauantaihin.", {"lang": "fi"}),
+    Doc("vegan", "Meiltä löytyy vegaanisia leivonnaisia.", {"lang": "fi"}),
+]
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestEmbIndex(unittest.TestCase):
+    def test_inflected_query_matches_without_stemmer(self):
+        emb = EmbIndex()
+        emb.build(DOCS)
+        self.assertTrue(emb.ready)
+        self.assertEqual(emb.search("pakkauksistanne", top_k=1)[0][1].id, "pack")
+        self.assertEqual(emb.search("vegaanisista leivonnaisistanne", top_k=1)[0][1].id, "vegan")
+        # BM25's suffix stemmer does not reduce this form to a shared token
+        self.assertEqual(BM25Index(DOCS).search("pakkauksistanne"), [])
+        self.assertEqual(emb.search("zzzz"), [])
+
+    def test_svd_projection_and_round_trip(self):
+        docs = chunk_docs(load_kb_docs())
+        emb = EmbIndex(svd_dim=32)
+        emb.build(docs)
+        self.assertEqual(emb.vectors.shape, (len(docs), 32))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "rag_emb.npz")
+            emb.save(path, source_digest="abc")
+            loaded = EmbIndex.load(docs, path, expect_digest="abc")
+            for q in ("pakkauksistanne", "Har ni veganska produkter?"):
+                self.assertEqual(
+                    [(round(s, 5), d.id) for s, d in loaded.search(q, top_k=5)],
+                    [(round(s, 5), d.id) for s, d in emb.search(q, top_k=5)],
+                )
+            with self.assertRaises(IndexArtifactError):
+                EmbIndex.load(docs, path, expect_digest="other")
+            with self.assertRaises(IndexArtifactError):
+                EmbIndex.load(docs[:-1], path)
+            fallback, reason = load_or_build_emb(DOCS, str(Path(tmp) / "missing.npz"))
+            self.assertIn("not found", reason)
+            self.assertTrue(fallback.ready)
+
+    def test_ivf_lists_cover_every_row_and_full_probe_is_exact(self):
+        docs = chunk_docs(load_kb_docs())
+        exact = EmbIndex(nlist=0)
+        exact.build(docs)
+        ivf = EmbIndex(nlist=8, nprobe=2)
+        ivf.build(docs)
+        self.assertEqual(len(ivf.centroids), 8)
+        self.assertEqual(sorted(ivf.list_rows.tolist()), list(range(len(docs))))
+        self.assertTrue((ivf.doc_vectors() == exact.vectors).all())
+        queries = ("pakkauksistanne", "Mitkä ovat aukioloajat?", "Do you have vegan products?")
+        for q in queries:
+            want = [(round(s, 5), d.id) for s, d in exact.search(q, top_k=5)]
+            self.assertEqual([(round(s, 5), d.id) for s, d in ivf.search(q, top_k=5, nprobe=8)], want)
+            self.assertEqual([(round(s, 5), d.id) for s, d in ivf.search(q, top_k=5, nprobe=1000)], want)
+            approx = ivf.search(q, top_k=5)
+            self.assertTrue(approx)
+            self.assertLessEqual(approx[0][0], exact.search(q, top_k=1)[0][0] + 1e-6)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "rag_emb.npz")
+            ivf.save(path)
+            loaded = EmbIndex.load(docs, path)
+            self.assertEqual(loaded.list_ptr.tolist(), ivf.list_ptr.tolist())
+            for q in queries:
+                self.assertEqual([d.id for _, d in loaded.search(q, top_k=5, nprobe=2)],
+                                 [d.id for _, d in ivf.search(q, top_k=5, nprobe=2)])
+
+    def test_retriever_unions_dense_hits(self):
+        emb = EmbIndex()
+        emb.build(DOCS)
+        hits = Retriever(BM25Index(DOCS), emb).retrieve("pakkauksistanne", "fi", top_k=3)
+        self.assertEqual(hits[0][1].id, "pack")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+_RAG_SRC = Path(__file__).resolve().parents[1] / "kotileipomo-rag" / "src"
+if str(_RAG_SRC) not in sys.path:
+    sys.path.insert(0, str(_RAG_SRC))
+
+from rag.ingest import chunk_docs, load_kb_docs
+from rag import index_bm25
+from rag.index_bm25 import BM25Index
+from rag.index_store import (
+    IndexArtifactError,
+    kb_source_digest,
+    load_index,
+    load_or_build,
+    read_header,
+    save_index,
+    update_index,
+)
+
+QUERIES = [
+    "Käytättekö ympäristöystävällisiä pakkauksia?",
+    "Mitkä ovat aukioloajat?",
+    "Do you have vegan products?",
+    "Kan jag betala med kort?",
+]
+
+
+class TestRagIndexArtifact(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.built = BM25Index(chunk_docs(load_kb_docs()))
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "rag_index.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_search_is_identical(self):
+        save_index(self.built, self.path, source_digest="abc")
+        loaded = load_index(self.path, expect_digest="abc")
+        self.assertEqual(loaded.N, self.built.N)
+        self.assertEqual(loaded.vocab, self.built.vocab)
+        self.assertAlmostEqual(loaded.avg_len, self.built.avg_len)
+        for q in QUERIES:
+            want = [(s, d.id, d.text, d.meta) for s, d in self.built.search(q, top_k=10)]
+            got = [(s, d.id, d.text, d.meta) for s, d in loaded.search(q, top_k=10)]
+            self.assertEqual(got, want, q)
+        self.assertEqual(loaded.doc_freq("pakkaus"), self.built.doc_freq("pakkaus"))
+        header = read_header(self.path)
+        self.assertEqual(header["postings"], len(self.built.post_docs))
+        self.assertEqual(header["source_digest"], "abc")
+
+    def test_stale_or_foreign_artifacts_are_rejected(self):
+        save_index(self.built, self.path, source_digest="old")
+        with self.assertRaises(IndexArtifactError):
+            load_index(self.path, expect_digest="new")
+        Path(self.path).write_bytes(b"not an index")
+        with self.assertRaises(IndexArtifactError):
+            load_index(self.path)
+        with self.assertRaises(IndexArtifactError):
+            load_index(str(Path(self.tmp.name) / "missing.bin"))
+
+    def test_load_or_build_falls_back_when_kb_changes(self):
+        kb = Path(self.tmp.name) / "kb"
+        kb.mkdir()
+        faq = [{"q": {"fi": "Onko teillä pullaa?"}, "a": {"fi": "Kyllä, kanelipullaa."}}]
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        save_index(BM25Index(chunk_docs(load_kb_docs(str(kb)))), self.path, source_digest=kb_source_digest(str(kb)))
+        index, reason = load_or_build(self.path, str(kb))
+        self.assertIsNone(reason)
+        self.assertIsNotNone(index.backing)
+
+        faq.append({"q": {"fi": "Onko teillä leipää?"}, "a": {"fi": "Ruisleipää."}})
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        index, reason = load_or_build(self.path, str(kb))
+        self.assertIn("changed", reason)
+        self.assertEqual(index.N, 2)
+        self.assertEqual(index.search("leipää")[0][1].id, "faq:1:fi")
+
+    def test_update_tokenizes_only_changed_docs(self):
+        kb = Path(self.tmp.name) / "kb"
+        kb.mkdir()
+        faq = [
+            {"q": {"fi": "Onko teillä pullaa?", "en": "Do you have buns?"}, "a": {"fi": "Kanelipullaa.", "en": "Cinnamon buns."}},
+            {"q": {"fi": "Onko teillä leipää?"}, "a": {"fi": "Ruisleipää."}},
+            {"q": {"fi": "Voiko maksaa kortilla?"}, "a": {"fi": "Kyllä."}},
+        ]
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        _, delta = update_index(self.path, str(kb))
+        self.assertEqual((delta.added, delta.changed, delta.removed, delta.unchanged), (4, 0, 0, 0))
+        _, delta = update_index(self.path, str(kb))
+        self.assertTrue(delta.empty)
+
+        faq[1]["a"]["fi"] = "Ruisleipää ja limppua."
+        faq[2] = {"q": {"sv": "Kan jag betala med kort?"}, "a": {"sv": "Ja."}}
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        tokenized = []
+        real = index_bm25.tokenize_list
+        with mock.patch.object(index_bm25, "tokenize_list", lambda text: tokenized.append(text) or real(text)):
+            updated, delta = update_index(self.path, str(kb))
+        self.assertEqual((delta.added, delta.changed, delta.removed, delta.unchanged), (1, 1, 1, 2))
+        self.assertEqual(sorted(tokenized), ["Q: Kan jag betala med kort?\nA: Ja.", "Q: Onko teillä leipää?\nA: Ruisleipää ja limppua."])
+
+        full = BM25Index(chunk_docs(load_kb_docs(str(kb))))
+        loaded = load_index(self.path, expect_digest=kb_source_digest(str(kb)))
+        for index in (updated, loaded):
+            self.assertEqual(index.vocab, full.vocab)
+            self.assertEqual(list(index.post_weights), list(full.post_weights))
+            for q in ("limppua", "pullaa", "kort"):
+                self.assertEqual([(s, d.id) for s, d in index.search(q)], [(s, d.id) for s, d in full.search(q)], q)
+
+    def test_update_after_insert_reuses_renumbered_docs(self):
+        kb = Path(self.tmp.name) / "kb"
+        kb.mkdir()
+        faq = [
+            {"q": {"fi": "Onko teillä pullaa?"}, "a": {"fi": "Kanelipullaa."}},
+            {"q": {"fi": "Onko teillä leipää?"}, "a": {"fi": "Ruisleipää."}},
+        ]
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        before, _ = update_index(self.path, str(kb))
+
+        # Inserting at the front shifts every positional id, but only the new entry is tokenized
+        faq.insert(0, {"q": {"fi": "Voiko maksaa kortilla?"}, "a": {"fi": "Kyllä."}})
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        tokenized = []
+        real = index_bm25.tokenize_list
+        with mock.patch.object(index_bm25, "tokenize_list", lambda text: tokenized.append(text) or real(text)):
+            updated, delta = update_index(self.path, str(kb))
+        self.assertEqual(tokenized, ["Q: Voiko maksaa kortilla?\nA: Kyllä."])
+        self.assertEqual((delta.added, delta.changed, delta.removed, delta.unchanged), (1, 0, 0, 2))
+        self.assertEqual(updated.search("leipää")[0][1].id, "faq:2:fi")
+        self.assertNotEqual(updated.version, before.version)
+
+        # Deleting it again restores the old ids, and with them the old version
+        del faq[0]
+        (kb / "faq.json").write_text(json.dumps(faq), encoding="utf-8")
+        restored, delta = update_index(self.path, str(kb))
+        self.assertEqual((delta.added, delta.changed, delta.removed, delta.unchanged), (0, 0, 1, 2))
+        self.assertEqual(restored.version, before.version)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import unittest
+from pathlib import Path
+
+_RAG_SRC = Path(__file__).resolve().parents[1] / "kotileipomo-rag" / "src"
+if str(_RAG_SRC) not in sys.path:
+    sys.path.insert(0, str(_RAG_SRC))
+
+from rag.index_bm25 import BM25Index
+from rag.ingest import Doc, chunk_docs, load_kb_docs
+from rag.retrieve import Retriever
+
+
+class _FixedEmb:
+    """Dense stand-in returning preset hits, with scores on an arbitrary scale."""
+
+    ready = True
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    def search(self, query, top_k=20, lang=None):
+        return [h for h in self.hits if lang is None or h[1].meta.get("lang") == lang][:top_k]
+
+
+DOCS = [
+    Doc("a", "kanelipulla ja kahvi", {"lang": "fi"}),
+    Doc("b", "kanelipulla", {"lang": "fi"}),
+    Doc("c", "ruisleipä", {"lang": "fi"}),
+    Doc("d", "cinnamon bun", {"lang": "en"}),
+]
+
+
+class TestRetrieverFusion(unittest.TestCase):
+    def test_rank_fusion_ignores_score_scales(self):
+        bm = BM25Index(DOCS)
+        by_id = {d.id: d for d in DOCS}
+        ids = []
+        for scale in (1.0, 1000.0):
+            emb = _FixedEmb([(0.9 * scale, by_id["c"]), (0.8 * scale, by_id["a"])])
+            ids.append([d.id for _, d in Retriever(bm, emb).retrieve("kanelipulla", "fi", top_k=4)])
+        self.assertEqual(ids[0], ids[1])
+        # "a" is in both lists, so it beats the dense-only "c" despite c's higher cosine
+        self.assertEqual(ids[0][0], "a")
+        self.assertIn("c", ids[0])
+
+    def test_language_partition_with_weak_match_fallback(self):
+        docs = [Doc("en", "pulla", {"lang": "en"}), Doc("fi", "pulla", {"lang": "fi"}),
+                Doc("fi2", "ruisleipä", {"lang": "fi"}), Doc("x", "pulla", {})]
+        r = Retriever(BM25Index(docs))
+        self.assertEqual([d.id for _, d in r.retrieve("pulla", "fi")], ["fi"])
+        self.assertEqual([d.id for _, d in r.retrieve("pulla", "en")], ["en"])
+        # No Swedish partition, and no English doc mentions leipä: search every language
+        self.assertEqual([d.id for _, d in r.retrieve("ruisleipä", "sv")], ["fi2"])
+        self.assertEqual([d.id for _, d in r.retrieve("ruisleipä", "en")], ["fi2"])
+        # Only the common term matches in English: weak, so every language is searched
+        self.assertEqual([d.id for _, d in r.retrieve("pulla ruisleipä", "en")], ["en", "fi2", "fi", "x"])
+
+    def test_kb_queries_prefer_matching_language_and_faq(self):
+        r = Retriever(BM25Index(chunk_docs(load_kb_docs())))
+        for q, lang in [("Mitkä ovat aukioloajat?", "fi"), ("Kan jag betala med kort?", "sv"),
+                        ("Do you have vegan products?", "en")]:
+            top = r.retrieve(q, lang, top_k=3)[0][1]
+            self.assertEqual(top.meta.get("lang"), lang, q)
+            self.assertEqual(top.meta.get("source"), "faq.json", q)
+
+
+if __name__ == "__main__":
+    unittest.main()
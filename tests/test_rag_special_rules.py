@@ -0,0 +1,82 @@
+import sys
+import unittest
+from pathlib import Path
+
+_RAG_SRC = Path(__file__).resolve().parents[1] / "kotileipomo-rag" / "src"
+if str(_RAG_SRC) not in sys.path:
+    sys.path.insert(0, str(_RAG_SRC))
+
+from rag.generate import _SPECIAL, _special_answer
+from rag.rules import Rule, RuleSet
+
+
+def _reply(text):
+    return {"fi": text, "en": text, "sv": text}
+
+
+class TestRuleSet(unittest.TestCase):
+    def test_all_groups_blockers_and_order(self):
+        rules = RuleSet([
+            Rule("both", all_of=(("pulla",), ("kahvi", "coffee")), reply=_reply("both")),
+            Rule("blocked", all_of=(("pulla",),), none_of=("vegaan",), reply=_reply("blocked")),
+            Rule("fallback", all_of=(("pulla",),), reply=_reply("fallback")),
+        ])
+        self.assertEqual(rules.answer("pulla ja kahvi", "fi"), "both")
+        self.assertEqual(rules.answer("pulla", "fi"), "blocked")
+        self.assertEqual(rules.answer("vegaaninen pulla", "fi"), "fallback")
+        self.assertIsNone(rules.answer("kahvi", "fi"))
+
+    def test_overlapping_needles_are_all_found(self):
+        # "karjalanpiirakka" contains "piirakka" and "piira"; each needle must fire
+        rules = RuleSet([
+            Rule("short", all_of=(("piira",), ("karjalan",)), reply=_reply("short")),
+            Rule("long", all_of=(("piirakka",),), reply=_reply("long")),
+        ])
+        self.assertEqual(rules.match("karjalanpiirakka", "fi").name, "short")
+        self.assertEqual(rules.match("piirakka", "fi").name, "long")
+
+    def test_langs_and_guard(self):
+        rules = RuleSet([
+            Rule("fi_only", all_of=(("kortti", "card"),), langs=frozenset({"fi"}), reply=_reply("fi")),
+            Rule("short", all_of=(("card",),), guard=lambda q: len(q.words) <= 2 and not q.has(("gift",)),
+                 uses=("gift",), reply=_reply("short")),
+        ])
+        self.assertEqual(rules.match("card", "fi").name, "fi_only")
+        self.assertEqual(rules.match("card", "en").name, "short")
+        self.assertIsNone(rules.match("gift card", "en"))
+        self.assertIsNone(rules.match("can I pay by card", "en"))
+
+    def test_invalid_rules_rejected(self):
+        with self.assertRaises(ValueError):
+            RuleSet([Rule("a", all_of=(("x",),), reply=_reply("")), Rule("a", all_of=(("y",),), reply=_reply(""))])
+        with self.assertRaises(ValueError):
+            RuleSet([Rule("a", all_of=((),), reply=_reply(""))])
+
+
+class TestSpecialRules(unittest.TestCase):
+    def test_spot_checks(self):
+        cases = [
+            ("hei", "fi", "greeting"),
+            ("Mitkä ovat aukioloajat?", "fi", "hours"),
+            ("Oletteko auki maanantaina?", "fi", "closed_monday"),
+            ("Can I pick up at 19:00?", "en", "pickup_outside_hours"),
+            ("Voinko noutaa lauantaina klo 16?", "fi", "pickup_outside_hours"),
+            ("Haluaisin tehdä tilauksen", "fi", "order"),
+        ]
+        for query, lang, name in cases:
+            rule = _SPECIAL.match(query, lang)
+            self.assertIsNotNone(rule, query)
+            self.assertEqual(rule.name, name, query)
+        self.assertIsNone(_SPECIAL.match("Voinko noutaa lauantaina klo 14?", "fi"))
+        self.assertIsNone(_special_answer("zzzz", "fi"))
+
+    def test_replies_render_in_every_language(self):
+        for rule in _SPECIAL.rules:
+            for lang in sorted(rule.langs or {"fi", "en", "sv"}):
+                self.assertTrue(rule.render(lang), f"{rule.name}/{lang}")
+        # Unknown languages fall back to Finnish
+        self.assertEqual(_special_answer("hei", "de"), _special_answer("hei", "fi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,14 @@
+import tempfile
 import unittest
+from pathlib import Path
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 from backend.app import app
+from backend.constraints_service import ConstraintsService
+from backend.order_queue import OrderQueue
+import backend.routers.orders as orders
 
 
 def _next_thu_12(now: datetime) -> str:
@@ -61,9 +66,13 @@ class TestV2OrderPayload(unittest.TestCase):
                 captured["json"] = json
                 return FakeResp()
 
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        queue = OrderQueue(str(Path(tmp.name) / "q.sqlite3"), orders._submit_to_ecwid, autostart=False)
         with TestClient(app) as client:
-            with patch("backend.routers.orders.ecwid_get_shipping_options", return_value=fake_ship_opts), \
-                 patch("backend.routers.orders.ecwid_get_profile", return_value=fake_profile), \
+            service = ConstraintsService(fetch=lambda: (fake_ship_opts, fake_profile))
+            with patch("backend.routers.orders.get_constraints_service", return_value=service), \
+                 patch("backend.routers.orders._order_queue", return_value=queue), \
                  patch("backend.routers.orders.httpx.Client", FakeClient):
                 payload = {
                     "items": [
@@ -88,7 +97,9 @@ class TestV2OrderPayload(unittest.TestCase):
                 r = client.post("/api/v2/order", json=payload)
                 if r.status_code == 403 and 'Ordering is disabled' in r.text:
                     self.skipTest('Ordering API is disabled in this environment')
-                self.assertEqual(r.status_code, 200, r.text)
+                self.assertEqual(r.status_code, 202, r.text)
+                queue.run_pending()
+                self.assertEqual(queue.get(r.json()["ref"])["status"], "submitted")
 
         # Assert payload sent to Ecwid contains both items with productId, sku, and name
         sent = captured.get("json") or {}